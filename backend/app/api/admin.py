@@ -1,12 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from app.core.timing import TimedRoute
 from app.db.session import get_db
 from app import models, schemas
 from app.core.config import settings
+from app.services import rule_compiler
+from app.services.catalog import bump_catalog_version
+from app.services.change_log import record_changes
+from app.services.db_setup import INTERNAL_SETTINGS
+from app.services.reference_index import reference_index
+from app.services.response_cache import product_fieldset, product_fieldsets, rules_json
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/admin/login")
 
@@ -42,17 +49,29 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
 def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
     db_product = models.Product(**product.model_dump())
     db.add(db_product)
+    db.flush()
+    recompiled = rule_compiler.recompile_rules(db, {db_product.id})
+    version = bump_catalog_version(db)
+    record_changes(db, version, "product", upserted=[db_product.id])
+    record_changes(db, version, "rule", upserted=recompiled)
     db.commit()
     db.refresh(db_product)
     return db_product
 
 @router.get("/products/", response_model=List[schemas.Product])
-def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    # Public endpoint? Or protected? Usually products are public for the configurator.
-    # The requirement says "admin panel should be password protected".
-    # The configurator needs to read products. So GET should be public.
-    products = db.query(models.Product).offset(skip).limit(limit).all()
-    return products
+def read_products(skip: int = 0, limit: int = 100, fields: Optional[str] = None, projection: Optional[str] = None,
+                  db: Session = Depends(get_db)):
+    """
+    Public: the configurator reads the catalog from here.
+    ?fields=id,name,price_1 or ?projection=card|pricing|full returns only those
+    fields (id is always included).
+    """
+    try:
+        fieldset = product_fieldset(fields, projection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Served from bytes encoded once per catalog version and field set
+    return product_fieldsets.get(fieldset).response(db, skip, limit)
 
 @router.get("/products/export")
 def export_products(db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
@@ -88,7 +107,12 @@ def import_products(products: List[schemas.ProductCreate], db: Session = Depends
             new_product = models.Product(**product_data.model_dump())
             db.add(new_product)
             added += 1
-            
+
+    db.flush()
+    recompiled = rule_compiler.recompile_rules(db, {p.id for p in products})
+    version = bump_catalog_version(db)
+    record_changes(db, version, "product", upserted=[p.id for p in products])
+    record_changes(db, version, "rule", upserted=recompiled)
     db.commit()
     return {"added": added, "updated": updated}
 
@@ -99,12 +123,25 @@ def read_product(product_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
+@router.get("/products/{product_id}/impact", response_model=schemas.ProductImpact)
+def product_impact(product_id: str, db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
+    """Dry run of delete_product: what would be orphaned or stop firing."""
+    reference_index.ensure_fresh(db)
+    if product_id not in reference_index.products:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return reference_index.product_impact(product_id)
+
 @router.delete("/products/{product_id}")
 def delete_product(product_id: str, db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     db.delete(product)
+    db.flush()
+    recompiled = rule_compiler.recompile_rules(db, {product_id})
+    version = bump_catalog_version(db)
+    record_changes(db, version, "product", deleted=[product_id])
+    record_changes(db, version, "rule", upserted=recompiled)
     db.commit()
     return {"ok": True}
 
@@ -116,26 +153,53 @@ def update_product(product_id: str, product: schemas.ProductCreate, db: Session
     
     # Update fields
     product_data = product.model_dump(exclude_unset=True)
+    renamed = product_data.get("id", product_id) != product_id
+    if renamed and db.get(models.Product, product_data["id"]) is not None:
+        raise HTTPException(status_code=409, detail=f"Product {product_data['id']} already exists")
     for key, value in product_data.items():
         setattr(db_product, key, value)
-        
+
+    version = bump_catalog_version(db)
+    record_changes(db, version, "product", upserted=[db_product.id])
+    if renamed:
+        # Clients still hold the old id: tombstone it, and rules naming either id compile differently now
+        db.flush()
+        record_changes(db, version, "product", deleted=[product_id])
+        record_changes(db, version, "rule", upserted=rule_compiler.recompile_rules(db, {product_id, db_product.id}))
     db.commit()
     db.refresh(db_product)
     return db_product
 
 # --- Rules ---
+def check_rule_definition(definition: dict, category: str | None, known_products: set,
+                          index: rule_compiler.RuleSetIndex) -> tuple[dict, str, dict]:
+    """Normalize/compile a definition, rejecting grammar errors and exact duplicates in the same category."""
+    try:
+        normalized, fingerprint, compiled = rule_compiler.prepare_rule(definition, known_products, index)
+    except rule_compiler.RuleDefinitionError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+    duplicate = index.duplicate_of(fingerprint, category)
+    if duplicate is not None:
+        raise HTTPException(status_code=409, detail=f"An identical rule already exists in this category (id {duplicate})")
+    return normalized, fingerprint, compiled
+
 @router.post("/rules/", response_model=schemas.Rule)
 def create_rule(rule: schemas.RuleCreate, db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
-    db_rule = models.Rule(**rule.model_dump())
+    definition, fingerprint, compiled = check_rule_definition(
+        rule.definition, rule.category, rule_compiler.product_ids(db), rule_compiler.RuleSetIndex.from_db(db)
+    )
+    db_rule = models.Rule(**rule.model_dump(exclude={"definition"}), definition=definition, fingerprint=fingerprint, compiled=compiled)
     db.add(db_rule)
+    db.flush()
+    version = bump_catalog_version(db)
+    record_changes(db, version, "rule", upserted=[db_rule.id])
     db.commit()
     db.refresh(db_rule)
     return db_rule
 
 @router.get("/rules/", response_model=List[schemas.Rule])
 def read_rules(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    rules = db.query(models.Rule).offset(skip).limit(limit).all()
-    return rules
+    return rules_json.response(db, skip, limit)
 
 @router.get("/rules/export")
 def export_rules(db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
@@ -156,28 +220,99 @@ def export_rules(db: Session = Depends(get_db), admin: str = Depends(get_current
 def import_rules(rules: List[schemas.RuleImport], db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
     added = 0
     updated = 0
-    
-    for rule_data in rules:
-        if rule_data.id:
-            existing = db.query(models.Rule).filter(models.Rule.id == rule_data.id).first()
+    duplicates = 0
+    errors = []
+    known_products = rule_compiler.product_ids(db)
+    index = rule_compiler.RuleSetIndex.from_db(db)
+    written = []
+
+    for i, rule_data in enumerate(rules):
+        existing = db.query(models.Rule).filter(models.Rule.id == rule_data.id).first() if rule_data.id else None
+        if existing:
+            index.remove(existing.id)
+        try:
+            definition, fingerprint, compiled = rule_compiler.prepare_rule(rule_data.definition, known_products, index)
+        except rule_compiler.RuleDefinitionError as e:
+            errors.append(f"Rule {i + 1} ({rule_data.description}): {e}")
             if existing:
-                # Update
-                existing.description = rule_data.description
-                existing.definition = rule_data.definition
-                updated += 1
-                continue
+                index.add(existing.id, existing.fingerprint, existing.compiled, existing.category)
+            continue
+        duplicate = index.duplicate_of(fingerprint, rule_data.category)
+        if duplicate is not None:
+            # Identical to a stored rule or one earlier in this file
+            duplicates += 1
+            if existing:
+                index.add(existing.id, existing.fingerprint, existing.compiled, existing.category)
+            continue
+
+        if existing:
+            # Update
+            existing.description = rule_data.description
+            existing.category = rule_data.category
+            existing.definition = definition
+            existing.fingerprint = fingerprint
+            existing.compiled = compiled
+            index.add(existing.id, fingerprint, compiled, rule_data.category)
+            written.append(existing.id)
+            updated += 1
+            continue
         
         # Create (if no ID or ID not found - though if ID provided but not found, maybe we should create with that ID? 
         # Auto-increment usually handles IDs. Let's treat "ID not found" as "Create new" but ignore the ID to let DB assign one.
         # Or should we force the ID? For migration, forcing ID is better.
         # But SQLite/Postgres auto-increment might conflict.
         # Let's stick to: If ID exists in DB -> Update. Else -> Create new (ignoring input ID).
-        new_rule = models.Rule(description=rule_data.description, definition=rule_data.definition)
+        new_rule = models.Rule(description=rule_data.description, category=rule_data.category, definition=definition,
+                               fingerprint=fingerprint, compiled=compiled)
         db.add(new_rule)
+        db.flush()
+        index.add(new_rule.id, fingerprint, compiled, rule_data.category)
+        written.append(new_rule.id)
         added += 1
-            
+
+    version = bump_catalog_version(db)
+    record_changes(db, version, "rule", upserted=written)
     db.commit()
-    return {"added": added, "updated": updated}
+    return {"added": added, "updated": updated, "duplicates": duplicates, "errors": errors}
+
+@router.post("/rules/impact", response_model=schemas.RuleImpact)
+def rule_impact(request: schemas.RuleImpactRequest, db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
+    """
+    Dry run of creating (definition), updating (rule_id + definition) or deleting (rule_id)
+    a rule against the stored configurations and examples. Nothing is saved.
+    """
+    if request.rule_id is None and request.definition is None:
+        raise HTTPException(status_code=400, detail="Provide rule_id, definition or both")
+    reference_index.ensure_fresh(db)
+
+    old_rule = None
+    if request.rule_id is not None:
+        db_rule = db.query(models.Rule).filter(models.Rule.id == request.rule_id).first()
+        if db_rule is None:
+            raise HTTPException(status_code=404, detail="Rule not found")
+        old_rule = {"description": db_rule.description, "definition": db_rule.definition, "compiled": db_rule.compiled}
+
+    new_rule, warnings = None, []
+    if request.definition is not None:
+        try:
+            definition = rule_compiler.normalize_definition(request.definition)
+        except rule_compiler.RuleDefinitionError as e:
+            raise HTTPException(status_code=422, detail=e.errors)
+        compiled = rule_compiler.compile_rule(definition, set(reference_index.products))
+        description = request.description if request.description is not None else (old_rule or {}).get("description")
+        new_rule = {"description": description, "definition": definition, "compiled": compiled}
+        warnings = compiled["warnings"]
+
+    return {**reference_index.rule_impact(old_rule, new_rule), "warnings": warnings}
+
+@router.post("/rules/recompile")
+def recompile_rules(db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
+    """Recompile every stored rule, e.g. after upgrading or for rules loaded by seed scripts."""
+    recompiled = rule_compiler.recompile_rules(db)
+    version = bump_catalog_version(db)
+    record_changes(db, version, "rule", upserted=recompiled)
+    db.commit()
+    return {"recompiled": len(recompiled)}
 
 @router.delete("/rules/{rule_id}")
 def delete_rule(rule_id: int, db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
@@ -185,6 +320,8 @@ def delete_rule(rule_id: int, db: Session = Depends(get_db), admin: str = Depend
     if rule is None:
         raise HTTPException(status_code=404, detail="Rule not found")
     db.delete(rule)
+    version = bump_catalog_version(db)
+    record_changes(db, version, "rule", deleted=[rule_id])
     db.commit()
     return {"ok": True}
 
@@ -194,11 +331,17 @@ def update_rule(rule_id: int, rule: schemas.RuleCreate, db: Session = Depends(ge
     if db_rule is None:
         raise HTTPException(status_code=404, detail="Rule not found")
     
+    index = rule_compiler.RuleSetIndex.from_db(db, exclude_id=rule_id)
+    definition, fingerprint, compiled = check_rule_definition(rule.definition, rule.category, rule_compiler.product_ids(db), index)
+
     # Update fields
     rule_data = rule.model_dump(exclude_unset=True)
+    rule_data.update(definition=definition, fingerprint=fingerprint, compiled=compiled)
     for key, value in rule_data.items():
         setattr(db_rule, key, value)
-        
+
+    version = bump_catalog_version(db)
+    record_changes(db, version, "rule", upserted=[rule_id])
     db.commit()
     db.refresh(db_rule)
     return db_rule
@@ -210,10 +353,12 @@ def read_settings(db: Session = Depends(get_db), admin: str = Depends(get_curren
     # But wait, configurator might need some settings?
     # Currently configurator only uses 'central_email' which is fetched by backend logic, not frontend.
     # So protecting GET settings is fine.
-    return db.query(models.SystemSetting).all()
+    return db.query(models.SystemSetting).filter(models.SystemSetting.key.notin_(INTERNAL_SETTINGS)).all()
 
 @router.put("/settings/{key}", response_model=schemas.SystemSetting)
 def update_setting(key: str, setting: schemas.SystemSettingCreate, db: Session = Depends(get_db), admin: str = Depends(get_current_admin)):
+    if key in INTERNAL_SETTINGS:
+        raise HTTPException(status_code=403, detail=f"Setting {key} is maintained by the application")
     db_setting = db.query(models.SystemSetting).filter(models.SystemSetting.key == key).first()
     if not db_setting:
         # Create if not exists
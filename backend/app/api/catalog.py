@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.core.timing import TimedRoute
+from app.db.session import get_db
+from app.schemas import schemas
+from app.services import change_log
+from app.services.catalog_events import catalog_broadcaster
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/changes", response_model=schemas.CatalogChanges)
+def read_changes(since: Optional[int] = None, db: Session = Depends(get_db)):
+    """
+    Products, rules and articles written or deleted after catalog version `since`.
+    With reset=true (no `since`, or the client is too far behind) the client
+    reloads the full lists; `version` is then the version to sync from next.
+    """
+    return change_log.changes_since(db, since)
+
+@router.get("/events")
+async def catalog_events(request: Request, since: Optional[int] = None, last_event_id: Optional[str] = Header(None)):
+    """
+    Server-sent events: a "catalog" event (the same body as /changes) whenever the
+    catalog changes, or "resync" when the client should call /changes itself.
+    Browsers reconnect with Last-Event-ID, which takes precedence over `since`.
+    """
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(
+        catalog_broadcaster.stream(request, since),
+        media_type="text/event-stream",
+        # No caching or proxy buffering of the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
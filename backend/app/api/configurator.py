@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Body
+from fastapi import APIRouter, Depends, HTTPException, Body, WebSocket, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import json
+from app.core.timing import TimedRoute
 from app.db.session import get_db
 from app.models import models
 from app.schemas import schemas
-from app.services import email_service
+from app.services import batch_validation, email_service, live_validation
+from app.services.catalog_arrays import catalog_arrays
+from app.services.config_sessions import SessionDeltaError, config_sessions, session_catalog
+from app.services.feasibility import feasibility_engine
 from app.core.config import settings
+from app.core import metrics
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/quote")
 def request_quote(quote: schemas.QuoteRequest, db: Session = Depends(get_db)):
+    metrics.QUOTE_REQUESTS.inc()
+
     # Prepare attachments
     attachments = []
     if quote.pdf_base64:
@@ -64,6 +73,7 @@ def create_configuration(config: schemas.ConfigurationCreate, db: Session = Depe
     
     db.commit()
     db.refresh(db_config)
+    metrics.CONFIGURATIONS_CREATED.inc()
 
     # 3. "Send" Emails
     # Fetch central email
@@ -84,29 +94,105 @@ def create_configuration(config: schemas.ConfigurationCreate, db: Session = Depe
 
     return db_config
 
-@router.post("/validate/")
+@router.post("/validate/", response_model=schemas.ValidationResult)
+@metrics.VALIDATION_LATENCY.labels("configuration").time()
 def validate_configuration(items: List[schemas.ConfigItemBase], db: Session = Depends(get_db)):
-    # Simple validation logic (placeholder for more complex rules engine)
-    # Check for incompatible products based on Rules
-    
-    warnings = []
-    errors = []
-    
-    product_ids = [item.product_id for item in items]
-    
-    # Fetch all active rules
-    rules = db.query(models.Rule).all()
-    
-    for rule in rules:
-        if rule.trigger_product_id in product_ids:
-            # Check incompatibilities
-            for incompatible_id in rule.incompatible_product_ids:
-                if incompatible_id in product_ids:
-                    errors.append(f"Product {rule.trigger_product_id} is incompatible with {incompatible_id}")
-            
-            # Check requirements
-            for required_id in rule.required_product_ids:
-                if required_id not in product_ids:
-                    warnings.append(f"Product {rule.trigger_product_id} requires {required_id}")
+    """Validate configuration items (as stored in a Configuration) against the rules and the catalog."""
+    products, rules, arrays = batch_validation.load_catalog_arrays(db, catalog_arrays)
+    state = batch_validation.configuration_state(items, {p["id"]: p for p in products})
+    result = batch_validation.BatchValidator(products, rules, arrays=arrays).validate(
+        [{"source": "request", "id": 0, "config": state}]
+    )[0]
+    return {"valid": result["valid"], "errors": result["errors"], "warnings": result["warnings"]}
+
+@router.post("/validate/batch")
+def validate_batch(request: schemas.BatchValidationRequest, db: Session = Depends(get_db)):
+    """
+    Validate posted ConfigStates and, on request, all stored configurations and examples.
+    Streams one NDJSON line per configuration: {"source", "id", "valid", "errors", "warnings"}.
+    """
+    # The arrays stay at this version for the whole stream
+    products, rules, arrays = batch_validation.load_catalog_arrays(db, catalog_arrays)
+    entries = [{"source": "request", "id": i, "config": config} for i, config in enumerate(request.configs)]
+    if request.stored:
+        entries += batch_validation.stored_configurations(db, {p["id"]: p for p in products})
+    if request.examples:
+        entries += batch_validation.example_configurations(db)
+
+    # In this worker: a process pool per request would start fresh interpreters for every call
+    results = batch_validation.validate_entries(
+        entries, products, rules,
+        ignore_categories=request.ignore_categories,
+        arrays=arrays,
+    )
+    return StreamingResponse((json.dumps(result) + "\n" for result in results), media_type="application/x-ndjson")
+
+@router.post("/feasibility", response_model=schemas.FeasibilityResult)
+@metrics.VALIDATION_LATENCY.labels("feasibility").time()
+def slot_feasibility(request: schemas.FeasibilityRequest, db: Session = Depends(get_db)):
+    """Products that component_selected/forbid rules rule out for one slot, from the bitset engine."""
+    feasibility_engine.ensure_fresh(db)
+    return {
+        "slot": request.slot,
+        "forbidden": feasibility_engine.forbidden_products(request.config, request.slot),
+        "residual_rules": feasibility_engine.residual_rules,
+    }
+
+# --- Configuration sessions ---
+def get_session(session_id: str, db: Session):
+    session = config_sessions.get(db, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return session
+
+@router.post("/sessions", response_model=schemas.SessionState, status_code=status.HTTP_201_CREATED)
+def create_session(request: schemas.SessionCreate, quantity: int = 1, db: Session = Depends(get_db)):
+    """Start a server-side session for a ConfigState; later changes are sent as deltas."""
+    session_catalog.ensure_fresh(db)
+    try:
+        session = config_sessions.create(db, request.config, request.ignore_categories)
+    except SessionDeltaError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    with session.lock:
+        return {**session.evaluate(session_catalog, quantity), "config": session.state}
+
+@router.get("/sessions/{session_id}", response_model=schemas.SessionState)
+def read_session(session_id: str, quantity: int = 1, db: Session = Depends(get_db)):
+    session_catalog.ensure_fresh(db)
+    session = get_session(session_id, db)
+    with session.lock:
+        return {**session.evaluate(session_catalog, quantity), "config": session.state}
+
+@router.patch("/sessions/{session_id}", response_model=schemas.SessionResult)
+@metrics.VALIDATION_LATENCY.labels("session").time()
+def update_session(session_id: str, update: schemas.SessionUpdate, quantity: int = 1, db: Session = Depends(get_db)):
+    """
+    Apply deltas in order (all or none) and return the violations of the new state,
+    with `added`/`resolved` relative to the previous revision.
+    """
+    session_catalog.ensure_fresh(db)
+    session = get_session(session_id, db)
+    with session.lock:
+        try:
+            session = config_sessions.apply(db, session, [d.model_dump(exclude_unset=True) for d in update.deltas])
+        except SessionDeltaError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except KeyError:
+            raise HTTPException(status_code=404, detail="Session not found or expired")
+        with session.lock:
+            return session.evaluate(session_catalog, quantity)
+
+@router.delete("/sessions/{session_id}")
+def delete_session(session_id: str, db: Session = Depends(get_db)):
+    if not config_sessions.delete(db, session_id):
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return {"ok": True}
 
-    return {"valid": len(errors) == 0, "errors": errors, "warnings": warnings}
+@router.websocket("/live")
+async def live_session(websocket: WebSocket, session_id: Optional[str] = None, quantity: int = 1):
+    """
+    Live validation: send {"seq", "deltas", "quantity"} messages, receive a result
+    (violations, aggregates, unit price) per batch of edits. Continues `session_id`
+    if given, otherwise starts a new session (its id is in every result).
+    """
+    await live_validation.serve(websocket, session_id, quantity)
@@ -1,17 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
-import json
+from app.core.timing import TimedRoute
 from app.db.session import get_db
 from app.models import example as models
 from app.schemas import example as schemas
+from app.services.catalog import bump_examples_version
+from app.services.example_configs import apply_config, example_config
+from app.services.response_cache import example_summaries_json, examples_json
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# Examples written per transaction during import
+IMPORT_CHUNK_SIZE = 500
 
 @router.get("/", response_model=List[schemas.ExampleConfig])
 def read_examples(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    examples = db.query(models.ExampleConfig).offset(skip).limit(limit).all()
-    return examples
+    return examples_json.response(db, skip, limit)
+
+@router.get("/summaries", response_model=List[schemas.ExampleSummary])
+def read_example_summaries(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+    """Gallery listing: only the summary columns are loaded, not the configurations."""
+    return example_summaries_json.response(db, skip, limit)
+
+@router.get("/{example_id}", response_model=schemas.ExampleDetail)
+def read_example(example_id: str, db: Session = Depends(get_db)):
+    db_example = db.query(models.ExampleConfig).filter(models.ExampleConfig.id == example_id).first()
+    if db_example is None:
+        raise HTTPException(status_code=404, detail="Example not found")
+    return {**schemas.ExampleSummary.model_validate(db_example).model_dump(), "config": example_config(db_example)}
 
 @router.post("/", response_model=schemas.ExampleConfig)
 def create_example(example: schemas.ExampleConfigCreate, db: Session = Depends(get_db)):
@@ -19,8 +36,10 @@ def create_example(example: schemas.ExampleConfigCreate, db: Session = Depends(g
     if db.query(models.ExampleConfig).filter(models.ExampleConfig.id == example.id).first():
         raise HTTPException(status_code=400, detail="Example Number already exists")
     
-    db_example = models.ExampleConfig(**example.model_dump())
+    db_example = models.ExampleConfig(**example.model_dump(exclude={"config_json"}))
+    apply_config(db_example, example.config_json)
     db.add(db_example)
+    bump_examples_version(db)
     db.commit()
     db.refresh(db_example)
     return db_example
@@ -31,9 +50,11 @@ def update_example(example_id: str, example: schemas.ExampleConfigUpdate, db: Se
     if db_example is None:
         raise HTTPException(status_code=404, detail="Example not found")
     
-    for key, value in example.model_dump().items():
+    for key, value in example.model_dump(exclude={"config_json"}).items():
         setattr(db_example, key, value)
+    apply_config(db_example, example.config_json)
     
+    bump_examples_version(db)
     db.commit()
     db.refresh(db_example)
     return db_example
@@ -45,6 +66,7 @@ def delete_example(example_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Example not found")
     
     db.delete(db_example)
+    bump_examples_version(db)
     db.commit()
     return {"ok": True}
 
@@ -55,66 +77,79 @@ def export_examples(db: Session = Depends(get_db)):
     for ex in examples:
         # Pydantic dump
         obj = schemas.ExampleConfig.model_validate(ex).model_dump()
-        # Parse nested JSON
-        try:
-            if isinstance(obj['config_json'], str):
-                obj['config_json'] = json.loads(obj['config_json'])
-        except:
-            pass # Keep as string if parsing fails
+        # Nested configuration as an object (kept as a string if it isn't valid JSON)
+        config = example_config(ex)
+        if config is not None:
+            obj['config_json'] = config
         results.append(obj)
     return results
 
 @router.post("/import")
 def import_examples(examples: List[schemas.ExampleConfigImport], db: Session = Depends(get_db)):
     results = {"created": 0, "updated": 0, "failed": 0, "errors": []}
-    
-    for ex_data in examples:
-        try:
-            # Ensure config_json is string for DB
-            data_dict = ex_data.model_dump()
-            if not isinstance(data_dict['config_json'], str):
-                data_dict['config_json'] = json.dumps(data_dict['config_json'])
-                
-            # Check by ID if present
-            # For import, ID is optional in schema (ExampleConfigImport), but we need it for uniqueness.
-            # If not provided, should we auto-generate?
-            # User said "Example number should be unique". 
-            # If ID is missing in import, we can't really "update existing based on Example number".
-            # Assume ID is present for update.
-            # If missing, maybe fail? Or generate "UNKNOWN-X"?
-            
-            ex_id = ex_data.id
-            if ex_id:
-                existing = db.query(models.ExampleConfig).filter(models.ExampleConfig.id == ex_id).first()
-                if existing:
-                    # Update
-                    update_data = data_dict.copy()
-                    if 'id' in update_data: del update_data['id']
-                    
-                    for k, v in update_data.items():
-                        setattr(existing, k, v)
-                    results["updated"] += 1
-                else:
-                    # Create with ID
-                    db_ex = models.ExampleConfig(**data_dict)
-                    db.add(db_ex)
-                    results["created"] += 1
+
+    # Resolve existing examples in one query; rows created below are added so a
+    # repeated id later in the upload updates them, as it always did
+    ids = {ex.id for ex in examples if ex.id}
+    by_id = {}
+    if ids:
+        by_id = {ex.id: ex for ex in db.query(models.ExampleConfig).filter(models.ExampleConfig.id.in_(ids))}
+
+    def write(ex_data: schemas.ExampleConfigImport):
+        """Create or update one example in the session; returns the new row if it was created."""
+        existing = by_id.get(ex_data.id)
+        if existing is not None:
+            for k, v in ex_data.model_dump(exclude={"id", "config_json"}).items():
+                setattr(existing, k, v)
+            apply_config(existing, ex_data.config_json)
+            return None
+        db_ex = models.ExampleConfig(**ex_data.model_dump(exclude={"config_json"}))
+        apply_config(db_ex, ex_data.config_json)
+        db.add(db_ex)
+        return db_ex
+
+    for start in range(0, len(examples), IMPORT_CHUNK_SIZE):
+        chunk = []
+        for ex_data in examples[start:start + IMPORT_CHUNK_SIZE]:
+            # The Example Number (id) is what an import matches on; without it we can't tell create from update
+            if ex_data.id:
+                chunk.append(ex_data)
             else:
-                # Missing ID in import?
-                # Generate random?
-                # Let's skip or error if ID is required for uniqueness but missing.
-                # Or just create and let DB error if null (it is PK).
-                # But schema has Optional[str].
-                # User requirement: "Import JSON enables to update existing based on the Example number"
-                
-                # If no ID, we can't determine uniqueness easily.
                 results["failed"] += 1
                 results["errors"].append(f"Missing Example Number (id) for {ex_data.name}")
-                
-            db.commit()
-        except Exception as e:
-            db.rollback()
-            results["failed"] += 1
-            results["errors"].append(f"Error processing {ex_data.name}: {str(e)}")
-            
+        known = dict(by_id)
+
+        # Whole chunk under one savepoint and one flush
+        created = []
+        try:
+            with db.begin_nested():
+                for ex_data in chunk:
+                    db_ex = write(ex_data)
+                    if db_ex is not None:
+                        by_id[ex_data.id] = db_ex
+                    created.append(db_ex is not None)
+                db.flush()
+        except Exception:
+            # A row failed: redo the chunk with a savepoint per row so only that row is dropped
+            by_id, created = known, []
+            for ex_data in chunk:
+                try:
+                    with db.begin_nested():
+                        db_ex = write(ex_data)
+                        db.flush()
+                except Exception as e:
+                    results["failed"] += 1
+                    results["errors"].append(f"Error processing {ex_data.name}: {str(e)}")
+                    continue
+                if db_ex is not None:
+                    by_id[ex_data.id] = db_ex
+                created.append(db_ex is not None)
+
+        results["created"] += sum(created)
+        results["updated"] += len(created) - sum(created)
+        if created:
+            bump_examples_version(db)
+        # One transaction per chunk so large uploads don't hold one huge transaction
+        db.commit()
+
     return results
@@ -14,6 +14,39 @@ class Settings(BaseSettings):
     EMAILS_FROM_NAME: str | None = "System Configurator"
     SALES_EMAIL: str | None = "sales@example.com"
     
+    # Instrumentation: Server-Timing headers + per-request timing log lines
+    # (can be overridden per request with the X-Request-Timing header)
+    REQUEST_TIMING: bool = True
+
+    # Catalog versions for which tombstones stay in the change log; clients that
+    # are further behind get a full reload from /api/catalog/changes
+    CATALOG_CHANGES_RETENTION: int = 1000
+
+    # /api/catalog/events: how often each worker checks the catalog version, the
+    # events a connection may fall behind before it is told to resync, the largest
+    # delta (rows) sent inline, and keepalive / client reconnect intervals
+    CATALOG_EVENTS_POLL_SECONDS: float = 1.0
+    CATALOG_EVENTS_QUEUE_SIZE: int = 16
+    CATALOG_EVENTS_MAX_ROWS: int = 500
+    CATALOG_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    CATALOG_EVENTS_RETRY_MS: int = 5000
+
+    # /api/config/sessions: live sessions per worker, idle time before a session
+    # expires, and whether sessions are also stored in the DB (shared by workers
+    # and kept across restarts)
+    CONFIG_SESSIONS_MAX: int = 10000
+    CONFIG_SESSION_TTL_SECONDS: int = 3600
+    CONFIG_SESSIONS_PERSIST: bool = False
+
+    # /api/config/live: edits arriving within the debounce window are validated
+    # together, but a result is never held back longer than the max delay
+    LIVE_VALIDATION_DEBOUNCE_MS: int = 30
+    LIVE_VALIDATION_MAX_DELAY_MS: int = 250
+
+    # Shared, memory-mapped catalog arrays and rule bitsets (see
+    # app/services/catalog_file.py); unset = every worker builds its own
+    CATALOG_FILE: str | None = None
+
     # Auth
     ADMIN_PASSWORD: str = "admin" # Default fallback
 
@@ -0,0 +1,98 @@
+"""
+Prometheus metrics.
+
+With several uvicorn workers each process keeps its own counters. When
+PROMETHEUS_MULTIPROC_DIR is set (see deployment/start_prod.sh) prometheus_client
+writes them to mmap'd files in that directory and /metrics aggregates all
+workers, so scraping any worker returns numbers for the whole process group.
+"""
+import os
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import REGISTRY, multiprocess
+from app.core.timing import route_template
+
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections",
+    "DB connections currently checked out of the pool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "DB connections currently held by the pool (checked in or out)",
+    multiprocess_mode="livesum",
+)
+EMAILS = Counter(
+    "emails_total",
+    "Outgoing emails by outcome (sent, failed, skipped)",
+    ["outcome"],
+)
+QUOTE_REQUESTS = Counter(
+    "quote_requests_total",
+    "Quote requests submitted",
+)
+CONFIGURATIONS_CREATED = Counter(
+    "configurations_created_total",
+    "Configurations stored via /api/config/configurations/",
+)
+VALIDATION_LATENCY = Histogram(
+    "validation_duration_seconds",
+    "Configuration validation and rule evaluation time",
+    ["kind"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+def render_metrics() -> tuple[bytes, str]:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_worker_dead(pid: int | None = None):
+    # Drops the live gauges (in-flight requests, pool stats) of this worker, or of
+    # the worker `pid` that the master saw exit, from the aggregate
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(os.getpid() if pid is None else pid)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency histograms and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            # Unmatched paths share one label so scanners can't blow up the series count
+            route = route_template(scope) if scope.get("route") is not None else "<unmatched>"
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - start)
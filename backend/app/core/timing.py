@@ -0,0 +1,176 @@
+import functools
+import inspect
+import json
+import logging
+import re
+import time
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from app.core.config import settings
+
+logger = logging.getLogger("app.timing")
+
+# Per-request switch: "X-Request-Timing: 0" turns instrumentation off, "1" turns it on
+TIMING_HEADER = b"x-request-timing"
+
+class RequestTiming:
+    """Timings collected for a single request; shared by the middleware, route and DB events."""
+    __slots__ = ("db_time", "db_statements", "handler_time", "endpoint_time")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_statements = 0
+        self.handler_time = 0.0
+        self.endpoint_time = 0.0
+
+current_timing: ContextVar[RequestTiming | None] = ContextVar("current_timing", default=None)
+
+def configure_timing_log():
+    """
+    Write the timing lines to stderr whatever the launcher configured: under
+    `uvicorn app.main:app` the root logger has no handler and drops INFO records.
+    """
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s:     %(name)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    # Not again through a handler the launcher put on the root logger
+    logger.propagate = False
+
+def record_sql(duration: float):
+    timing = current_timing.get()
+    if timing is not None:
+        timing.db_time += duration
+        timing.db_statements += 1
+
+def _timed_endpoint(endpoint):
+    # Sync endpoints run in the threadpool, which copies the context, so the
+    # RequestTiming object set by the middleware is still reachable here.
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _add_endpoint_time(time.perf_counter() - start)
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _add_endpoint_time(time.perf_counter() - start)
+    return wrapper
+
+def _add_endpoint_time(duration: float):
+    timing = current_timing.get()
+    if timing is not None:
+        timing.endpoint_time += duration
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that separates endpoint time from the rest of the route handler.
+    handler - endpoint = request parsing + response validation/encoding ("serialize").
+    """
+
+    def __init__(self, path, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            timing = current_timing.get()
+            if timing is None:
+                return await handler(request)
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                timing.handler_time += time.perf_counter() - start
+
+        return timed_handler
+
+def route_template(scope) -> str:
+    """
+    Path template of the matched route, e.g. "/api/admin/products/{product_id}".
+    Depending on the FastAPI version, routes of included routers carry their path
+    with or without the router prefix, so the prefix is recovered from the request path.
+    """
+    route = scope.get("route")
+    path = scope["path"]
+    if route is None or not hasattr(route, "path_regex"):
+        return path
+    match = re.search(route.path_regex.pattern.lstrip("^"), path)
+    if match is None:
+        return route.path
+    return path[:match.start()] + route.path
+
+class TimingMiddleware:
+    """
+    ASGI middleware adding a Server-Timing header and one structured log line per request.
+    Collection is a few perf_counter calls and a context variable, so it can stay on in production.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._enabled(scope):
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = current_timing.set(timing)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", self._server_timing(timing, time.perf_counter() - start).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_timing.reset(token)
+            self._log(scope, status, timing, time.perf_counter() - start)
+
+    @staticmethod
+    def _enabled(scope) -> bool:
+        for name, value in scope.get("headers", []):
+            if name == TIMING_HEADER:
+                return value not in (b"0", b"off", b"false")
+        return settings.REQUEST_TIMING
+
+    @staticmethod
+    def _server_timing(timing: RequestTiming, total: float) -> str:
+        serialize = max(timing.handler_time - timing.endpoint_time, 0.0)
+        # The endpoint's own time includes its queries; report the rest as "app"
+        app_time = max(timing.endpoint_time - timing.db_time, 0.0)
+        return ", ".join([
+            f'db;dur={timing.db_time * 1000:.2f};desc="{timing.db_statements} queries"',
+            f"app;dur={app_time * 1000:.2f}",
+            f"serialize;dur={serialize * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ])
+
+    @staticmethod
+    def _log(scope, status: int, timing: RequestTiming, total: float):
+        logger.info(json.dumps({
+            "method": scope["method"],
+            "route": route_template(scope),
+            "status": status,
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(timing.db_time * 1000, 2),
+            "db_statements": timing.db_statements,
+            "serialize_ms": round(max(timing.handler_time - timing.endpoint_time, 0.0) * 1000, 2),
+        }))
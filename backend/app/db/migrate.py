@@ -0,0 +1,32 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from app.db.session import Base
+
+def upgrade_schema(engine: Engine):
+    """
+    Bring an existing database up to the current models without a migration tool:
+    create missing tables, then add missing nullable columns (and their indexes).
+    Existing columns are never altered or dropped.
+    """
+    # Make sure every model is registered on Base.metadata
+    from app import models  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    for table in Base.metadata.sorted_tables:
+        existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+        added = [c for c in table.columns if c.name not in existing and c.nullable]
+        for column in added:
+            column_type = column.type.compile(dialect=engine.dialect)
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            except DBAPIError:
+                # Another worker starting at the same time may have added it first
+                if column.name not in {c["name"] for c in inspect(engine).get_columns(table.name)}:
+                    raise
+        added_names = {c.name for c in added}
+        with engine.begin() as conn:
+            for index in table.indexes:
+                if added_names & {c.name for c in index.columns}:
+                    index.create(bind=conn, checkfirst=True)
@@ -1,6 +1,9 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import settings
+from app.core.timing import record_sql
+from app.core import metrics
 
 # Handle SQLite specific connect_args
 connect_args = {"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {}
@@ -9,6 +12,40 @@ engine = create_engine(
     settings.DATABASE_URL, connect_args=connect_args
 )
 
+@event.listens_for(engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    record_sql(time.perf_counter() - conn.info["query_start"].pop())
+
+@event.listens_for(engine, "handle_error")
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute; without an
+    # execution context it failed before before_cursor_execute, so there is
+    # nothing to pop
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if context.execution_context is not None and starts:
+        record_sql(time.perf_counter() - starts.pop())
+
+# Pool statistics for /metrics
+@event.listens_for(engine, "checkout")
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    metrics.DB_POOL_CHECKED_OUT.inc()
+
+@event.listens_for(engine, "checkin")
+def _checkin(dbapi_connection, connection_record):
+    metrics.DB_POOL_CHECKED_OUT.dec()
+
+@event.listens_for(engine, "connect")
+def _connect(dbapi_connection, connection_record):
+    metrics.DB_POOL_CONNECTIONS.inc()
+
+@event.listens_for(engine, "close")
+def _close(dbapi_connection, connection_record):
+    metrics.DB_POOL_CONNECTIONS.dec()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class Base(DeclarativeBase):
@@ -1,9 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api import admin, configurator, examples, articles
+from app.core.timing import TimingMiddleware, configure_timing_log
+from app.core import metrics
+from app.services import health
+from app.db.session import SessionLocal
+from app.services.db_setup import database_prepared, prepare_database
+from app.api import admin, catalog, configurator, examples, articles
 
 app = FastAPI(title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json")
+configure_timing_log()
 
 # CORS Configuration
 origins = [
@@ -18,10 +25,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(TimingMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
 app.include_router(configurator.router, prefix="/api/config", tags=["configurator"])
 app.include_router(examples.router, prefix="/api/examples", tags=["examples"])
 app.include_router(articles.router, prefix="/api/articles", tags=["articles"])
+app.include_router(catalog.router, prefix="/api/catalog", tags=["catalog"])
 
 @app.get("/")
 def read_root():
@@ -30,3 +40,25 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
+
+@app.get("/health/ready")
+async def readiness_check():
+    report = await health.check_readiness()
+    return JSONResponse(report, status_code=200 if report["status"] == "ok" else 503)
+
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    content, media_type = metrics.render_metrics()
+    return Response(content=content, media_type=media_type)
+
+@app.on_event("startup")
+def check_database():
+    # seed.py prepares the database; startup only upgrades one that wasn't prepared
+    with SessionLocal() as db:
+        prepared = database_prepared(db)
+    if not prepared:
+        prepare_database()
+
+@app.on_event("shutdown")
+def mark_worker_dead():
+    metrics.mark_worker_dead()
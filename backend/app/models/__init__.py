@@ -1,2 +1,2 @@
-from .models import Product, Rule, Configuration, ConfigItem, SystemSetting
+from .models import Product, Rule, Configuration, ConfigItem, SystemSetting, CatalogChange, ConfigSession
 from .example import ExampleConfig
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, JSON, String, Text
 from app.db.session import Base
 
 class ExampleConfig(Base):
@@ -9,3 +9,7 @@ class ExampleConfig(Base):
     description = Column(String)
     config_json = Column(Text) # Stores the full configuration state as JSON string
     image_url = Column(String, nullable=True)
+    # Parsed from config_json on save (services/example_configs.py)
+    config = Column(JSON, nullable=True)
+    slot_count = Column(Integer, nullable=True)
+    chassis_id = Column(String, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, JSON, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, String, Float, Boolean, JSON, ForeignKey, ARRAY
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -35,6 +35,12 @@ class Rule(Base):
     description = Column(String)
     category = Column(String, nullable=True)
     definition = Column(JSON) # Stores the full rule logic (conditions, actions)
+    compiled = Column(JSON, nullable=True) # Output of services/rule_compiler.py, refreshed on save
+    fingerprint = Column(String, nullable=True, index=True) # Hash of the normalized definition, for dedupe
+
+    @property
+    def warnings(self) -> list:
+        return (self.compiled or {}).get("warnings", [])
 
 class Configuration(Base):
     __tablename__ = "configurations"
@@ -70,3 +76,23 @@ class Article(Base):
     selected_options = Column(JSON) # { "option_id": "value" }
 
     product = relationship("Product")
+
+class CatalogChange(Base):
+    """Latest write per product, rule or article, for GET /api/catalog/changes (see services/change_log.py)."""
+    __tablename__ = "catalog_changes"
+
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(Integer, index=True) # catalog_version the write was committed with
+    entity = Column(String, index=True) # "product", "rule" or "article"
+    entity_id = Column(String, index=True)
+    deleted = Column(Boolean, default=False) # Tombstone
+
+class ConfigSession(Base):
+    """Spilled /api/config/sessions state (only with CONFIG_SESSIONS_PERSIST, see services/config_sessions.py)."""
+    __tablename__ = "config_sessions"
+
+    id = Column(String, primary_key=True, index=True)
+    state = Column(JSON) # ConfigState as in the configurator store
+    ignore_categories = Column(JSON, nullable=True)
+    revision = Column(Integer) # Bumped on every applied delta
+    expires_at = Column(Float, index=True) # Unix time
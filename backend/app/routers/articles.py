@@ -1,16 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List
+from collections import Counter
+from app.core.timing import TimedRoute
 from app.db.session import get_db
 from app.models import models
 from app.schemas import schemas
+from app.services.catalog import bump_catalog_version
+from app.services.change_log import record_changes
+from app.services.article_index import article_index
+from app.services.response_cache import articles_json
+from app.services.rule_engine import validate_options
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+# Rows written per statement during bulk import
+IMPORT_CHUNK_SIZE = 500
 
 @router.get("/", response_model=List[schemas.Article])
 def read_articles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    articles = db.query(models.Article).offset(skip).limit(limit).all()
-    return articles
+    return articles_json.response(db, skip, limit)
 
 @router.post("/", response_model=schemas.Article)
 def create_article(article: schemas.ArticleCreate, db: Session = Depends(get_db)):
@@ -20,26 +31,18 @@ def create_article(article: schemas.ArticleCreate, db: Session = Depends(get_db)
         raise HTTPException(status_code=404, detail="Product not found")
 
     # Validation: Check selected options
-    if product.options:
-        for opt_id, opt_val in article.selected_options.items():
-            # Find option definition
-            opt_def = next((o for o in product.options if o['id'] == opt_id), None)
-            if not opt_def:
-                # Option not found in product - Strict Mode: Error? Or Warn?
-                # Let's be strict for data integrity
-                raise HTTPException(status_code=400, detail=f"Invalid option ID: {opt_id}")
-            
-            # Validate value
-            if opt_def['type'] == 'select':
-                valid_values = [c['value'] for c in opt_def['choices']]
-                if opt_val not in valid_values:
-                    raise HTTPException(status_code=400, detail=f"Invalid value '{opt_val}' for option '{opt_id}'. Valid values: {valid_values}")
-            # Boolean/Text validation can be added here
+    error = validate_options(product.options, article.selected_options)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
 
     db_article = models.Article(**article.model_dump())
     db.add(db_article)
+    db.flush()
+    version = bump_catalog_version(db)
+    record_changes(db, version, "article", upserted=[db_article.id])
     db.commit()
     db.refresh(db_article)
+    article_index.record_upsert(db_article, version)
     return db_article
 
 @router.put("/{article_id}", response_model=schemas.Article)
@@ -53,22 +56,19 @@ def update_article(article_id: int, article: schemas.ArticleCreate, db: Session
     if not product:
          raise HTTPException(status_code=404, detail="Product not found")
 
-    if product.options:
-        for opt_id, opt_val in article.selected_options.items():
-            opt_def = next((o for o in product.options if o['id'] == opt_id), None)
-            if not opt_def:
-                raise HTTPException(status_code=400, detail=f"Invalid option ID: {opt_id}")
-            if opt_def['type'] == 'select':
-                valid_values = [c['value'] for c in opt_def['choices']]
-                if opt_val not in valid_values:
-                    raise HTTPException(status_code=400, detail=f"Invalid value '{opt_val}' for option '{opt_id}'")
+    error = validate_options(product.options, article.selected_options)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
 
     db_article.article_number = article.article_number
     db_article.product_id = article.product_id
     db_article.selected_options = article.selected_options
 
+    version = bump_catalog_version(db)
+    record_changes(db, version, "article", upserted=[article_id])
     db.commit()
     db.refresh(db_article)
+    article_index.record_upsert(db_article, version)
     return db_article
 
 @router.delete("/{article_id}")
@@ -77,44 +77,123 @@ def delete_article(article_id: int, db: Session = Depends(get_db)):
     if not db_article:
         raise HTTPException(status_code=404, detail="Article not found")
     db.delete(db_article)
+    version = bump_catalog_version(db)
+    record_changes(db, version, "article", deleted=[article_id])
     db.commit()
+    article_index.record_delete(article_id, version)
     return {"ok": True}
 
-@router.post("/import", response_model=List[schemas.Article])
+@router.post("/import")
 def import_articles(articles: List[schemas.ArticleImport], db: Session = Depends(get_db)):
-    new_articles = []
-    for a_data in articles:
-        # Check if exists by number? if id is provided update?
-        # Simple Logic: If ID provided, update. If not, create (or update by number?)
-        
-        # Validation checks omitted for brevity but should exist
-        
-        if a_data.id:
-            db_article = db.query(models.Article).filter(models.Article.id == a_data.id).first()
-            if db_article:
-                db_article.article_number = a_data.article_number
-                db_article.product_id = a_data.product_id
-                db_article.selected_options = a_data.selected_options
-                new_articles.append(db_article)
+    results = {"created": 0, "updated": 0, "failed": 0, "errors": []}
+
+    def fail(row: int, a_data: schemas.ArticleImport, message: str):
+        results["failed"] += 1
+        results["errors"].append(f"Row {row} ({a_data.article_number}): {message}")
+
+    # Duplicate article numbers inside the upload are rejected up front
+    number_counts = Counter(a.article_number for a in articles)
+
+    # Resolve existing rows and referenced products in one query each
+    ids = {a.id for a in articles if a.id}
+    numbers = set(number_counts)
+    product_ids = {a.product_id for a in articles}
+    by_id = {}
+    if ids:
+        by_id = {
+            row.id: row.article_number
+            for row in db.query(models.Article.id, models.Article.article_number).filter(models.Article.id.in_(ids))
+        }
+    by_number = {
+        row.article_number: row.id
+        for row in db.query(models.Article.id, models.Article.article_number).filter(models.Article.article_number.in_(numbers))
+    }
+    products = {
+        p.id: p for p in db.query(models.Product).filter(models.Product.id.in_(product_ids))
+    }
+
+    inserts = []
+    updates = []
+    updated_ids = set()
+    for row, a_data in enumerate(articles, start=1):
+        if number_counts[a_data.article_number] > 1:
+            fail(row, a_data, "Duplicate article number in upload")
+            continue
+
+        product = products.get(a_data.product_id)
+        if product is None:
+            fail(row, a_data, f"Product not found: {a_data.product_id}")
+            continue
+        error = validate_options(product.options, a_data.selected_options)
+        if error:
+            fail(row, a_data, error)
+            continue
+
+        values = {
+            "article_number": a_data.article_number,
+            "product_id": a_data.product_id,
+            "selected_options": a_data.selected_options,
+        }
+        # If ID provided and known, update it. Otherwise match by article number.
+        if a_data.id and a_data.id in by_id:
+            target = a_data.id
+            owner = by_number.get(a_data.article_number)
+            if owner is not None and owner != target:
+                fail(row, a_data, f"Article number already used by article {owner}")
                 continue
-        
-        # Check by article number
-        existing = db.query(models.Article).filter(models.Article.article_number == a_data.article_number).first()
-        if existing:
-            existing.product_id = a_data.product_id
-            existing.selected_options = a_data.selected_options
-            new_articles.append(existing)
         else:
-            new_article = models.Article(
-                article_number=a_data.article_number,
-                product_id=a_data.product_id,
-                selected_options=a_data.selected_options
-            )
-            db.add(new_article)
-            new_articles.append(new_article)
-    
-    db.commit()
-    return new_articles
+            target = by_number.get(a_data.article_number)
+
+        if target is None:
+            inserts.append(values)
+        elif target in updated_ids:
+            fail(row, a_data, f"Article {target} is updated by another row in this upload")
+        else:
+            updated_ids.add(target)
+            updates.append({"id": target, **values})
+
+    # Chunked statements, one transaction: the upload and its version bump are
+    # committed together or not at all
+    try:
+        for start in range(0, len(inserts), IMPORT_CHUNK_SIZE):
+            db.execute(insert(models.Article), inserts[start:start + IMPORT_CHUNK_SIZE])
+        for start in range(0, len(updates), IMPORT_CHUNK_SIZE):
+            db.execute(update(models.Article), updates[start:start + IMPORT_CHUNK_SIZE])
+    except IntegrityError:
+        # An article number taken by a concurrent write since the lookup above
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Articles changed during the import; nothing was written, retry the upload")
+    if inserts or updates:
+        # Bulk inserts don't return ids; look the new rows up by article number
+        written = [u["id"] for u in updates]
+        numbers = [values["article_number"] for values in inserts]
+        for start in range(0, len(numbers), IMPORT_CHUNK_SIZE):
+            written += [
+                article_id for (article_id,) in
+                db.query(models.Article.id).filter(models.Article.article_number.in_(numbers[start:start + IMPORT_CHUNK_SIZE]))
+            ]
+        version = bump_catalog_version(db)
+        record_changes(db, version, "article", upserted=written)
+        db.commit()
+        # Bulk writes: let the lookup index rebuild on next use
+        article_index.invalidate()
+
+    results["created"] = len(inserts)
+    results["updated"] = len(updates)
+    return results
+
+@router.post("/resolve", response_model=List[schemas.ArticleLookupResult])
+def resolve_articles(items: List[schemas.ArticleLookup], db: Session = Depends(get_db)):
+    # Resolve every configured slot (product + options) to its orderable article number
+    article_index.ensure_fresh(db)
+    return [
+        schemas.ArticleLookupResult(
+            product_id=item.product_id,
+            selected_options=item.selected_options,
+            article_number=article_index.resolve(item.product_id, item.selected_options),
+        )
+        for item in items
+    ]
 
 @router.get("/export", response_model=List[schemas.Article])
 def export_articles(db: Session = Depends(get_db)):
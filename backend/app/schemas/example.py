@@ -21,3 +21,18 @@ class ExampleConfig(ExampleConfigBase):
 
     class Config:
         from_attributes = True
+
+class ExampleSummary(BaseModel):
+    """Gallery entry without the configuration itself."""
+    id: str
+    name: str
+    description: Optional[str] = None
+    image_url: Optional[str] = None
+    slot_count: Optional[int] = None
+    chassis_id: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class ExampleDetail(ExampleSummary):
+    config: Optional[dict] = None # Parsed ConfigState; None if config_json is not valid JSON
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Literal
 
 # Product Schemas
 class ProductBase(BaseModel):
@@ -42,12 +42,43 @@ class RuleCreate(RuleBase):
 
 class Rule(RuleBase):
     id: int
+    warnings: List[str] = []
     class Config:
         from_attributes = True
 
 class RuleImport(RuleBase):
     id: Optional[int] = None
 
+# Dry-run impact of rule and product changes (see services/reference_index.py)
+class RuleImpactRequest(BaseModel):
+    rule_id: Optional[int] = None # Existing rule being updated or deleted
+    definition: Optional[dict] = None # New definition; omit to preview deleting rule_id
+    description: Optional[str] = None
+
+class ImpactedConfiguration(BaseModel):
+    source: str # "configuration" or "example"
+    id: Any
+    errors: List[str] = []
+    items: List[int] = [] # ConfigItem rows referencing a deleted product
+
+class RuleImpact(BaseModel):
+    candidates: int # Configurations the rule could fire for and that were evaluated
+    invalidated: List[ImpactedConfiguration]
+    resolved: List[ImpactedConfiguration]
+    warnings: List[str] = [] # Compiler warnings for the new definition
+
+class ImpactedRule(BaseModel):
+    id: int
+    description: Optional[str] = None
+    warnings: List[str]
+
+class ProductImpact(BaseModel):
+    product_id: str
+    configurations: List[ImpactedConfiguration]
+    examples: List[ImpactedConfiguration]
+    articles: List[str] # Article numbers that would be orphaned
+    rules: List[ImpactedRule] # Rules that lose actions or never fire again
+
 # Configuration Schemas
 class ConfigItemBase(BaseModel):
     product_id: str
@@ -95,6 +126,65 @@ class QuoteRequest(BaseModel):
     pdf_base64: Optional[str] = None
     json_base64: Optional[str] = None
 
+class FeasibilityRequest(BaseModel):
+    config: Dict[str, Any] # ConfigState as in the configurator store
+    slot: int
+
+class FeasibilityResult(BaseModel):
+    slot: int
+    forbidden: List[str] # Products that pairwise rules forbid in this slot
+    residual_rules: int # Rules not covered by the bitset engine (other condition types)
+
+class ValidationResult(BaseModel):
+    valid: bool
+    errors: List[str]
+    warnings: List[str]
+
+class BatchValidationRequest(BaseModel):
+    configs: List[Dict[str, Any]] = [] # ConfigStates as in the configurator store
+    stored: bool = False # Also validate every stored Configuration
+    examples: bool = False # Also validate every example's config_json
+    ignore_categories: List[str] = []
+
+# Configuration sessions
+class SessionCreate(BaseModel):
+    config: Optional[Dict[str, Any]] = None # Initial ConfigState; an empty 21-slot system if omitted
+    ignore_categories: List[str] = []
+
+class SessionDelta(BaseModel):
+    op: Literal["replace", "set_slot", "set_slot_options", "set_chassis", "set_psu", "set_slot_count"]
+    slot: Optional[Dict[str, Any]] = None # set_slot: slot fields with its id, as in the store
+    slot_id: Optional[int] = None # set_slot_options
+    options: Optional[Dict[str, Any]] = None # set_slot_options / set_chassis / set_psu
+    chassis_id: Optional[str] = None
+    psu_id: Optional[str] = None
+    slot_count: Optional[int] = None
+    config: Optional[Dict[str, Any]] = None # replace
+
+class SessionUpdate(BaseModel):
+    deltas: List[SessionDelta]
+
+class SessionAggregates(BaseModel):
+    total_power: float
+    required_power: int
+    used_width: int
+    backplane_width: int
+    remaining_interfaces: Dict[str, float]
+
+class SessionResult(BaseModel):
+    session_id: str
+    revision: int
+    valid: bool
+    violations: List[str]
+    added: List[str] # Violations new since the previous revision
+    resolved: List[str] # Violations gone since the previous revision
+    evaluated_rules: int # Rules re-evaluated for this revision
+    aggregates: SessionAggregates
+    unit_price: float # System unit price at the requested quantity, as on the quote page
+
+class SessionState(SessionResult):
+    config: Dict[str, Any]
+
 # Article Schemas
 class ArticleBase(BaseModel):
     article_number: str
@@ -111,3 +201,25 @@ class Article(ArticleBase):
 
 class ArticleImport(ArticleBase):
     id: Optional[int] = None
+
+class ArticleLookup(BaseModel):
+    product_id: str
+    selected_options: Dict[str, Any] = {}
+
+class ArticleLookupResult(ArticleLookup):
+    article_number: Optional[str] = None # None = no article yet
+
+# Catalog delta sync
+class CatalogTombstones(BaseModel):
+    products: List[str] = []
+    rules: List[int] = []
+    articles: List[int] = []
+
+class CatalogChanges(BaseModel):
+    version: int # Catalog version the client is at after applying the changes
+    since: Optional[int] = None
+    reset: bool = False # The log doesn't reach back to `since`: reload the full lists
+    products: List[Product] = []
+    rules: List[Rule] = []
+    articles: List[Article] = []
+    deleted: CatalogTombstones = CatalogTombstones()
@@ -0,0 +1,140 @@
+"""
+Production launcher: loads the catalog once, then forks the uvicorn workers.
+
+    python -m app.server --host 127.0.0.1 --port 8000 --workers 4
+
+`uvicorn --workers N` spawns fresh interpreters, so every worker imports the app
+and builds its own catalog caches on its first requests. Here the master runs
+the startup migrations and builds the catalog caches (encoded list routes,
+article index, NumPy catalog arrays, feasibility bitsets, session rule index)
+before forking. The workers start with warm caches and share those pages with
+the master copy-on-write. gc.freeze() moves everything loaded so far out of the
+collector's generations, so the workers' garbage collections don't write to
+(and unshare) the pages of the preloaded objects.
+
+The master holds the listening socket and does nothing but supervise: workers
+that exit unexpectedly are forked again (after dropping their live metrics
+gauges), SIGTERM/SIGINT shut all workers down gracefully. Caches stay version-keyed as before, so a worker rebuilds (only)
+what changed after the snapshot.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import sys
+import time
+import uvicorn
+from app.core import metrics
+
+logger = logging.getLogger("app.server")
+
+def warm_caches():
+    """Build the per-process catalog caches for the current catalog version."""
+    from app.db.session import SessionLocal
+    from app.services.article_index import article_index
+    from app.services.catalog_arrays import catalog_arrays
+    from app.services.config_sessions import session_catalog
+    from app.services.feasibility import feasibility_engine
+    from app.services.response_cache import articles_json, products_json, rules_json
+
+    with SessionLocal() as db:
+        for cache in (products_json, rules_json, articles_json, article_index, catalog_arrays, feasibility_engine, session_catalog):
+            cache.ensure_fresh(db)
+
+def preload(warm: bool = True):
+    """Import the app, run its startup migrations and (optionally) build the caches, ready to fork."""
+    from app.db.session import engine
+    from app.main import check_database
+
+    check_database()
+    if warm:
+        warm_caches()
+    # Connections must not be shared with the workers; each opens its own
+    engine.dispose()
+    # The pool gauges touched above belong to no worker
+    metrics.mark_worker_dead()
+    gc.collect()
+    gc.freeze()
+
+class Master:
+    """Forks and supervises the workers serving one shared socket."""
+
+    def __init__(self, config: uvicorn.Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.children: dict[int, int] = {}  # pid -> worker number
+        self.stopping = False
+
+    def spawn(self, number: int):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = number
+            return
+        # Worker: uvicorn installs its own handlers for graceful shutdown
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        status = 0
+        try:
+            uvicorn.Server(self.config).run(sockets=[self.socket])
+        except BaseException:
+            logger.exception("Worker %d failed", number)
+            status = 1
+        finally:
+            os._exit(status)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        self.socket = self.config.bind_socket()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for number in range(self.workers):
+            self.spawn(number)
+        logger.info("Started %d workers (master pid %d)", self.workers, os.getpid())
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            number = self.children.pop(pid, None)
+            if number is None:
+                continue
+            # A crashed worker never ran its shutdown handler
+            metrics.mark_worker_dead(pid)
+            if self.stopping:
+                continue
+            logger.warning("Worker %d (pid %d) exited with status %d, restarting", number, pid, os.waitstatus_to_exitcode(status))
+            # Don't spin when a worker dies right away (e.g. the database is gone)
+            time.sleep(1)
+            self.spawn(number)
+        self.socket.close()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--no-warm", action="store_true", help="only import the app before forking, build caches lazily")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    started = time.perf_counter()
+    preload(warm=not args.no_warm)
+    logger.info("Preloaded the app in %.2fs", time.perf_counter() - started)
+
+    config = uvicorn.Config("app.main:app", host=args.host, port=args.port)
+    Master(config, args.workers).run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import json
+import threading
+from sqlalchemy.orm import Session
+from app.models import models
+from app.services.catalog import get_catalog_version
+
+def canonical_options(selected_options: dict | None) -> tuple:
+    """
+    Canonical, hashable form of a selected_options dict.
+    Mirrors the configurator's matching: false/None/empty values count as "not selected".
+    """
+    if not selected_options:
+        return ()
+    return tuple(sorted(
+        (key, json.dumps(value, sort_keys=True))
+        for key, value in selected_options.items()
+        if value is not False and value is not None and value != ""
+    ))
+
+def _insert(by_key: dict, keys: dict, article_id: int, article_number: str, product_id: str, selected_options: dict | None):
+    key = (product_id, canonical_options(selected_options))
+    by_key.setdefault(key, {})[article_id] = article_number
+    keys[article_id] = key
+
+class ArticleIndex:
+    """
+    In-memory reverse lookup (product_id, canonical options) -> article number.
+
+    The index remembers the catalog version it was built at. Writes made by this
+    worker are applied incrementally; if another worker bumped the version in the
+    meantime the index is rebuilt from the DB on the next lookup. The incremental
+    writes change the dicts in place, so lookups take the lock too.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        # (product_id, options key) -> {article_id: article_number}
+        self._by_key: dict[tuple, dict[int, str]] = {}
+        # article_id -> (product_id, options key)
+        self._keys: dict[int, tuple] = {}
+
+    @property
+    def version(self) -> int | None:
+        """Catalog version the index was built at (None = not built / invalidated)."""
+        return self._version
+
+    def rebuild(self, db: Session):
+        version = get_catalog_version(db)
+        rows = db.query(
+            models.Article.id, models.Article.article_number, models.Article.product_id, models.Article.selected_options
+        ).all()
+        by_key, keys = {}, {}
+        for row in rows:
+            _insert(by_key, keys, row.id, row.article_number, row.product_id, row.selected_options)
+        with self._lock:
+            self._by_key, self._keys = by_key, keys
+            self._version = version
+
+    def ensure_fresh(self, db: Session):
+        if self._version is None or self._version != get_catalog_version(db):
+            self.rebuild(db)
+
+    def resolve(self, product_id: str, selected_options: dict | None) -> str | None:
+        key = (product_id, canonical_options(selected_options))
+        with self._lock:
+            matches = self._by_key.get(key)
+            if not matches:
+                return None
+            # Oldest article wins, like the configurator's list order
+            return matches[min(matches)]
+
+    def record_upsert(self, article: models.Article, version: int):
+        with self._lock:
+            if not self._in_step(version):
+                return
+            self._remove(article.id)
+            _insert(self._by_key, self._keys, article.id, article.article_number, article.product_id, article.selected_options)
+
+    def record_delete(self, article_id: int, version: int):
+        with self._lock:
+            if not self._in_step(version):
+                return
+            self._remove(article_id)
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def _in_step(self, version: int) -> bool:
+        # Only apply a write incrementally if no other write happened in between
+        if self._version is not None and version == self._version + 1:
+            self._version = version
+            return True
+        self._version = None
+        return False
+
+    def _remove(self, article_id: int):
+        key = self._keys.pop(article_id, None)
+        if key is None:
+            return
+        matches = self._by_key.get(key)
+        if matches is not None:
+            matches.pop(article_id, None)
+            if not matches:
+                del self._by_key[key]
+
+article_index = ArticleIndex()
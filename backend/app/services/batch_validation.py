@@ -0,0 +1,270 @@
+"""
+Validate many stored configurations in one pass: every Configuration row, every
+example's config_json, or ConfigStates posted to /api/config/validate/batch.
+
+Products and rules are loaded once and shared by all configurations. Aggregates
+for a whole chunk come from catalog arrays of the same catalog version in one
+reduction. Results come back in
+input order, one dict per configuration, as soon as their chunk is done. An
+entry that can't be validated gets an error result; it never ends the batch.
+
+The API validates in the request's worker. validate_configurations.py fans large
+batches out over a process pool, where each pool worker receives the catalog
+once (pool initializer), so only the configurations travel per chunk.
+
+Besides rule_engine.validate_config, each configuration is checked against the
+current catalog: products that were deleted, option values that no longer exist
+(errors) and products or option choices past their EOL date (warnings).
+"""
+import json
+import logging
+import os
+from collections import defaultdict
+from datetime import date
+from typing import Iterable, Iterator
+from sqlalchemy.orm import Session
+from app.models import models
+from app.models.example import ExampleConfig
+from app.services import rule_engine
+from app.services.catalog import get_catalog_version
+from app.services.catalog_arrays import CatalogArrays
+
+logger = logging.getLogger(__name__)
+
+# Configurations per unit of work handed to a pool worker
+CHUNK_SIZE = 250
+
+def load_catalog(db: Session) -> tuple[list[dict], list[dict]]:
+    """Products and rules as plain dicts, the form rule_engine and the pool workers take."""
+    columns = list(models.Product.__table__.columns)
+    products = [
+        dict(zip((c.name for c in columns), row))
+        for row in db.query(*columns).order_by(models.Product.id)
+    ]
+    rules = [
+        {"id": rule_id, "description": description, "category": category, "definition": definition, "compiled": compiled}
+        for rule_id, description, category, definition, compiled in db.query(
+            models.Rule.id, models.Rule.description, models.Rule.category, models.Rule.definition, models.Rule.compiled
+        ).order_by(models.Rule.id)
+    ]
+    return products, rules
+
+def load_catalog_arrays(db: Session, arrays: CatalogArrays) -> tuple[list[dict], list[dict], CatalogArrays | None]:
+    """
+    load_catalog plus `arrays` pinned to the same catalog version, so a rebuild
+    while a batch streams can't mix versions. None instead of the arrays if the
+    catalog changed meanwhile: BatchValidator then builds them from the products.
+    """
+    arrays.ensure_fresh(db)
+    pinned = arrays.pinned()
+    products, rules = load_catalog(db)
+    if pinned.version != get_catalog_version(db):
+        pinned = None
+    return products, rules, pinned
+
+# --- Sources ---
+
+def configuration_state(items: Iterable, products: dict) -> dict:
+    """
+    ConfigState for stored ConfigItems (product_id, slot_position, sub_options).
+    Items don't record slot types, so they are inferred from the products:
+    the chassis and an unplaced PSU (slot_position <= 0) become chassisId/psuId,
+    the first CPU takes the system slot, and gaps are filled with empty slots.
+    """
+    state = {"slotCount": 0, "slots": [], "chassisId": None, "chassisOptions": {}, "psuId": None, "psuOptions": {}}
+    placed = {}
+    for item in sorted(items, key=lambda i: i.slot_position or 0):
+        product = products.get(item.product_id) or {}
+        options = item.sub_options or {}
+        if product.get("type") == "chassis":
+            state["chassisId"], state["chassisOptions"] = item.product_id, options
+            continue
+        if product.get("type") == "psu":
+            state["psuId"], state["psuOptions"] = item.product_id, options
+        if (item.slot_position or 0) <= 0:
+            continue
+        slot_type = "psu" if product.get("type") == "psu" else "peripheral"
+        if product.get("type") == "cpu" and not any(s["type"] == "system" for s in placed.values()):
+            slot_type = "system"
+        placed[item.slot_position] = {
+            "id": item.slot_position,
+            "type": slot_type,
+            "componentId": item.product_id,
+            "selectedOptions": options,
+            "width": product.get("width_hp") or 4,
+            "blockedBy": None,
+        }
+
+    state["slotCount"] = max(placed, default=0)
+    has_system = any(s["type"] == "system" for s in placed.values())
+    for slot_id in range(1, state["slotCount"] + 1):
+        slot = placed.get(slot_id) or {
+            "id": slot_id,
+            "type": "system" if slot_id == 1 and not has_system else "peripheral",
+            "componentId": None,
+            "selectedOptions": {},
+            "width": 4,
+            "blockedBy": None,
+        }
+        state["slots"].append(slot)
+    return state
+
+def stored_configurations(db: Session, products: dict) -> list[dict]:
+    """One entry per Configuration row; items are loaded in a single query."""
+    items = defaultdict(list)
+    for item in db.query(models.ConfigItem).order_by(models.ConfigItem.configuration_id, models.ConfigItem.id):
+        items[item.configuration_id].append(item)
+    return [
+        {"source": "configuration", "id": config_id, "config": configuration_state(items[config_id], products)}
+        for (config_id,) in db.query(models.Configuration.id).order_by(models.Configuration.id)
+    ]
+
+def example_configurations(db: Session) -> list[dict]:
+    """One entry per example; unparseable config_json is reported instead of validated."""
+    entries = []
+    rows = db.query(ExampleConfig.id, ExampleConfig.config, ExampleConfig.config_json).order_by(ExampleConfig.id)
+    for example_id, config, config_json in rows:
+        entry = {"source": "example", "id": example_id}
+        if config is None:
+            # Not parsed on save (written before the column existed, or not an object)
+            try:
+                config = json.loads(config_json) if isinstance(config_json, str) else config_json
+            except ValueError as e:
+                entry["error"] = f"Invalid config_json: {e}"
+        if "error" not in entry:
+            error = rule_engine.state_error(config)
+            if error:
+                entry["error"] = f"Invalid config_json: {error}"
+            else:
+                entry["config"] = config
+        entries.append(entry)
+    return entries
+
+# --- Validation ---
+
+def catalog_issues(state: dict, products: dict, today: str) -> tuple[list[str], list[str]]:
+    """(errors, warnings) for components that are missing, misconfigured or past EOL."""
+    errors, warnings = [], []
+    placed = [(s.get("componentId"), s.get("selectedOptions")) for s in state.get("slots") or [] if not s.get("blockedBy")]
+    placed += [(state.get("chassisId"), state.get("chassisOptions")), (state.get("psuId"), state.get("psuOptions"))]
+    seen = set()
+    for component_id, selected_options in placed:
+        if not component_id:
+            continue
+        product = products.get(component_id)
+        if product is None:
+            if component_id not in seen:
+                errors.append(f"Product {component_id} is no longer in the catalog.")
+            seen.add(component_id)
+            continue
+        if isinstance(selected_options, dict) and selected_options:
+            try:
+                error = rule_engine.validate_options(product.get("options"), selected_options)
+                for opt_id, value in selected_options.items():
+                    opt = rule_engine.find_option(product, opt_id)
+                    choice = rule_engine.find_choice(opt, value) if opt and opt.get("type") == "select" else None
+                    if choice and choice.get("eol_date") and str(choice["eol_date"]) <= today:
+                        warnings.append(f"{component_id}: option {opt_id}={value} reached end-of-life on {choice['eol_date']}.")
+            except (KeyError, TypeError, AttributeError):
+                # Option definitions not in the list-of-dicts form the admin UI writes
+                error = "Invalid option definitions"
+            if error:
+                errors.append(f"{component_id}: {error}")
+        if component_id not in seen and product.get("eol_date") and str(product["eol_date"]) <= today:
+            warnings.append(f"{product.get('name') or component_id} ({component_id}) reached end-of-life on {product['eol_date']}.")
+        seen.add(component_id)
+    return errors, warnings
+
+class BatchValidator:
+    """Validates chunks of entries ({"source", "id", "config" or "error"}) against one catalog."""
+
+    def __init__(self, products: list[dict], rules: list[dict], ignore_categories: list[str] | None = None,
+                 arrays: CatalogArrays | None = None, today: str | None = None):
+        self.products = {p["id"]: p for p in products}
+        self.rules = rules
+        self.ignore_categories = ignore_categories or None
+        if arrays is None:
+            arrays = CatalogArrays()
+            arrays.build(products)
+        self.arrays = arrays
+        self.today = today or date.today().isoformat()
+
+    def validate(self, entries: list[dict]) -> list[dict]:
+        # Malformed configurations are reported per entry instead of failing the chunk
+        entries = [self._checked(e) for e in entries]
+        valid = [e for e in entries if "error" not in e]
+        try:
+            aggregates = dict(zip(map(id, valid), self.arrays.compute_aggregates([e["config"] for e in valid])))
+        except Exception:
+            # Each entry aggregates on its own below, so only the one at fault fails
+            aggregates = {}
+        results = []
+        for entry in entries:
+            result = {"source": entry["source"], "id": entry["id"]}
+            if "error" in entry:
+                results.append({**result, "valid": False, "errors": [entry["error"]], "warnings": []})
+                continue
+            state = entry["config"]
+            try:
+                errors, warnings = catalog_issues(state, self.products, self.today)
+                errors += rule_engine.validate_config(
+                    state, self.products, self.rules, self.ignore_categories, aggregates=aggregates.get(id(entry))
+                )
+            except Exception as e:
+                logger.exception("Validating %s %s failed", entry["source"], entry["id"])
+                errors, warnings = [f"Validation failed: {type(e).__name__}: {e}"], []
+            results.append({**result, "valid": not errors, "errors": errors, "warnings": warnings})
+        return results
+
+    @staticmethod
+    def _checked(entry: dict) -> dict:
+        if "error" in entry:
+            return entry
+        error = rule_engine.state_error(entry["config"])
+        return {"source": entry["source"], "id": entry["id"], "error": f"Invalid configuration: {error}"} if error else entry
+
+# Per-process validator of pool workers, set by _init_worker
+_worker_validator: BatchValidator | None = None
+
+def _init_worker(products: list[dict], rules: list[dict], ignore_categories: list[str] | None, today: str):
+    global _worker_validator
+    _worker_validator = BatchValidator(products, rules, ignore_categories, today=today)
+
+def _validate_chunk(entries: list[dict]) -> list[dict]:
+    return _worker_validator.validate(entries)
+
+def validate_entries(entries: list[dict], products: list[dict], rules: list[dict], workers: int = 1,
+                     ignore_categories: list[str] | None = None, arrays: CatalogArrays | None = None,
+                     chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yield one result per entry, in order. With more than one chunk and workers > 1
+    (capped at the CPU count), chunks run on a process pool; otherwise in this
+    process, reusing `arrays` if given. The pool's workers are fresh interpreters
+    that import the app, so it is meant for batch jobs, not for request handlers.
+    """
+    chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+    workers = min(workers, len(chunks), os.cpu_count() or 1)
+    today = date.today().isoformat()
+    if workers <= 1:
+        validator = BatchValidator(products, rules, ignore_categories, arrays=arrays, today=today)
+        for chunk in chunks:
+            yield from validator.validate(chunk)
+        return
+
+    # Imported here so app startup doesn't load the multiprocessing machinery
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    # spawn: forking a threaded server process is not safe
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(products, rules, ignore_categories, today),
+    )
+    try:
+        for results in pool.map(_validate_chunk, chunks):
+            yield from results
+    finally:
+        # Also reached when the consumer stops early (e.g. the client disconnected)
+        pool.shutdown(wait=True, cancel_futures=True)
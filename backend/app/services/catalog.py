@@ -0,0 +1,46 @@
+from sqlalchemy import Integer, String, cast
+from sqlalchemy.orm import Session
+from app.models import models
+
+# The catalog version lives in system_settings so every worker can see it
+CATALOG_VERSION_KEY = "catalog_version"
+
+# Examples are not part of the catalog; their own counter lets caches of them
+# (and of the configurations they hold) notice changes without product cache misses
+EXAMPLES_VERSION_KEY = "examples_version"
+
+def _get_counter(db: Session, key: str) -> int:
+    value = db.query(models.SystemSetting.value).filter(models.SystemSetting.key == key).scalar()
+    return int(value) if value else 0
+
+def _bump_counter(db: Session, key: str) -> int:
+    # A single UPDATE so concurrent workers can't lose a bump
+    updated = (
+        db.query(models.SystemSetting)
+        .filter(models.SystemSetting.key == key)
+        .update(
+            {models.SystemSetting.value: cast(cast(models.SystemSetting.value, Integer) + 1, String)},
+            synchronize_session=False,
+        )
+    )
+    if not updated:
+        db.add(models.SystemSetting(key=key, value="1"))
+        db.flush()
+    return _get_counter(db, key)
+
+def get_catalog_version(db: Session) -> int:
+    return _get_counter(db, CATALOG_VERSION_KEY)
+
+def bump_catalog_version(db: Session) -> int:
+    """
+    Increment the catalog version inside the caller's transaction and return the new value.
+    The increment is a single UPDATE so concurrent workers can't lose a bump.
+    """
+    return _bump_counter(db, CATALOG_VERSION_KEY)
+
+def get_examples_version(db: Session) -> int:
+    return _get_counter(db, EXAMPLES_VERSION_KEY)
+
+def bump_examples_version(db: Session) -> int:
+    """Increment the examples version inside the caller's transaction (any example write)."""
+    return _bump_counter(db, EXAMPLES_VERSION_KEY)
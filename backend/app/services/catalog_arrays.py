@@ -0,0 +1,349 @@
+"""
+Columnar NumPy view of the product catalog for aggregating many configurations at once.
+
+rule_engine.compute_aggregates walks every slot and looks products and options
+up one by one. Here the catalog is held as arrays indexed by product row:
+
+    power, width, psu_width (P,)
+    prices                  (P, tiers)   tier fallback already applied
+    interfaces / offered    (P, K)       capacity per interface key
+    mod_power / mod_width / mod_prices   one row per (product, option, value)
+
+A batch of configurations is encoded once into index arrays and then reduced with
+fancy indexing. The semantics match rule_engine (blocked slots, PSUs, default
+widths, boolean vs. select option modifiers). Configurations must be shaped like
+a ConfigState (see rule_engine.state_error).
+
+The tables of one catalog version are an immutable CatalogTables object, which
+a rebuild replaces with one assignment. An encoded batch keeps the tables it was
+encoded with, so its reductions use the same version even if the catalog is
+rebuilt in between.
+
+With CATALOG_FILE set, the arrays are views on the shared catalog file (see
+catalog_file.py) instead of being built by every worker.
+"""
+import threading
+from dataclasses import dataclass, field, fields
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models import models
+from app.services.catalog import get_catalog_version
+from app.services.catalog_file import CatalogFile, mapped_catalog
+from app.services import rule_engine
+
+# Quantity tiers, ascending, as columns of the price tables
+TIERS = (1, 25, 50, 100, 250, 500)
+
+ARRAY_NAMES = ("power", "width", "psu_width", "supply", "prices", "interfaces", "offered", "mod_power", "mod_width", "mod_prices")
+
+@dataclass
+class EncodedBatch:
+    """Index arrays for B configurations of at most S slots, M option modifiers per slot."""
+    products: np.ndarray     # (B, S) product row; empty slots and unknown products use the extra last row
+    mods: np.ndarray         # (B, S, M) modifier row, 0 = none
+    counts_width: np.ndarray # (B, S) filled and not blocked
+    counts_power: np.ndarray # (B, S) ... not a PSU slot and not a supplying product
+    peripheral: np.ndarray   # (B, S) ... in a peripheral slot
+    cpu: np.ndarray          # (B,) product row of the first system slot
+    extra_width: np.ndarray  # (B,) width of a PSU that is not plugged into a slot
+    slot_count: np.ndarray   # (B,)
+    tables: "CatalogTables" = field(default=None, repr=False)  # what the rows refer to
+
+def tier_column(qty: int) -> int:
+    column = 0
+    for i, tier in enumerate(TIERS):
+        if qty >= tier:
+            column = i
+    return column
+
+def _option_prices(price_mod) -> list[float]:
+    # Same fallbacks as rule_engine.option_price, for every tier
+    return [rule_engine.option_price(price_mod, tier) for tier in TIERS]
+
+class CatalogTables:
+    """Arrays and lookups of one catalog version; never changed once built."""
+    __slots__ = ("version", "product_ids", "index", "interface_keys", "mod_rows", "boolean_mods", *ARRAY_NAMES)
+
+    def __init__(self, version, product_ids, index, interface_keys, mod_rows, boolean_mods, arrays: dict):
+        self.version = version
+        self.product_ids, self.index, self.interface_keys = product_ids, index, interface_keys
+        # (product row, option id, value) -> modifier row; rows of boolean options
+        self.mod_rows, self.boolean_mods = mod_rows, boolean_mods
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+
+    @property
+    def empty_row(self) -> int:
+        """Row used for empty slots and unknown products."""
+        return len(self.product_ids)
+
+    def with_version(self, version: int | None) -> "CatalogTables":
+        arrays = {name: getattr(self, name) for name in ARRAY_NAMES}
+        return CatalogTables(version, self.product_ids, self.index, self.interface_keys, self.mod_rows, self.boolean_mods, arrays)
+
+class CatalogArrays:
+    """Built from the products at a catalog version; rebuilt when it changes (see ensure_fresh)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables: CatalogTables | None = None
+        self.build([])
+        self.invalidate()
+
+    @property
+    def version(self) -> int | None:
+        return self.tables.version
+
+    @property
+    def product_ids(self):
+        return self.tables.product_ids
+
+    @property
+    def interface_keys(self) -> list[str]:
+        return self.tables.interface_keys
+
+    @property
+    def empty_row(self) -> int:
+        return self.tables.empty_row
+
+    def build(self, products: list[dict], version: int | None = None):
+        product_ids = [p["id"] for p in products]
+        interface_keys = sorted({key for p in products for key in (p.get("interfaces") or {})})
+        key_index = {key: i for i, key in enumerate(interface_keys)}
+        count, keys = len(products), len(interface_keys)
+
+        # One extra row for empty slots / unknown products (which still occupy 4HP)
+        arrays = {
+            "power": np.zeros(count + 1),
+            "width": np.full(count + 1, 4.0),
+            "psu_width": np.zeros(count + 1),
+            "supply": np.zeros(count + 1, dtype=bool),
+            "prices": np.zeros((count + 1, len(TIERS))),
+            "interfaces": np.zeros((count + 1, keys)),
+            "offered": np.zeros((count + 1, keys), dtype=bool),
+        }
+        # (product row, option id, value) -> modifier row; row 0 is "no modifier"
+        mod_rows: dict[tuple, int] = {}
+        boolean_mods: set[int] = set()
+        mod_values = [(0, 0, [0.0] * len(TIERS))]
+
+        def add_mod(key: tuple, power, width, prices) -> int | None:
+            try:
+                if key in mod_rows:
+                    # find_option/find_choice use the first match
+                    return None
+            except TypeError:
+                return None
+            mod_rows[key] = len(mod_values)
+            mod_values.append((power or 0, width or 0, prices))
+            return mod_rows[key]
+
+        for row, product in enumerate(products):
+            arrays["power"][row] = product.get("power_watts") or 0
+            arrays["width"][row] = product.get("width_hp") or 4
+            arrays["psu_width"][row] = product.get("width_hp") or 0
+            # PSUs have negative power (they supply it)
+            arrays["supply"][row] = (product.get("power_watts") or 0) < 0
+            arrays["prices"][row] = [rule_engine.tier_price(product, tier) for tier in TIERS]
+            for key, value in (product.get("interfaces") or {}).items():
+                arrays["interfaces"][row, key_index[key]] = float(value)
+                arrays["offered"][row, key_index[key]] = True
+            seen_options = set()
+            for opt in product.get("options") or []:
+                if opt.get("id") in seen_options:
+                    continue
+                seen_options.add(opt.get("id"))
+                if opt.get("type") == "select":
+                    for choice in opt.get("choices") or []:
+                        # widthMod only applies to truthy values (item_width)
+                        add_mod(
+                            (row, opt.get("id"), choice.get("value")),
+                            choice.get("powerMod"),
+                            choice.get("widthMod") if choice.get("value") else 0,
+                            _option_prices(choice.get("priceMod")),
+                        )
+                elif opt.get("type") == "boolean":
+                    mod = add_mod((row, opt.get("id"), True), opt.get("powerMod"), 0, _option_prices(opt.get("priceMod")))
+                    if mod is not None:
+                        boolean_mods.add(mod)
+
+        arrays["mod_power"] = np.array([m[0] for m in mod_values], dtype=float)
+        arrays["mod_width"] = np.array([m[1] for m in mod_values], dtype=float)
+        arrays["mod_prices"] = np.array([m[2] for m in mod_values], dtype=float)
+
+        tables = CatalogTables(
+            version, product_ids, {pid: i for i, pid in enumerate(product_ids)}, interface_keys,
+            mod_rows, boolean_mods, arrays,
+        )
+        with self._lock:
+            self.tables = tables
+
+    def adopt(self, mapped: CatalogFile):
+        """Use the arrays of a mapped catalog file; lookups go through its accessors."""
+        tables = CatalogTables(
+            mapped.version, mapped.product_ids, mapped.index, mapped.interface_keys,
+            mapped.modifiers, mapped.boolean_modifiers, mapped.arrays,
+        )
+        with self._lock:
+            self.tables = tables
+
+    def rebuild(self, db: Session):
+        mapped = mapped_catalog.current(db)
+        if mapped is not None:
+            self.adopt(mapped)
+            return
+        version = get_catalog_version(db)
+        columns = list(models.Product.__table__.columns)
+        rows = db.query(*columns).order_by(models.Product.id)
+        self.build([dict(zip((c.name for c in columns), row)) for row in rows], version)
+
+    def ensure_fresh(self, db: Session):
+        version = self.version
+        if version is None or version != get_catalog_version(db):
+            self.rebuild(db)
+
+    def invalidate(self):
+        with self._lock:
+            self.tables = self.tables.with_version(None)
+
+    def pinned(self) -> "CatalogArrays":
+        """A copy fixed to the current tables: later rebuilds of this object don't reach it."""
+        pinned = CatalogArrays()
+        pinned.tables = self.tables
+        return pinned
+
+    # --- Encoding ---
+
+    @staticmethod
+    def _modifiers(t: CatalogTables, row: int, selected_options: dict | None) -> list[int]:
+        mods = []
+        for opt_id, value in (selected_options or {}).items():
+            try:
+                mod = t.mod_rows.get((row, opt_id, value))
+            except TypeError:
+                continue
+            # Boolean options only count when exactly True
+            if mod is not None and (mod not in t.boolean_mods or value is True):
+                mods.append(mod)
+        return mods
+
+    def encode(self, states: list[dict]) -> EncodedBatch:
+        t = self.tables
+        empty_row = t.empty_row
+        batch = len(states)
+        width = max((len(s.get("slots") or []) for s in states), default=0)
+        products = np.full((batch, width), empty_row, dtype=np.int32)
+        counts_width = np.zeros((batch, width), dtype=bool)
+        not_psu_slot = np.zeros((batch, width), dtype=bool)
+        peripheral = np.zeros((batch, width), dtype=bool)
+        cpu = np.full(batch, empty_row, dtype=np.int32)
+        extra_width = np.zeros(batch)
+        slot_mods = []
+
+        for b, state in enumerate(states):
+            slots = state.get("slots") or []
+            system_slot = next((s for s in slots if s.get("type") == "system"), None)
+            if system_slot and system_slot.get("componentId"):
+                cpu[b] = t.index.get(system_slot["componentId"], empty_row)
+            for s, slot in enumerate(slots):
+                component_id = slot.get("componentId")
+                if not component_id or slot.get("blockedBy"):
+                    continue
+                row = t.index.get(component_id, empty_row)
+                products[b, s] = row
+                counts_width[b, s] = True
+                not_psu_slot[b, s] = slot.get("type") != "psu"
+                peripheral[b, s] = slot.get("type") == "peripheral"
+                if row != empty_row:
+                    mods = self._modifiers(t, row, slot.get("selectedOptions"))
+                    if mods:
+                        slot_mods.append((b, s, mods))
+            psu_id = state.get("psuId")
+            # Pluggable PSUs already sit in the slots
+            if psu_id in t.index and not any(s.get("type") == "psu" and s.get("componentId") == psu_id for s in slots):
+                extra_width[b] = t.psu_width[t.index[psu_id]]
+
+        mods = np.zeros((batch, width, max((len(m) for _, _, m in slot_mods), default=0)), dtype=np.int32)
+        for b, s, values in slot_mods:
+            mods[b, s, :len(values)] = values
+        return EncodedBatch(
+            products=products,
+            mods=mods,
+            counts_width=counts_width,
+            counts_power=counts_width & not_psu_slot & ~t.supply[products],
+            peripheral=peripheral,
+            cpu=cpu,
+            extra_width=extra_width,
+            slot_count=np.array([s.get("slotCount") or 0 for s in states]),
+            tables=t,
+        )
+
+    def with_candidates(self, state: dict, slot_id: int, candidates: np.ndarray | None = None) -> EncodedBatch:
+        """
+        One configuration per candidate product placed (without options) into `slot_id`,
+        broadcast from the encoded base configuration. Used for feasibility scans.
+        """
+        slots = state.get("slots") or []
+        position = next(i for i, s in enumerate(slots) if s.get("id") == slot_id)
+        slot = slots[position]
+        base = self.encode([{**state, "slots": [dict(s, blockedBy=None) if i == position else s for i, s in enumerate(slots)]}])
+        t = base.tables
+        candidates = np.arange(len(t.product_ids)) if candidates is None else np.asarray(candidates)
+        batch = EncodedBatch(
+            **{f.name: np.repeat(getattr(base, f.name), len(candidates), axis=0) for f in fields(EncodedBatch) if f.name != "tables"},
+            tables=t,
+        )
+        batch.products[:, position] = candidates
+        batch.mods[:, position] = 0
+        batch.counts_width[:, position] = True
+        batch.counts_power[:, position] = (slot.get("type") != "psu") & ~t.supply[candidates]
+        batch.peripheral[:, position] = slot.get("type") == "peripheral"
+        if next((s for s in slots if s.get("type") == "system"), None) is slot:
+            batch.cpu[:] = candidates
+        return batch
+
+    # --- Reductions ---
+
+    def aggregate(self, batch: EncodedBatch) -> dict[str, np.ndarray]:
+        """
+        total_power, required_power, used_width, backplane_width as (B,) arrays and
+        remaining_interfaces as (B, K), NaN where the CPU does not offer the key.
+        """
+        t, products = batch.tables, batch.products
+        power = (t.power[products] + t.mod_power[batch.mods].sum(axis=2)) * batch.counts_power
+        width = (t.width[products] + t.mod_width[batch.mods].sum(axis=2)) * batch.counts_width
+        total_power = power.sum(axis=1)
+        used = (t.interfaces[products] * batch.peripheral[..., None]).sum(axis=1)
+        return {
+            "total_power": total_power,
+            "required_power": np.ceil(total_power * 1.2),
+            "used_width": width.sum(axis=1) + batch.extra_width,
+            "backplane_width": batch.slot_count * 4,
+            "remaining_interfaces": np.where(t.offered[batch.cpu], t.interfaces[batch.cpu] - used, np.nan),
+        }
+
+    def unit_prices(self, batch: EncodedBatch, qty: int) -> np.ndarray:
+        """(B, S) unit price of every filled slot at the tier for qty, option surcharges included."""
+        t, column = batch.tables, tier_column(qty)
+        prices = t.prices[batch.products, column] + t.mod_prices[batch.mods, column].sum(axis=2)
+        return prices * (batch.products != t.empty_row)
+
+    def compute_aggregates(self, states: list[dict]) -> list[rule_engine.Aggregates]:
+        """Batch drop-in for rule_engine.compute_aggregates."""
+        batch = self.encode(states)
+        result, interface_keys = self.aggregate(batch), batch.tables.interface_keys
+        aggregates = []
+        for b in range(len(states)):
+            remaining = result["remaining_interfaces"][b]
+            aggregates.append(rule_engine.Aggregates(
+                total_power=float(result["total_power"][b]),
+                required_power=int(result["required_power"][b]),
+                used_width=int(result["used_width"][b]),
+                backplane_width=int(result["backplane_width"][b]),
+                remaining_interfaces={
+                    key: float(remaining[k]) for k, key in enumerate(interface_keys) if not np.isnan(remaining[k])
+                },
+            ))
+        return aggregates
+
+catalog_arrays = CatalogArrays()
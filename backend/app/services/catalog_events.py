@@ -0,0 +1,140 @@
+"""
+Server-sent events for GET /api/catalog/events: open configurators learn about
+product, rule and article changes without polling or reloading.
+
+Each worker runs one broadcaster task while it has subscribers. It polls the
+catalog version (every CATALOG_EVENTS_POLL_SECONDS), so writes made by any
+worker are seen. When the version changes, the delta from the change log is
+encoded once and queued for every connection. Connections are coroutines
+waiting on their own bounded queue, not threads. A client that falls
+CATALOG_EVENTS_QUEUE_SIZE events behind has its backlog dropped and gets a
+single "resync" event instead; it then syncs through /api/catalog/changes.
+
+Events:
+    event: catalog  id: <version>  data: schemas.CatalogChanges
+    event: resync   id: <version>  data: {"version": <version>}
+"""
+import asyncio
+import json
+import logging
+from typing import AsyncIterator
+from fastapi import Request
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas import schemas
+from app.services import change_log
+from app.services.catalog import get_catalog_version
+
+logger = logging.getLogger(__name__)
+
+def format_event(event: str, data: str, event_id: int | None = None) -> bytes:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines += [f"data: {line}" for line in data.splitlines()]
+    return ("\n".join(lines) + "\n\n").encode()
+
+def resync_event(version: int) -> bytes:
+    return format_event("resync", json.dumps({"version": version}), version)
+
+def _delta_event(since: int | None) -> tuple[int, bytes | None]:
+    """(current catalog version, event for the changes after `since` or None if there are none)."""
+    with SessionLocal() as db:
+        version = get_catalog_version(db)
+        if since is None or version == since:
+            return version, None
+        changes = change_log.changes_since(db, since)
+        rows = sum(len(changes.get(key, [])) for key in ("products", "rules", "articles"))
+        rows += sum(len(ids) for ids in changes["deleted"].values())
+        if changes["reset"] or rows > settings.CATALOG_EVENTS_MAX_ROWS:
+            return changes["version"], resync_event(changes["version"])
+        data = schemas.CatalogChanges.model_validate(changes, from_attributes=True).model_dump_json()
+        return changes["version"], format_event("catalog", data, changes["version"])
+
+class CatalogBroadcaster:
+    """Fans catalog changes out to this worker's SSE connections."""
+
+    def __init__(self):
+        self._subscribers: set[asyncio.Queue] = set()
+        self._task: asyncio.Task | None = None
+        self._version: int | None = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=settings.CATALOG_EVENTS_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        # The poll task stops by itself once nobody is subscribed
+        self._subscribers.discard(queue)
+
+    def publish(self, since: int, version: int, event: bytes):
+        """Queue the event for the changes (since, version] on every connection."""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait((since, version, event))
+            except asyncio.QueueFull:
+                # Slow client: drop its backlog, it catches up through /api/catalog/changes
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((None, version, resync_event(version)))
+
+    async def _poll(self):
+        while self._subscribers:
+            try:
+                if self._version is None:
+                    self._version, _ = await asyncio.to_thread(_delta_event, None)
+                await asyncio.sleep(settings.CATALOG_EVENTS_POLL_SECONDS)
+                version, event = await asyncio.to_thread(_delta_event, self._version)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Polling the catalog version failed")
+                await asyncio.sleep(settings.CATALOG_EVENTS_POLL_SECONDS)
+                continue
+            if event is not None:
+                self.publish(self._version, version, event)
+            self._version = version
+        # Versions seen by a later poll task start from a fresh read
+        self._version = None
+
+    async def stream(self, request: Request, since: int | None = None) -> AsyncIterator[bytes]:
+        """
+        SSE body for one connection. With `since`, changes made after that version
+        are sent first, so reconnecting clients don't miss anything.
+        """
+        queue = self.subscribe()
+        try:
+            yield f"retry: {settings.CATALOG_EVENTS_RETRY_MS}\n\n".encode()
+            latest = since
+            if since is not None:
+                latest, event = await asyncio.to_thread(_delta_event, since)
+                if event is not None:
+                    yield event
+            while True:
+                try:
+                    event_since, version, event = await asyncio.wait_for(queue.get(), settings.CATALOG_EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    # Keeps proxies from closing an idle connection
+                    yield b": keepalive\n\n"
+                    continue
+                if latest is not None and version <= latest:
+                    # Already covered by the catch-up event
+                    continue
+                if latest is not None and event_since is not None and event_since > latest:
+                    # Changes between the catch-up and the poller's first version were never sent
+                    event = resync_event(version)
+                latest = version
+                yield event
+        finally:
+            self.unsubscribe(queue)
+
+catalog_broadcaster = CatalogBroadcaster()
@@ -0,0 +1,326 @@
+"""
+Read-only binary catalog file, memory-mapped by every worker.
+
+CatalogArrays (power, width, tier prices, interface matrix, option modifier
+tables) and FeasibilityEngine (packed rule bitsets) are normally built by each
+worker from the DB. With CATALOG_FILE set, they are built once per catalog
+version into one file instead. Every worker maps that file read-only, so all
+processes share one physical copy through the page cache and the arrays are
+views on the mapping, not per-process objects.
+
+Lookups that used to go through dicts (product id -> row, option modifier ->
+row, rule bitset keys) are thin `__slots__` accessors that bisect sorted key
+arrays in the file.
+
+Layout: b"CPCICAT2", the header length (uint64, little endian), a JSON header
+({"version", "residual_rules", "arrays": {name: [dtype, shape, offset]}}), then
+the arrays, each at a 64-byte aligned offset from the (aligned) end of the
+header. A new version is written to a temporary file and renamed over the old
+one, so readers see either file, never a partial one. Workers notice the rename
+on their next freshness check and remap.
+
+The file is (re)built by the first worker that needs a version it doesn't have
+yet, or explicitly with `python build_catalog_file.py`.
+"""
+import bisect
+import functools
+import json
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+import numpy as np
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import models
+from app.services.catalog import get_catalog_version
+from app.services.rule_compiler import MAX_SLOTS
+
+MAGIC = b"CPCICAT2"
+ALIGNMENT = 64
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+# --- Accessors ---
+
+class ProductIndex:
+    """Product id -> row, like {pid: row}, over the sorted id array."""
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: np.ndarray):
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get(self, product_id, default=None):
+        if not isinstance(product_id, str):
+            return default
+        key = product_id.encode()
+        row = bisect.bisect_left(self._ids, key)
+        return row if row < len(self._ids) and self._ids[row] == key else default
+
+    def __contains__(self, product_id) -> bool:
+        return self.get(product_id) is not None
+
+    def __getitem__(self, product_id) -> int:
+        row = self.get(product_id)
+        if row is None:
+            raise KeyError(product_id)
+        return row
+
+class ProductIds:
+    """Product ids by row, like a list."""
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids: np.ndarray):
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, row: int) -> str:
+        return self._ids[row].decode()
+
+    def __iter__(self):
+        return (pid.decode() for pid in self._ids)
+
+@functools.lru_cache(maxsize=65536)
+def _key_part(value) -> bytes:
+    # Keys equal as dict keys (1 == 1.0 == True) encode the same, which also
+    # makes the cache safe: it may answer 1.0 with the bytes of 1
+    if isinstance(value, (int, float)) and value == value and abs(value) != float("inf") and value == int(value):
+        value = int(value)
+    return json.dumps(value).encode()
+
+class ModifierIndex:
+    """(product row, option id, value) -> modifier row, like CatalogTables.mod_rows."""
+    __slots__ = ("_keys", "_rows")
+
+    def __init__(self, keys: np.ndarray, rows: np.ndarray):
+        self._keys, self._rows = keys, rows
+
+    @staticmethod
+    def pack(key: tuple) -> bytes:
+        # Big-endian row first, so the keys of one product sort together
+        row, option_id, value = key
+        return struct.pack(">i", row) + _key_part(option_id) + b"\0" + _key_part(value)
+
+    def get(self, key: tuple, default=None):
+        hash(key)  # TypeError for unhashable values, as with the dict
+        try:
+            packed = self.pack(key)
+        except (TypeError, ValueError, struct.error):
+            # Not JSON (or not a row), so not in the catalog either
+            return default
+        i = bisect.bisect_left(self._keys, packed)
+        return int(self._rows[i]) if i < len(self._keys) and self._keys[i] == packed else default
+
+class BooleanModifiers:
+    """Modifier rows of boolean options, like CatalogTables.boolean_mods."""
+    __slots__ = ("_flags",)
+
+    def __init__(self, flags: np.ndarray):
+        self._flags = flags
+
+    def __contains__(self, mod: int) -> bool:
+        return bool(self._flags[mod])
+
+class BitsetKeys:
+    """(slot, product row, slot) -> bitset row, like FeasibilityTables.forward_keys/reverse_keys."""
+    __slots__ = ("_keys", "_rows", "_products")
+
+    def __init__(self, keys: np.ndarray, rows: np.ndarray, products: int):
+        self._keys, self._rows, self._products = keys, rows, products
+
+    @staticmethod
+    def pack(key: tuple, products: int) -> int:
+        slot, product, other_slot = key
+        return (slot * products + product) * (MAX_SLOTS + 1) + other_slot
+
+    def get(self, key: tuple, default=None):
+        packed = self.pack(key, self._products)
+        i = bisect.bisect_left(self._keys, packed)
+        return int(self._rows[i]) if i < len(self._keys) and self._keys[i] == packed else default
+
+# --- File ---
+
+class CatalogFile:
+    """One mapped catalog file; the arrays are read-only views on the mapping."""
+    __slots__ = ("path", "stat", "version", "residual_rules", "arrays", "_mmap")
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a catalog file")
+        (length,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        header = json.loads(self._mmap[len(MAGIC) + 8:len(MAGIC) + 8 + length])
+        data_start = _align(len(MAGIC) + 8 + length)
+        self.version = header["version"]
+        self.residual_rules = header["residual_rules"]
+        self.arrays = {}
+        for name, (dtype, shape, offset) in header["arrays"].items():
+            count = int(np.prod(shape))
+            # Empty arrays may point past the end of the file
+            self.arrays[name] = (
+                np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=count, offset=data_start + offset).reshape(shape)
+                if count else np.empty(shape, dtype=np.dtype(dtype))
+            )
+
+    def same_file(self, stat: os.stat_result) -> bool:
+        return (self.stat.st_dev, self.stat.st_ino) == (stat.st_dev, stat.st_ino)
+
+    @property
+    def product_ids(self) -> ProductIds:
+        return ProductIds(self.arrays["product_ids"])
+
+    @property
+    def index(self) -> ProductIndex:
+        return ProductIndex(self.arrays["product_ids"])
+
+    @property
+    def interface_keys(self) -> list[str]:
+        return [key.decode() for key in self.arrays["interface_keys"]]
+
+    @property
+    def modifiers(self) -> ModifierIndex:
+        return ModifierIndex(self.arrays["mod_keys"], self.arrays["mod_rows"])
+
+    @property
+    def boolean_modifiers(self) -> BooleanModifiers:
+        return BooleanModifiers(self.arrays["mod_boolean"])
+
+    def bitset_keys(self, name: str) -> BitsetKeys:
+        return BitsetKeys(self.arrays[f"{name}_keys"], self.arrays[f"{name}_rows"], len(self.arrays["product_ids"]))
+
+def _strings(values: list[bytes]) -> np.ndarray:
+    # S0 is not a usable dtype
+    return np.array(values, dtype=f"S{max((len(v) for v in values), default=0) or 1}")
+
+def _bitset_arrays(name: str, keys: dict, products: int) -> dict:
+    packed = sorted((BitsetKeys.pack(key, products), row) for key, row in keys.items())
+    return {
+        f"{name}_keys": np.array([k for k, _ in packed], dtype=np.int64),
+        f"{name}_rows": np.array([r for _, r in packed], dtype=np.int32),
+    }
+
+def build_arrays(db: Session) -> tuple[int, int, dict]:
+    """(catalog version, residual rules, arrays) for the current catalog."""
+    from app.services.catalog_arrays import ARRAY_NAMES, CatalogArrays
+    from app.services.feasibility import FeasibilityEngine
+
+    version = get_catalog_version(db)
+    columns = list(models.Product.__table__.columns)
+    products = [dict(zip((c.name for c in columns), row)) for row in db.query(*columns)]
+    # Byte order of the ids, which is what the accessors search
+    products.sort(key=lambda p: p["id"].encode())
+    rules = [
+        {"definition": definition, "compiled": compiled}
+        for definition, compiled in db.query(models.Rule.definition, models.Rule.compiled)
+    ]
+    catalog, engine = CatalogArrays(), FeasibilityEngine()
+    catalog.build(products, version)
+    engine.build([p["id"] for p in products], rules, version)
+    catalog = catalog.tables
+
+    count = len(products)
+    arrays = {name: getattr(catalog, name) for name in ARRAY_NAMES}
+    arrays["product_ids"] = _strings([p["id"].encode() for p in products])
+    arrays["interface_keys"] = _strings([key.encode() for key in catalog.interface_keys])
+
+    packed = sorted((ModifierIndex.pack(key), mod) for key, mod in catalog.mod_rows.items())
+    arrays["mod_keys"] = _strings([k for k, _ in packed])
+    arrays["mod_rows"] = np.array([m for _, m in packed], dtype=np.int32)
+    arrays["mod_boolean"] = np.zeros(len(catalog.mod_power), dtype=bool)
+    arrays["mod_boolean"][list(catalog.boolean_mods)] = True
+
+    tables = engine.tables
+    arrays.update(_bitset_arrays("forward", tables.forward_keys, count))
+    arrays.update(_bitset_arrays("reverse", tables.reverse_keys, count))
+    arrays["forward"], arrays["reverse"] = tables.forward, tables.reverse
+    arrays["self_forbidden"] = tables.self_forbidden
+    return version, tables.residual_rules, arrays
+
+def write_catalog_file(path: str, version: int, residual_rules: int, arrays: dict):
+    """Write the file next to `path` and rename it into place."""
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        layout[name] = [array.dtype.str, list(array.shape), offset]
+        offset += array.nbytes
+    header = json.dumps({"version": version, "residual_rules": residual_rules, "arrays": layout}).encode()
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name][2])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def build_catalog_file(db: Session, path: str) -> int:
+    """Build the file for the current catalog; returns its version."""
+    version, residual_rules, arrays = build_arrays(db)
+    write_catalog_file(path, version, residual_rules, arrays)
+    return version
+
+@contextmanager
+def _build_lock(path: str):
+    # Only one worker builds a version; the others wait and map its result
+    import fcntl
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+class MappedCatalog:
+    """This worker's mapping of CATALOG_FILE, remapped when the file is replaced."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file: CatalogFile | None = None
+
+    def _open(self, path: str) -> CatalogFile | None:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._file is None or self._file.path != path or not self._file.same_file(stat):
+                try:
+                    mapped = CatalogFile(path)
+                except ValueError:
+                    # Written in an older layout: rebuilt like a missing file
+                    return None
+                # The old mapping goes away once nothing references its arrays
+                self._file = mapped
+            return self._file
+
+    def current(self, db: Session) -> CatalogFile | None:
+        """The mapped file at the DB's catalog version (built if needed), None without CATALOG_FILE."""
+        path = settings.CATALOG_FILE
+        if not path:
+            return None
+        version = get_catalog_version(db)
+        mapped = self._open(path)
+        if mapped is None or mapped.version != version:
+            with _build_lock(path):
+                mapped = self._open(path)
+                if mapped is None or mapped.version != version:
+                    build_catalog_file(db, path)
+                    mapped = self._open(path)
+        return mapped
+
+mapped_catalog = MappedCatalog()
@@ -0,0 +1,181 @@
+"""
+Compact, immutable catalog records for catalogs that stay in memory.
+
+load_catalog in batch_validation returns one dict per product and rule, with the
+JSON columns (options, interfaces, rule definitions) as nested dicts and lists.
+Catalogs of many SKUs repeat the same option trees, interface keys and price
+modifiers, and every copy is a separate dict. Here:
+
+- Product, OptionDef, Choice and Rule are frozen `__slots__` classes (no
+  per-instance __dict__);
+- strings used as keys, option ids and choice values are interned;
+- identical option lists, choices, interface maps and nested JSON values are
+  built once and shared. Lists become tuples and dicts become FrozenDicts
+  (dicts that refuse changes; reads are plain dict reads), so sharing them is
+  safe.
+
+Records are read-only Mappings with the same keys as the dicts, so rule_engine
+reads them unchanged (product.get("options"), opt["choices"], ...). Unknown
+keys in option or choice dicts are kept. Option data that is not a list of
+dicts is frozen as it is, so malformed definitions fail the same way.
+"""
+import json
+import sys
+from collections.abc import Mapping
+from sqlalchemy.orm import Session
+from app.models import models
+from app.services.batch_validation import load_catalog
+
+_MISSING = object()
+
+class FrozenDict(dict):
+    """A dict that can't be changed once built."""
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is immutable")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+class Record(Mapping):
+    """Read-only mapping over __slots__ fields; keys not in FIELDS go to _extra."""
+    __slots__ = ("_extra",)
+    FIELDS: tuple[str, ...] = ()
+    _FIELD_SET: frozenset = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._FIELD_SET = frozenset(cls.FIELDS)
+
+    def __init__(self, data: dict, freeze):
+        extra = {}
+        for key in self.FIELDS:
+            value = data.get(key, _MISSING)
+            object.__setattr__(self, key, value if value is _MISSING else freeze(value))
+        for key, value in data.items():
+            if key not in self._FIELD_SET:
+                extra[freeze(key)] = freeze(value)
+        object.__setattr__(self, "_extra", FrozenDict(extra) if extra else None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def get(self, key, default=None):
+        if key in self._FIELD_SET:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        # Fields are never in _extra
+        return self._extra.get(key, default) if self._extra is not None else default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        for key in self.FIELDS:
+            if getattr(self, key) is not _MISSING:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __reduce__(self):
+        # __setattr__ is blocked, so rebuild through __init__ from the (already frozen) values
+        return _restore, (type(self), dict(self))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+def _restore(cls, data: dict) -> Record:
+    return cls(data, lambda value: value)
+
+class Choice(Record):
+    FIELDS = ("value", "label", "priceMod", "powerMod", "widthMod", "eol_date")
+    __slots__ = FIELDS
+
+class OptionDef(Record):
+    FIELDS = ("id", "label", "type", "choices", "default", "priceMod", "powerMod", "widthMod", "eol_date")
+    __slots__ = FIELDS
+
+class Product(Record):
+    FIELDS = tuple(c.name for c in models.Product.__table__.columns)
+    __slots__ = FIELDS
+
+class Rule(Record):
+    FIELDS = ("id", "description", "category", "definition", "compiled")
+    __slots__ = FIELDS
+
+class RecordBuilder:
+    """Builds records for one catalog, sharing identical values between them."""
+
+    def __init__(self):
+        self._shared: dict[tuple, object] = {}
+
+    def _share(self, kind: str, value, build):
+        try:
+            # Key order is part of the key: shared mappings iterate like the original
+            key = (kind, json.dumps(value, default=str))
+        except (TypeError, ValueError):
+            return build(value)
+        shared = self._shared.get(key)
+        if shared is None:
+            shared = self._shared[key] = build(value)
+        return shared
+
+    def freeze(self, value):
+        """Immutable, shared equivalent of a JSON value."""
+        if isinstance(value, str):
+            return sys.intern(value)
+        if isinstance(value, dict):
+            return self._share("dict", value, lambda v: FrozenDict({self.freeze(k): self.freeze(x) for k, x in v.items()}))
+        if isinstance(value, list):
+            return self._share("list", value, lambda v: tuple(self.freeze(x) for x in v))
+        return value
+
+    def _choice(self, choice):
+        if not isinstance(choice, dict):
+            return self.freeze(choice)
+        return self._share("choice", choice, lambda c: Choice(c, self.freeze))
+
+    def _option(self, option):
+        if not isinstance(option, dict):
+            return self.freeze(option)
+
+        def build(o):
+            if isinstance(o.get("choices"), list):
+                o = {**o, "choices": tuple(self._choice(c) for c in o["choices"])}
+            return OptionDef(o, self.freeze)
+        return self._share("option", option, build)
+
+    def _freeze_field(self, value):
+        # Already built records and tuples of them pass through freeze unchanged
+        return value if isinstance(value, (Record, tuple)) else self.freeze(value)
+
+    def product(self, data: dict) -> Product:
+        options = data.get("options")
+        if isinstance(options, list):
+            # Products with the same option list share one tuple of OptionDefs
+            options = self._share("options", options, lambda v: tuple(self._option(o) for o in v))
+            data = {**data, "options": options}
+        return Product(data, self._freeze_field)
+
+    def rule(self, data: dict) -> Rule:
+        return Rule(data, self.freeze)
+
+def build_records(products: list[dict], rules: list[dict]) -> tuple[list[Product], list[Rule]]:
+    """Records for products and rules as returned by batch_validation.load_catalog."""
+    builder = RecordBuilder()
+    return [builder.product(p) for p in products], [builder.rule(r) for r in rules]
+
+def load_records(db: Session) -> tuple[list[Product], list[Rule]]:
+    return build_records(*load_catalog(db))
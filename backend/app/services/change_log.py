@@ -0,0 +1,105 @@
+"""
+Change log behind GET /api/catalog/changes: which products, rules and articles
+were written or deleted after a given catalog version.
+
+Every catalog write records its rows with the catalog version it bumped, in the
+same transaction. Only the latest entry per row is kept: a client that is behind
+only needs the current state of a row, so older entries are dropped on write.
+Upserts are served from the current rows; tombstones are kept for
+CATALOG_CHANGES_RETENTION versions. A client older than that, or older than the
+log itself (catalog_changes_floor), is told to reload everything.
+"""
+from typing import Iterable
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import models
+from app.services.catalog import get_catalog_version
+
+ENTITIES = {"product": models.Product, "rule": models.Rule, "article": models.Article}
+
+# Oldest catalog version the log can sync from
+CHANGES_FLOOR_KEY = "catalog_changes_floor"
+
+# Ids per IN (...) clause
+_ID_CHUNK = 500
+
+def _chunks(ids: list) -> Iterable[list]:
+    for start in range(0, len(ids), _ID_CHUNK):
+        yield ids[start:start + _ID_CHUNK]
+
+def get_changes_floor(db: Session) -> int | None:
+    value = db.query(models.SystemSetting.value).filter(models.SystemSetting.key == CHANGES_FLOOR_KEY).scalar()
+    return int(value) if value is not None else None
+
+def _set_changes_floor(db: Session, floor: int):
+    setting = db.get(models.SystemSetting, CHANGES_FLOOR_KEY)
+    if setting is None:
+        db.add(models.SystemSetting(key=CHANGES_FLOOR_KEY, value=str(floor)))
+    else:
+        setting.value = str(max(int(setting.value or 0), floor))
+    db.flush()
+
+def init_change_log(db: Session) -> bool:
+    """
+    Start the log at the current catalog version (writes before it were never
+    recorded). Returns True if it was started; the caller commits.
+    """
+    if get_changes_floor(db) is not None:
+        return False
+    _set_changes_floor(db, get_catalog_version(db))
+    return True
+
+def record_changes(db: Session, version: int, entity: str, upserted: Iterable = (), deleted: Iterable = ()):
+    """
+    Log written (upserted) and deleted rows of one entity for the catalog version
+    the caller just bumped to, inside the caller's transaction.
+    """
+    entries = {str(i): False for i in upserted}
+    entries.update({str(i): True for i in deleted})
+    if not entries:
+        return
+    Change = models.CatalogChange
+    for ids in _chunks(list(entries)):
+        db.query(Change).filter(Change.entity == entity, Change.entity_id.in_(ids)).delete(synchronize_session=False)
+    db.execute(
+        insert(Change),
+        [{"version": version, "entity": entity, "entity_id": i, "deleted": d} for i, d in entries.items()],
+    )
+
+    # Drop old tombstones; clients from before them can no longer sync
+    cutoff = version - settings.CATALOG_CHANGES_RETENTION
+    pruned = db.query(Change).filter(Change.deleted.is_(True), Change.version <= cutoff).delete(synchronize_session=False)
+    if pruned:
+        _set_changes_floor(db, cutoff)
+
+def changes_since(db: Session, since: int | None) -> dict:
+    """
+    Current rows and tombstones written after catalog version `since`
+    (schemas.CatalogChanges). since=None (a client without data) always resets.
+    """
+    # Read the version first: changes committed meanwhile are included and simply re-sent next time
+    version = get_catalog_version(db)
+    result = {"version": version, "since": since, "reset": False, "deleted": {}}
+    floor = get_changes_floor(db)
+    if since is None or floor is None or since < floor or since > version:
+        result["reset"] = True
+        return result
+
+    Change = models.CatalogChange
+    upserted, deleted = {e: [] for e in ENTITIES}, {e: [] for e in ENTITIES}
+    rows = db.query(Change.entity, Change.entity_id, Change.deleted).filter(Change.version > since)
+    for entity, entity_id, is_deleted in rows:
+        if entity in ENTITIES:
+            (deleted if is_deleted else upserted)[entity].append(entity_id)
+
+    for entity, model in ENTITIES.items():
+        # Log ids are strings; rules and articles have integer keys
+        key_type = model.id.type.python_type
+        ids = sorted(key_type(i) for i in upserted[entity])
+        rows = []
+        for chunk in _chunks(ids):
+            rows += db.query(model).filter(model.id.in_(chunk)).all()
+        result[f"{entity}s"] = sorted(rows, key=lambda row: row.id)
+        result["deleted"][f"{entity}s"] = sorted(key_type(i) for i in deleted[entity])
+    return result
@@ -0,0 +1,425 @@
+"""
+Server-side configuration sessions for /api/config/sessions.
+
+A session holds one ConfigState (the configurator store's slots, slotCount,
+chassisId, chassisOptions, psuId, psuOptions) together with its aggregates and
+per-rule results. Clients send small deltas instead of the whole state. After a
+delta only the rules that read something the delta changed are re-evaluated:
+  - a component whose slots or slot neighbours changed (component_selected,
+    adjacency, component forbids);
+  - a system property (slotCount, totalWidth, totalPower, requiredPower,
+    chassisId) or the chassis options (option_not_selected).
+The result lists all violations in validate_config order and what was added or
+resolved compared to the previous revision.
+
+Sessions live in a per-worker LRU (CONFIG_SESSIONS_MAX) and expire after
+CONFIG_SESSION_TTL_SECONDS without use. With CONFIG_SESSIONS_PERSIST the state
+is also written to the config_sessions table on every change, so sessions
+survive worker restarts and can be served by any worker; the stored revision
+decides which copy is current.
+"""
+import copy
+import json
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models import models
+from app.services import rule_engine
+from app.services.catalog import get_catalog_version
+from app.services.catalog_records import load_records
+
+class SessionDeltaError(ValueError):
+    """A delta that can't be applied to the session's state."""
+
+# --- Catalog snapshot shared by all sessions ---
+
+def _rule_parts(rule: dict) -> tuple[list, list]:
+    compiled = rule.get("compiled")
+    if compiled:
+        if compiled.get("dead"):
+            return [], []
+        return compiled["conditions"], compiled["actions"]
+    definition = rule.get("definition") or {}
+    return definition.get("conditions") or [], definition.get("actions") or []
+
+def _rule_deps(rule: dict) -> tuple[set, set] | None:
+    """(components, properties) a rule reads, or None if its result never changes."""
+    conditions, actions = _rule_parts(rule)
+    if not conditions or not actions:
+        return None
+    components, properties = set(), set()
+    for item in (*conditions, *actions):
+        for key in ("componentId", "adjacentTo"):
+            if item.get(key) and item[key] != "system_slot":
+                components.add(item[key])
+        if item.get("type") == "system_property":
+            properties.add(item.get("property"))
+        elif item.get("type") == "option_not_selected":
+            properties.add("chassisOptions")
+    return components, properties
+
+class CatalogSnapshot:
+    """Products, rules and the component/property -> rule index of one catalog version; never changed."""
+    __slots__ = ("products", "rules", "version", "_by_component", "_by_property")
+
+    def __init__(self, products: dict, rules: list, by_component: dict, by_property: dict, version: int | None):
+        self.products, self.rules, self.version = products, rules, version
+        self._by_component, self._by_property = by_component, by_property
+
+    def affected_rules(self, components: set, properties: set) -> set[int]:
+        affected = set()
+        for component_id in components:
+            affected.update(self._by_component.get(component_id, ()))
+        for prop in properties:
+            affected.update(self._by_property.get(prop, ()))
+        return affected
+
+class SessionCatalog:
+    """
+    The current CatalogSnapshot. Products and rules are compact records (see
+    catalog_records.py), since every worker keeps them for as long as the catalog
+    doesn't change. A rebuild publishes a new snapshot with one assignment, so a
+    reader that takes `snapshot` once sees one version throughout.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.snapshot = CatalogSnapshot({}, [], {}, {}, None)
+
+    @property
+    def version(self) -> int | None:
+        return self.snapshot.version
+
+    def build(self, products: list[dict], rules: list[dict], version: int | None = None):
+        by_component, by_property = defaultdict(list), defaultdict(list)
+        for index, rule in enumerate(rules):
+            deps = _rule_deps(rule)
+            if deps is None:
+                # Only evaluated when a session is evaluated from scratch
+                continue
+            for component_id in deps[0]:
+                by_component[component_id].append(index)
+            for prop in deps[1]:
+                by_property[prop].append(index)
+        with self._lock:
+            self.snapshot = CatalogSnapshot({p["id"]: p for p in products}, rules, by_component, by_property, version)
+
+    def rebuild(self, db: Session):
+        version = get_catalog_version(db)
+        products, rules = load_records(db)
+        self.build(products, rules, version)
+
+    def ensure_fresh(self, db: Session):
+        version = self.version
+        if version is None or version != get_catalog_version(db):
+            self.rebuild(db)
+
+    def invalidate(self):
+        with self._lock:
+            s = self.snapshot
+            self.snapshot = CatalogSnapshot(s.products, s.rules, s._by_component, s._by_property, None)
+
+session_catalog = SessionCatalog()
+
+# --- State and deltas ---
+
+def empty_state(slot_count: int = 21) -> dict:
+    """The configurator's initial state (configStore resetConfig)."""
+    return {
+        "slotCount": slot_count,
+        "slots": [
+            {"id": i + 1, "type": "system" if i == 0 else "peripheral", "componentId": None, "width": 4, "blockedBy": None}
+            for i in range(slot_count)
+        ],
+        "chassisId": None,
+        "chassisOptions": {},
+        "psuId": None,
+        "psuOptions": {},
+    }
+
+def _check_slot(slot):
+    error = rule_engine.slot_error(slot)
+    if error:
+        raise SessionDeltaError(error)
+
+def check_state(state: dict):
+    """Raise SessionDeltaError unless state has the ConfigState shape rule_engine reads."""
+    # Deltas edit the slot list in place, so it must exist
+    error = "slots must be a list" if not isinstance(state.get("slots"), list) else rule_engine.state_error(state)
+    if error:
+        raise SessionDeltaError(error)
+
+def _find_slot(state: dict, slot_id) -> dict:
+    for slot in state["slots"]:
+        if slot.get("id") == slot_id:
+            return slot
+    raise SessionDeltaError(f"Slot {slot_id} does not exist")
+
+def apply_delta(state: dict, delta: dict):
+    """
+    Apply one delta (schemas.SessionDelta as a dict) to state in place.
+    Slot layout (widths, blocking, pluggable PSUs) is worked out by the client;
+    set_slot just stores the slot fields it sends. Raises SessionDeltaError, before
+    changing state, for deltas that would leave it malformed.
+    """
+    op = delta.get("op")
+    if op == "replace":
+        if not isinstance(delta.get("config"), dict):
+            raise SessionDeltaError("replace needs a config")
+        config = {**empty_state(0), **copy.deepcopy(delta["config"])}
+        check_state(config)
+        state.clear()
+        state.update(config)
+    elif op == "set_slot":
+        fields = delta.get("slot") or {}
+        if "id" not in fields:
+            raise SessionDeltaError("set_slot needs a slot with an id")
+        _check_slot(fields)
+        try:
+            _find_slot(state, fields["id"]).update(copy.deepcopy(fields))
+        except SessionDeltaError:
+            state["slots"].append(
+                {"type": "peripheral", "componentId": None, "width": 4, "blockedBy": None, **copy.deepcopy(fields)}
+            )
+            state["slots"].sort(key=lambda s: s.get("id") or 0)
+    elif op == "set_slot_options":
+        _find_slot(state, delta.get("slot_id"))["selectedOptions"] = dict(delta.get("options") or {})
+    elif op == "set_chassis":
+        state["chassisId"], state["chassisOptions"] = delta.get("chassis_id"), dict(delta.get("options") or {})
+    elif op == "set_psu":
+        state["psuId"], state["psuOptions"] = delta.get("psu_id"), dict(delta.get("options") or {})
+    elif op == "set_slot_count":
+        count = delta.get("slot_count")
+        if not isinstance(count, int) or count < 0:
+            raise SessionDeltaError("set_slot_count needs a slot_count >= 0")
+        slots = [s for s in state["slots"] if (s.get("id") or 0) <= count]
+        known = {s.get("id") for s in slots}
+        slots += [
+            {"id": i, "type": "peripheral", "componentId": None, "width": 4, "blockedBy": None}
+            for i in range(1, count + 1) if i not in known
+        ]
+        state["slots"] = sorted(slots, key=lambda s: s.get("id") or 0)
+        state["slotCount"] = count
+    else:
+        raise SessionDeltaError(f"Unknown delta op: {op}")
+
+def _component_signatures(state: dict) -> dict:
+    """Per component: where it sits and what is next to it, i.e. what its rules can see."""
+    signatures = defaultdict(list)
+    slots = state.get("slots") or []
+    neighbor = lambda i: (slots[i].get("componentId"), slots[i].get("type")) if 0 <= i < len(slots) else None
+    for index, slot in enumerate(slots):
+        if slot.get("componentId"):
+            signatures[slot["componentId"]].append((slot.get("id"), slot.get("type"), neighbor(index - 1), neighbor(index + 1)))
+    for key in ("chassisId", "psuId"):
+        if state.get(key):
+            signatures[state[key]].append(key)
+    return signatures
+
+def _properties(state: dict, aggregates: rule_engine.Aggregates) -> dict:
+    return {
+        "slotCount": state.get("slotCount") or 0,
+        "totalWidth": aggregates.used_width,
+        "totalPower": aggregates.total_power,
+        "requiredPower": aggregates.required_power,
+        "chassisId": state.get("chassisId"),
+        "chassisOptions": (state.get("chassisId"), json.dumps(state.get("chassisOptions") or {}, sort_keys=True, default=str)),
+    }
+
+def _changed(before: dict, after: dict) -> set:
+    return {key for key in before.keys() | after.keys() if before.get(key) != after.get(key)}
+
+# --- Sessions ---
+
+class ConfigSession:
+
+    def __init__(self, session_id: str, state: dict, ignore_categories: list[str] | None = None, revision: int = 0):
+        self.id = session_id
+        self.state = state
+        self.ignore_categories = ignore_categories or []
+        self.revision = revision
+        self.lock = threading.RLock()
+        self.touch()
+        # Derived from state at self._catalog_version (None = evaluate everything)
+        self._catalog_version: int | None = None
+        self._signatures: dict = {}
+        self._properties: dict = {}
+        self._rule_results: dict[int, list[str]] = {}
+        self.aggregates = rule_engine.Aggregates()
+        self.violations: list[str] = []
+
+    def touch(self):
+        self.expires_at = time.time() + settings.CONFIG_SESSION_TTL_SECONDS
+
+    def evaluate(self, catalog: SessionCatalog, quantity: int = 1) -> dict:
+        """
+        Bring the derived results up to date with state; returns schemas.SessionResult
+        fields, with the system unit price at the tier for `quantity`.
+        """
+        # One snapshot throughout: rule indexes are only meaningful for its rule list
+        catalog = catalog.snapshot
+        products = catalog.products
+        aggregates = rule_engine.compute_aggregates(self.state, products)
+        signatures, properties = _component_signatures(self.state), _properties(self.state, aggregates)
+        ignored = set(self.ignore_categories)
+
+        if self._catalog_version is None or self._catalog_version != catalog.version:
+            indexes = range(len(catalog.rules))
+            self._rule_results = {}
+        else:
+            indexes = catalog.affected_rules(_changed(self._signatures, signatures), _changed(self._properties, properties))
+        for index in indexes:
+            rule = catalog.rules[index]
+            if rule.get("category") in ignored:
+                continue
+            messages = rule_engine.evaluate_rule(rule, self.state, aggregates)
+            if messages:
+                self._rule_results[index] = messages
+            else:
+                self._rule_results.pop(index, None)
+
+        violations = rule_engine.check_limits(self.state, products, aggregates)
+        for index in sorted(self._rule_results):
+            violations.extend(self._rule_results[index])
+        before, after = Counter(self.violations), Counter(violations)
+        self._catalog_version, self._signatures, self._properties = catalog.version, signatures, properties
+        self.aggregates, self.violations = aggregates, violations
+        return {
+            "session_id": self.id,
+            "revision": self.revision,
+            "valid": not violations,
+            "violations": violations,
+            "added": list((after - before).elements()),
+            "resolved": list((before - after).elements()),
+            "evaluated_rules": len(indexes),
+            "unit_price": rule_engine.system_unit_price(self.state, products, quantity),
+            "aggregates": {
+                "total_power": aggregates.total_power,
+                "required_power": aggregates.required_power,
+                "used_width": aggregates.used_width,
+                "backplane_width": aggregates.backplane_width,
+                "remaining_interfaces": aggregates.remaining_interfaces,
+            },
+        }
+
+class SessionStore:
+    """LRU of live sessions with a TTL, optionally written through to config_sessions."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: OrderedDict[str, ConfigSession] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _put(self, session: ConfigSession):
+        with self._lock:
+            self._sessions[session.id] = session
+            self._sessions.move_to_end(session.id)
+            now = time.time()
+            # Least recently used first, so expired sessions are at the front
+            while self._sessions:
+                oldest = next(iter(self._sessions.values()))
+                if len(self._sessions) <= settings.CONFIG_SESSIONS_MAX and oldest.expires_at > now:
+                    break
+                self._sessions.popitem(last=False)
+
+    def _save(self, db: Session, session: ConfigSession, expected_revision: int | None) -> bool:
+        """Write the session if the stored revision is still expected_revision (None = new)."""
+        Record = models.ConfigSession
+        values = {
+            "state": session.state,
+            "ignore_categories": session.ignore_categories,
+            "revision": session.revision,
+            "expires_at": session.expires_at,
+        }
+        if expected_revision is None:
+            db.add(Record(id=session.id, **values))
+            # Opportunistic cleanup of sessions nobody came back for
+            db.query(Record).filter(Record.expires_at < time.time()).delete(synchronize_session=False)
+            db.commit()
+            return True
+        updated = (
+            db.query(Record)
+            .filter(Record.id == session.id, Record.revision == expected_revision)
+            .update(values, synchronize_session=False)
+        )
+        db.commit()
+        return bool(updated)
+
+    def _load(self, db: Session, session_id: str) -> ConfigSession | None:
+        record = db.get(models.ConfigSession, session_id)
+        if record is None or record.expires_at < time.time():
+            return None
+        return ConfigSession(record.id, record.state, record.ignore_categories, record.revision)
+
+    def create(self, db: Session, state: dict | None = None, ignore_categories: list[str] | None = None) -> ConfigSession:
+        if state:
+            check_state(state)
+        session = ConfigSession(uuid.uuid4().hex, copy.deepcopy(state) if state else empty_state(), ignore_categories)
+        if settings.CONFIG_SESSIONS_PERSIST:
+            self._save(db, session, None)
+        self._put(session)
+        return session
+
+    def get(self, db: Session, session_id: str) -> ConfigSession | None:
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None and session.expires_at < time.time():
+            self.delete(db, session_id)
+            return None
+        if settings.CONFIG_SESSIONS_PERSIST:
+            stored = db.query(models.ConfigSession.revision).filter(models.ConfigSession.id == session_id).scalar()
+            if stored is None:
+                # Deleted or expired through another worker
+                self.discard(session_id)
+                return None
+            if session is None or session.revision != stored:
+                session = self._load(db, session_id)
+                if session is None:
+                    return None
+        if session is None:
+            return None
+        session.touch()
+        self._put(session)
+        return session
+
+    def apply(self, db: Session, session: ConfigSession, deltas: list[dict]) -> ConfigSession:
+        """
+        Apply deltas atomically (all or none) and bump the revision. With persistence,
+        a session changed meanwhile by another worker is reloaded and the deltas re-applied.
+        """
+        for _ in range(3):
+            state = copy.deepcopy(session.state)
+            for delta in deltas:
+                apply_delta(state, delta)
+            revision = session.revision
+            if settings.CONFIG_SESSIONS_PERSIST:
+                candidate = ConfigSession(session.id, state, session.ignore_categories, revision + 1)
+                if not self._save(db, candidate, revision):
+                    session = self._load(db, session.id)
+                    if session is None:
+                        raise KeyError(candidate.id)
+                    self._put(session)
+                    continue
+            session.state, session.revision = state, revision + 1
+            session.touch()
+            return session
+        raise SessionDeltaError("The session is being changed concurrently; retry")
+
+    def discard(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def delete(self, db: Session, session_id: str) -> bool:
+        with self._lock:
+            found = self._sessions.pop(session_id, None) is not None
+        if settings.CONFIG_SESSIONS_PERSIST:
+            found = bool(db.query(models.ConfigSession).filter(models.ConfigSession.id == session_id).delete()) or found
+            db.commit()
+        return found
+
+config_sessions = SessionStore()
@@ -0,0 +1,68 @@
+"""
+Preparing the database: schema upgrades and one-off data fixes.
+
+`python seed.py` prepares the database before the app starts (start_prod.sh),
+and then records a fingerprint of the schema in system_settings. App startup
+only reads that fingerprint: a prepared database costs one SELECT and no writes.
+Only a database that wasn't prepared for the current models (a fresh
+development database, or a deployment that skipped seed.py) is upgraded at
+startup.
+"""
+import hashlib
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+from app.db.migrate import upgrade_schema
+from app.db.session import Base, SessionLocal, engine
+from app.models import models
+from app.services.catalog import CATALOG_VERSION_KEY, EXAMPLES_VERSION_KEY, bump_examples_version
+from app.services.change_log import CHANGES_FLOOR_KEY, init_change_log
+from app.services.example_configs import backfill_example_configs
+
+SCHEMA_KEY = "schema_fingerprint"
+# Checksum of the data seed.py last wrote
+SEED_KEY = "seed_checksum"
+
+# system_settings rows the app maintains itself: the admin settings API neither
+# lists nor writes them (a counter moved back or set to text breaks every cache)
+INTERNAL_SETTINGS = frozenset({CATALOG_VERSION_KEY, EXAMPLES_VERSION_KEY, CHANGES_FLOOR_KEY, SCHEMA_KEY, SEED_KEY})
+
+def schema_fingerprint() -> str:
+    """Hash of the tables and columns of the current models."""
+    columns = sorted(f"{table.name}.{column.name}" for table in Base.metadata.sorted_tables for column in table.columns)
+    return hashlib.sha256("\n".join(columns).encode()).hexdigest()[:16]
+
+def database_prepared(db: Session) -> bool:
+    """True if prepare_database already ran for the current models (read-only)."""
+    try:
+        value = db.query(models.SystemSetting.value).filter(models.SystemSetting.key == SCHEMA_KEY).scalar()
+    except DBAPIError:
+        # No system_settings table yet
+        db.rollback()
+        return False
+    return value == schema_fingerprint()
+
+def prepare_database():
+    """Create missing tables and columns, fill derived data, then record the schema fingerprint."""
+    upgrade_schema(engine)
+    with SessionLocal() as db:
+        # Parsed example columns for rows written before they existed (or by scripts)
+        if backfill_example_configs(db):
+            # Workers started earlier may have cached the examples without these columns
+            bump_examples_version(db)
+            db.commit()
+        try:
+            if init_change_log(db):
+                db.commit()
+        except IntegrityError:
+            # Another worker started the change log at the same time
+            db.rollback()
+        try:
+            setting = db.get(models.SystemSetting, SCHEMA_KEY)
+            if setting is None:
+                db.add(models.SystemSetting(key=SCHEMA_KEY, value=schema_fingerprint()))
+            else:
+                setting.value = schema_fingerprint()
+            db.commit()
+        except IntegrityError:
+            # Recorded by another worker preparing the same database
+            db.rollback()
@@ -1,8 +1,5 @@
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.application import MIMEApplication
 from app.core.config import settings
+from app.core import metrics
 import logging
 import base64
 
@@ -14,8 +11,15 @@ def send_email(to_email: str, subject: str, body: str, attachments: list[dict] =
     """
     if not settings.SMTP_HOST:
         logger.warning("SMTP settings not configured. Email not sent.")
+        metrics.EMAILS.labels("skipped").inc()
         return False
 
+    # Imported here: email is rarely sent, and these modules slow down app startup
+    import smtplib
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
     try:
         msg = MIMEMultipart()
         msg['From'] = f"{settings.EMAILS_FROM_NAME} <{settings.EMAILS_FROM_EMAIL}>"
@@ -48,9 +52,11 @@ def send_email(to_email: str, subject: str, body: str, attachments: list[dict] =
         server.send_message(msg)
         server.quit()
         logger.info(f"Email sent to {to_email}")
+        metrics.EMAILS.labels("sent").inc()
         return True
     except Exception as e:
         logger.error(f"Failed to send email: {e}")
+        metrics.EMAILS.labels("failed").inc()
         return False
 
 def format_quote_email(quote_data: dict, is_sales_copy: bool = False) -> str:
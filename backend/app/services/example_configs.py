@@ -0,0 +1,48 @@
+"""
+Parsed form of ExampleConfig.config_json.
+
+config_json stays the serialized ConfigState (older clients send and read it as a
+string). On every write the parsed configuration is also stored in the JSON
+column `config`, together with the fields the gallery shows (slot_count,
+chassis_id), so listing and exporting examples never has to parse the blob.
+"""
+import json
+from sqlalchemy.orm import Session
+from app.models.example import ExampleConfig
+
+def parse_config(value) -> tuple[str | None, dict | None]:
+    """(config_json text, parsed ConfigState or None if it isn't a JSON object)."""
+    if value is None:
+        return None, None
+    if isinstance(value, str):
+        try:
+            parsed = json.loads(value)
+        except ValueError:
+            return value, None
+        return value, parsed if isinstance(parsed, dict) else None
+    return json.dumps(value), value if isinstance(value, dict) else None
+
+def apply_config(example: ExampleConfig, value):
+    """Set config_json and the parsed columns derived from it."""
+    example.config_json, config = parse_config(value)
+    example.config = config
+    # The gallery columns are typed; a value of the wrong type is not stored
+    slot_count = config.get("slotCount") if config else None
+    chassis_id = config.get("chassisId") if config else None
+    example.slot_count = slot_count if isinstance(slot_count, int) and not isinstance(slot_count, bool) else None
+    example.chassis_id = chassis_id if isinstance(chassis_id, str) else None
+
+def example_config(example: ExampleConfig) -> dict | None:
+    """The parsed configuration, also for rows saved before the column existed."""
+    if example.config is not None:
+        return example.config
+    return parse_config(example.config_json)[1]
+
+def backfill_example_configs(db: Session) -> int:
+    """Fill the parsed columns for examples written before they existed; the caller commits."""
+    updated = 0
+    pending = db.query(ExampleConfig).filter(ExampleConfig.slot_count.is_(None), ExampleConfig.config_json.isnot(None))
+    for example in pending:
+        apply_config(example, example.config_json)
+        updated += example.config is not None
+    return updated
@@ -0,0 +1,236 @@
+"""
+Bitset engine answering "which products may go into slot N?" for the pairwise
+component_selected -> forbid rules, which make up most of a large rule set.
+
+Each rule "X in slot s forbids Y in slot t" (s/t may be "any slot", stored as
+slot 0) becomes one bit in a packed product bitset keyed by (s, X, t). Scanning
+all products for a slot is then a handful of dict lookups and a bitwise OR over
+the rows of the slots already filled, instead of evaluating every rule for every
+candidate.
+
+Rules with several conditions or other condition types are not covered; those
+are reported in `residual_rules` and still go through rule_engine.
+
+With CATALOG_FILE set, the bitsets are read from the shared catalog file (see
+catalog_file.py) instead of being built by every worker.
+"""
+import threading
+from collections import defaultdict
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models import models
+from app.services.catalog import get_catalog_version
+from app.services.catalog_file import CatalogFile, mapped_catalog
+from app.services.rule_compiler import MAX_SLOTS
+
+ANY_SLOT = 0
+
+def _slot(value) -> int | None:
+    # Uncompiled definitions may still carry "3", "" or a negative number as slotIndex
+    try:
+        slot = int(value or ANY_SLOT)
+    except (TypeError, ValueError):
+        return None
+    return slot if slot >= ANY_SLOT else None
+
+def pairwise_rules(rules: list[dict]):
+    """
+    Yield (trigger_slot, trigger_id, actions) for rules the engine covers:
+    a single component_selected condition and only forbid actions.
+    Rules are dicts with "definition" and optionally "compiled" (see rule_compiler).
+    """
+    for rule in rules:
+        compiled = rule.get("compiled")
+        if compiled:
+            if compiled.get("dead"):
+                continue
+            conditions, actions = compiled["conditions"], compiled["actions"]
+        else:
+            definition = rule.get("definition") or {}
+            conditions, actions = definition.get("conditions") or [], definition.get("actions") or []
+        if len(conditions) != 1 or conditions[0].get("type") != "component_selected" or not actions:
+            yield None
+            continue
+        slots = [_slot(conditions[0].get("slotIndex"))] + [_slot(a.get("slotIndex")) for a in actions]
+        if any(a.get("type") != "forbid" for a in actions) or None in slots:
+            yield None
+            continue
+        actions = [{**a, "slotIndex": slot} for a, slot in zip(actions, slots[1:])]
+        yield slots[0], conditions[0].get("componentId"), actions
+
+class FeasibilityTables:
+    """The bitsets of one catalog version; never changed once built."""
+    __slots__ = ("version", "product_ids", "index", "forward_keys", "forward", "reverse_keys", "reverse",
+                 "self_forbidden", "residual_rules")
+
+    def __init__(self, version, product_ids, index, forward_keys, forward, reverse_keys, reverse, self_forbidden, residual_rules):
+        self.version = version
+        self.product_ids, self.index = product_ids, index
+        # (trigger slot, trigger product index, target slot) -> row of forward
+        self.forward_keys, self.forward = forward_keys, forward
+        # (target slot, target product index, trigger slot) -> row of reverse:
+        # candidates that, once placed, would forbid an already placed product
+        self.reverse_keys, self.reverse = reverse_keys, reverse
+        # slot -> products that forbid themselves (or the whole configuration) there
+        self.self_forbidden = self_forbidden
+        self.residual_rules = residual_rules
+
+    def with_version(self, version: int | None) -> "FeasibilityTables":
+        return FeasibilityTables(version, self.product_ids, self.index, self.forward_keys, self.forward,
+                                 self.reverse_keys, self.reverse, self.self_forbidden, self.residual_rules)
+
+class FeasibilityEngine:
+    """
+    Packed (uint8) product bitsets built from the rules at a catalog version.
+    Rebuilt from the DB when the catalog version changes (see ensure_fresh). A
+    rebuild publishes new FeasibilityTables with one assignment and every query
+    reads `tables` once, so a query never mixes two versions.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables = FeasibilityTables(
+            None, [], {}, {}, np.zeros((0, 0), dtype=np.uint8), {}, np.zeros((0, 0), dtype=np.uint8),
+            np.zeros((MAX_SLOTS + 1, 0), dtype=np.uint8), 0,
+        )
+
+    @property
+    def version(self) -> int | None:
+        return self.tables.version
+
+    @property
+    def product_ids(self) -> list[str]:
+        return self.tables.product_ids
+
+    @property
+    def residual_rules(self) -> int:
+        return self.tables.residual_rules
+
+    def build(self, product_ids: list[str], rules: list[dict], version: int | None = None):
+        index = {pid: i for i, pid in enumerate(product_ids)}
+        forward = defaultdict(list)
+        reverse = defaultdict(list)
+        self_forbidden = np.zeros((MAX_SLOTS + 1, len(product_ids)), dtype=bool)
+        residual = 0
+
+        for entry in pairwise_rules(rules):
+            if entry is None:
+                residual += 1
+                continue
+            trigger_slot, trigger_id, actions = entry
+            trigger = index.get(trigger_id)
+            if trigger is None or trigger_slot > MAX_SLOTS:
+                continue
+            for action in actions:
+                target_id = action.get("componentId")
+                target_slot = action["slotIndex"]
+                if target_slot > MAX_SLOTS:
+                    continue
+                if not target_id:
+                    # Generic forbid: placing the trigger there is never valid
+                    self_forbidden[trigger_slot, trigger] = True
+                    continue
+                if target_id == trigger_id and (ANY_SLOT in (trigger_slot, target_slot) or trigger_slot == target_slot):
+                    # X forbids X and a single placement satisfies both sides
+                    self_forbidden[trigger_slot or target_slot, trigger] = True
+                target = index.get(target_id)
+                if target is None:
+                    continue
+                forward[(trigger_slot, trigger, target_slot)].append(target)
+                reverse[(target_slot, target, trigger_slot)].append(trigger)
+
+        def pack(groups: dict) -> tuple[dict, np.ndarray]:
+            keys = {}
+            bits = np.zeros((len(groups), len(product_ids)), dtype=bool)
+            for row, (key, members) in enumerate(groups.items()):
+                keys[key] = row
+                bits[row, members] = True
+            return keys, np.packbits(bits, axis=1, bitorder="little")
+
+        forward_keys, forward_rows = pack(forward)
+        reverse_keys, reverse_rows = pack(reverse)
+        tables = FeasibilityTables(
+            version, list(product_ids), index, forward_keys, forward_rows, reverse_keys, reverse_rows,
+            np.packbits(self_forbidden, axis=1, bitorder="little"), residual,
+        )
+        with self._lock:
+            self.tables = tables
+
+    def adopt(self, mapped: CatalogFile):
+        """Use the bitsets of a mapped catalog file; lookups go through its accessors."""
+        tables = FeasibilityTables(
+            mapped.version, mapped.product_ids, mapped.index,
+            mapped.bitset_keys("forward"), mapped.arrays["forward"],
+            mapped.bitset_keys("reverse"), mapped.arrays["reverse"],
+            mapped.arrays["self_forbidden"], mapped.residual_rules,
+        )
+        with self._lock:
+            self.tables = tables
+
+    def rebuild(self, db: Session):
+        mapped = mapped_catalog.current(db)
+        if mapped is not None:
+            self.adopt(mapped)
+            return
+        version = get_catalog_version(db)
+        product_ids = [row[0] for row in db.query(models.Product.id).order_by(models.Product.id)]
+        rules = [
+            {"definition": definition, "compiled": compiled}
+            for definition, compiled in db.query(models.Rule.definition, models.Rule.compiled)
+        ]
+        self.build(product_ids, rules, version)
+
+    def ensure_fresh(self, db: Session):
+        version = self.version
+        if version is None or version != get_catalog_version(db):
+            self.rebuild(db)
+
+    def invalidate(self):
+        with self._lock:
+            self.tables = self.tables.with_version(None)
+
+    def forbidden_mask(self, state: dict, slot: int, tables: FeasibilityTables | None = None) -> np.ndarray:
+        """
+        Boolean mask over product_ids (of `tables`, by default the current ones):
+        True if placing that product in `slot` (replacing whatever is there) makes
+        a covered rule report a violation involving it, either as the forbidden
+        component or as the trigger.
+        """
+        t = tables or self.tables
+        # Only rules for "any slot" apply to slots outside 1..MAX_SLOTS
+        candidate_slots = (slot, ANY_SLOT) if isinstance(slot, int) and ANY_SLOT < slot <= MAX_SLOTS else (ANY_SLOT,)
+        # (slot, component, can trigger): chassis and PSU only count as forbid targets, like in apply_actions
+        placed = [(s.get("id"), s.get("componentId"), True) for s in state.get("slots") or [] if s.get("id") != slot]
+        placed += [(ANY_SLOT, state.get(key), False) for key in ("chassisId", "psuId")]
+
+        forward_rows, reverse_rows = [], []
+        for placed_slot, component_id, can_trigger in placed:
+            placed_index = t.index.get(component_id)
+            if placed_index is None:
+                continue
+            placed_slots = (placed_slot, ANY_SLOT) if placed_slot else (ANY_SLOT,)
+            for placed_key in placed_slots:
+                for candidate_key in candidate_slots:
+                    # The placed product triggers a forbid of the candidate
+                    if can_trigger:
+                        row = t.forward_keys.get((placed_key, placed_index, candidate_key))
+                        if row is not None:
+                            forward_rows.append(row)
+                    # The candidate triggers a forbid of the placed product
+                    row = t.reverse_keys.get((placed_key, placed_index, candidate_key))
+                    if row is not None:
+                        reverse_rows.append(row)
+
+        forbidden = np.bitwise_or.reduce(t.self_forbidden[list(candidate_slots)], axis=0)
+        if forward_rows:
+            forbidden |= np.bitwise_or.reduce(t.forward[forward_rows], axis=0)
+        if reverse_rows:
+            forbidden |= np.bitwise_or.reduce(t.reverse[reverse_rows], axis=0)
+        return np.unpackbits(forbidden, count=len(t.product_ids), bitorder="little").astype(bool)
+
+    def forbidden_products(self, state: dict, slot: int) -> list[str]:
+        tables = self.tables
+        mask = self.forbidden_mask(state, slot, tables)
+        return [tables.product_ids[i] for i in np.flatnonzero(mask)]
+
+feasibility_engine = FeasibilityEngine()
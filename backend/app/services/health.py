@@ -0,0 +1,81 @@
+import asyncio
+import time
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.article_index import article_index
+from app.services.catalog import get_catalog_version
+
+# Load balancers poll often; one probe round per window is plenty
+READY_CACHE_SECONDS = 5.0
+SMTP_CACHE_SECONDS = 60.0
+SMTP_TIMEOUT_SECONDS = 2.0
+
+_ready_cache: tuple[float, dict] | None = None
+_smtp_cache: tuple[float, dict] | None = None
+_ready_lock = asyncio.Lock()
+
+def _probe_db() -> dict:
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        db.execute(text("SELECT 1"))
+        latency = time.perf_counter() - start
+        db_version = get_catalog_version(db)
+    finally:
+        db.close()
+    return {
+        "db": {"status": "ok", "latency_ms": round(latency * 1000, 2)},
+        "catalog": {
+            "db_version": db_version,
+            "article_index_version": article_index.version,
+            "stale": article_index.version is not None and article_index.version != db_version,
+        },
+    }
+
+async def _probe_smtp() -> dict:
+    global _smtp_cache
+    if not settings.SMTP_HOST:
+        return {"status": "not_configured"}
+    now = time.monotonic()
+    if _smtp_cache is not None and now - _smtp_cache[0] < SMTP_CACHE_SECONDS:
+        return _smtp_cache[1]
+
+    start = time.perf_counter()
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(settings.SMTP_HOST, settings.SMTP_PORT or 587),
+            timeout=SMTP_TIMEOUT_SECONDS,
+        )
+        writer.close()
+        result = {"status": "ok", "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+    except (OSError, asyncio.TimeoutError) as e:
+        result = {"status": "error", "error": str(e) or type(e).__name__}
+    _smtp_cache = (now, result)
+    return result
+
+async def check_readiness() -> dict:
+    """
+    Run all dependency probes concurrently. Results are cached for READY_CACHE_SECONDS
+    so frequent readiness checks don't hammer the database.
+    """
+    global _ready_cache
+    async with _ready_lock:
+        now = time.monotonic()
+        if _ready_cache is not None and now - _ready_cache[0] < READY_CACHE_SECONDS:
+            return _ready_cache[1]
+
+        db_result, smtp_result = await asyncio.gather(
+            run_in_threadpool(_probe_db), _probe_smtp(), return_exceptions=True
+        )
+        if isinstance(db_result, Exception):
+            checks = {"db": {"status": "error", "error": str(db_result)}}
+        else:
+            checks = dict(db_result)
+        checks["smtp"] = smtp_result if not isinstance(smtp_result, Exception) else {"status": "error", "error": str(smtp_result)}
+
+        # Only the database is required to serve requests; SMTP problems are reported but don't fail readiness
+        report = {"status": "ok" if checks["db"]["status"] == "ok" else "error", "checks": checks}
+        _ready_cache = (now, report)
+        return report
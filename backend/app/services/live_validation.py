@@ -0,0 +1,133 @@
+"""
+WebSocket live validation (/api/config/live) on top of configuration sessions.
+
+The client streams {"seq": n, "deltas": [...], "quantity": q} messages (deltas as
+in schemas.SessionDelta) and gets one result per batch of work:
+    {"type": "result", "seq": <last applied seq>, ...schemas.SessionResult}
+    {"type": "error", "seq": n, "detail": ...}  (that message's deltas were not applied)
+
+Messages that arrive within LIVE_VALIDATION_DEBOUNCE_MS of each other (at most
+LIVE_VALIDATION_MAX_DELAY_MS in total) are applied together and evaluated once.
+Each message is applied atomically and in arrival order, so results follow the
+connection's order. If newer messages arrive while a batch is evaluated, that
+result is stale: it is dropped and the next batch is applied right away on top
+of the already updated session, unless the client has waited
+LIVE_VALIDATION_MAX_DELAY_MS for a result. `added`/`resolved` are relative to
+the last result sent on the connection.
+"""
+import asyncio
+import json
+from collections import Counter
+from fastapi import WebSocket, WebSocketDisconnect
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.schemas import schemas
+from app.services.config_sessions import SessionDeltaError, config_sessions, session_catalog
+
+def _start(session_id: str | None, quantity: int) -> dict | None:
+    """Open (or create) the session; returns schemas.SessionState fields, None if it doesn't exist."""
+    with SessionLocal() as db:
+        session_catalog.ensure_fresh(db)
+        session = config_sessions.get(db, session_id) if session_id else config_sessions.create(db)
+        if session is None:
+            return None
+        with session.lock:
+            return {**session.evaluate(session_catalog, quantity), "config": session.state}
+
+def _apply_batch(session_id: str, batch: list[tuple[int, list[dict]]], quantity: int) -> tuple[dict | None, list[dict]]:
+    """Apply each message's deltas in order, then evaluate once. Returns (result, errors)."""
+    errors = []
+    with SessionLocal() as db:
+        session_catalog.ensure_fresh(db)
+        session = config_sessions.get(db, session_id)
+        if session is None:
+            return None, [{"type": "error", "seq": batch[-1][0], "detail": "Session not found or expired"}]
+        with session.lock:
+            for seq, deltas in batch:
+                try:
+                    session = config_sessions.apply(db, session, deltas)
+                except SessionDeltaError as e:
+                    errors.append({"type": "error", "seq": seq, "detail": str(e)})
+                except KeyError:
+                    return None, [{"type": "error", "seq": seq, "detail": "Session not found or expired"}]
+            with session.lock:
+                return session.evaluate(session_catalog, quantity), errors
+
+async def _read(websocket: WebSocket, queue: asyncio.Queue):
+    """Parse incoming messages into the queue; None marks the end of the connection."""
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                seq = message.get("seq")
+                update = schemas.SessionUpdate.model_validate({"deltas": message.get("deltas") or []})
+            except (ValueError, AttributeError) as e:
+                # Not JSON, not an object, or invalid deltas (ValidationError is a ValueError)
+                await websocket.send_json({"type": "error", "seq": None, "detail": str(e)})
+                continue
+            quantity = message.get("quantity")
+            await queue.put((seq, [d.model_dump(exclude_unset=True) for d in update.deltas], quantity))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        await queue.put(None)
+
+async def serve(websocket: WebSocket, session_id: str | None = None, quantity: int = 1):
+    await websocket.accept()
+    state = await asyncio.to_thread(_start, session_id, quantity)
+    if state is None:
+        await websocket.close(code=4404, reason="Session not found or expired")
+        return
+    session_id = state["session_id"]
+    await websocket.send_json({"type": "result", "seq": None, **state})
+    sent_violations = state["violations"]
+
+    loop = asyncio.get_running_loop()
+    debounce = settings.LIVE_VALIDATION_DEBOUNCE_MS / 1000
+    max_delay = settings.LIVE_VALIDATION_MAX_DELAY_MS / 1000
+    last_sent = loop.time()
+    queue: asyncio.Queue = asyncio.Queue()
+    reader = asyncio.create_task(_read(websocket, queue))
+    try:
+        closed = False
+        while not closed:
+            item = await queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Coalesce rapid-fire edits
+            deadline = loop.time() + max_delay
+            while True:
+                timeout = min(debounce, deadline - loop.time())
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    closed = True
+                    break
+                batch.append(item)
+            for _, _, requested in batch:
+                if isinstance(requested, int) and requested > 0:
+                    quantity = requested
+
+            result, errors = await asyncio.to_thread(
+                _apply_batch, session_id, [(seq, deltas) for seq, deltas, _ in batch], quantity
+            )
+            for error in errors:
+                await websocket.send_json(error)
+            if result is None:
+                break
+            if not queue.empty() and loop.time() - last_sent < max_delay:
+                # Newer edits are waiting: this result is already stale
+                continue
+            before, after = Counter(sent_violations), Counter(result["violations"])
+            result.update(added=list((after - before).elements()), resolved=list((before - after).elements()))
+            await websocket.send_json({"type": "result", "seq": batch[-1][0], **result})
+            sent_violations, last_sent = result["violations"], loop.time()
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        reader.cancel()
@@ -0,0 +1,219 @@
+"""
+Reverse index from component id to everything that references it: stored
+configurations (and their ConfigItem rows), examples, articles and rules.
+
+It backs the admin dry-run endpoints. Before a rule is saved or deleted, only
+configurations that reference the rule's components are evaluated, because a
+rule can only fire where its component conditions and forbid targets are
+present. Before a product is deleted, its references are plain lookups. Parsed
+ConfigStates and their aggregates are kept in the index so none of this touches
+the database or re-aggregates configurations.
+
+The index is rebuilt when the catalog version, the examples version or the
+newest configuration changes (configurations are only ever added). A rebuild
+publishes a new References object with one assignment, and every query reads it
+once.
+"""
+import threading
+from collections import defaultdict
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models import models
+from app.services import batch_validation, rule_compiler, rule_engine
+from app.services.catalog import get_catalog_version, get_examples_version
+from app.services.catalog_arrays import CatalogArrays
+
+def _token(db: Session) -> tuple:
+    return (
+        get_catalog_version(db),
+        get_examples_version(db),
+        db.query(func.max(models.Configuration.id)).scalar(),
+        db.query(func.max(models.ConfigItem.id)).scalar(),
+    )
+
+def _rule_parts(rule: dict) -> tuple[list, list]:
+    """(conditions, actions) the engine evaluates for a rule; nothing for dead rules."""
+    compiled = rule.get("compiled")
+    if compiled:
+        if compiled.get("dead"):
+            return [], []
+        return compiled["conditions"], compiled["actions"]
+    definition = rule.get("definition") or {}
+    return definition.get("conditions") or [], definition.get("actions") or []
+
+def _state_components(state: dict) -> set:
+    components = {s.get("componentId") for s in state.get("slots") or []}
+    components |= {state.get("chassisId"), state.get("psuId")}
+    components.discard(None)
+    return components
+
+class References:
+    """Everything the index knows at one token; never changed once built."""
+    __slots__ = ("token", "products", "states", "aggregates", "by_component", "items", "articles", "rules")
+
+    def __init__(self, token, products, states, aggregates, by_component, items, articles, rules):
+        self.token, self.products = token, products
+        # (source, id) -> ConfigState / its Aggregates; component id -> {(source, id)}
+        self.states, self.aggregates, self.by_component = states, aggregates, by_component
+        # product id -> {configuration id: [item ids]} / [article numbers] / [rules depending on it]
+        self.items, self.articles, self.rules = items, articles, rules
+
+    def with_token(self, token: tuple | None) -> "References":
+        return References(token, self.products, self.states, self.aggregates, self.by_component,
+                          self.items, self.articles, self.rules)
+
+class ReferenceIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.refs = References(None, {}, {}, {}, {}, {}, {}, {})
+
+    @property
+    def version(self) -> tuple | None:
+        return self.refs.token
+
+    @property
+    def products(self) -> dict:
+        return self.refs.products
+
+    def build(self, entries: list[dict], items: list[tuple], articles: list[tuple], rules: list[dict],
+              products: list[dict], token: tuple | None = None):
+        """
+        entries: batch_validation entries ({"source", "id", "config"}); unparseable ones are skipped.
+        items: (item id, configuration id, product id); articles: (article number, product id).
+        """
+        states, by_component = {}, defaultdict(set)
+        for entry in entries:
+            if "config" not in entry:
+                continue
+            key = (entry["source"], entry["id"])
+            states[key] = entry["config"]
+            for component_id in _state_components(entry["config"]):
+                by_component[component_id].add(key)
+        arrays = CatalogArrays()
+        arrays.build(products)
+        aggregates = dict(zip(states, arrays.compute_aggregates(list(states.values()))))
+        items_by_product = defaultdict(lambda: defaultdict(list))
+        for item_id, configuration_id, product_id in items:
+            items_by_product[product_id][configuration_id].append(item_id)
+        articles_by_product = defaultdict(list)
+        for article_number, product_id in articles:
+            articles_by_product[product_id].append(article_number)
+        rules_by_component = defaultdict(list)
+        for rule in rules:
+            for component_id in ((rule.get("compiled") or {}).get("deps") or {}).get("components", []):
+                rules_by_component[component_id].append(rule)
+
+        refs = References(
+            token, {p["id"]: p for p in products}, states, aggregates, by_component,
+            items_by_product, articles_by_product, rules_by_component,
+        )
+        with self._lock:
+            self.refs = refs
+
+    def rebuild(self, db: Session):
+        token = _token(db)
+        products, rules = batch_validation.load_catalog(db)
+        products_by_id = {p["id"]: p for p in products}
+        entries = batch_validation.stored_configurations(db, products_by_id) + batch_validation.example_configurations(db)
+        items = db.query(models.ConfigItem.id, models.ConfigItem.configuration_id, models.ConfigItem.product_id).all()
+        articles = db.query(models.Article.article_number, models.Article.product_id).all()
+        self.build(entries, items, articles, rules, products, token)
+
+    def ensure_fresh(self, db: Session):
+        token = self.version
+        if token is None or token != _token(db):
+            self.rebuild(db)
+
+    def invalidate(self):
+        with self._lock:
+            self.refs = self.refs.with_token(None)
+
+    def references(self, component_id: str, refs: References | None = None) -> set:
+        """(source, id) of every configuration and example that uses the component."""
+        return (refs or self.refs).by_component.get(component_id, set())
+
+    # --- Rule changes ---
+
+    def rule_candidates(self, rule: dict | None, refs: References | None = None) -> set | None:
+        """Configurations the rule can fire for, or None if that can't be narrowed down."""
+        refs = refs or self.refs
+        if rule is None:
+            return set()
+        conditions, actions = _rule_parts(rule)
+        forbids = [a for a in actions if a.get("type") == "forbid"]
+        if not conditions or not forbids:
+            return set()
+        candidates = None
+        for cond in conditions:
+            required = []
+            if cond.get("type") in ("component_selected", "adjacency"):
+                required.append(cond.get("componentId"))
+            if cond.get("type") == "adjacency" and cond.get("adjacentTo") != "system_slot":
+                required.append(cond.get("adjacentTo"))
+            for component_id in required:
+                keys = self.references(component_id, refs)
+                candidates = set(keys) if candidates is None else candidates & keys
+        if all(a.get("componentId") for a in forbids):
+            # A targeted forbid only reports when its component is present
+            targets = set().union(*(self.references(a["componentId"], refs) for a in forbids))
+            candidates = targets if candidates is None else candidates & targets
+        return candidates
+
+    def rule_impact(self, old_rule: dict | None, new_rule: dict | None) -> dict:
+        """
+        Configurations for which replacing old_rule with new_rule (None = no rule,
+        i.e. create or delete) adds violations ("invalidated") or removes all of
+        the rule's violations ("resolved"). Other rules are not re-evaluated.
+        """
+        refs = self.refs
+        old_keys, new_keys = self.rule_candidates(old_rule, refs), self.rule_candidates(new_rule, refs)
+        if old_keys is None or new_keys is None:
+            keys = list(refs.states)
+        else:
+            keys = sorted(old_keys | new_keys, key=str)
+        invalidated, resolved = [], []
+        for key in keys:
+            state, aggregates = refs.states[key], refs.aggregates[key]
+            before = rule_engine.evaluate_rule(old_rule, state, aggregates) if old_rule else []
+            after = rule_engine.evaluate_rule(new_rule, state, aggregates) if new_rule else []
+            added = [m for m in after if m not in before]
+            if added:
+                invalidated.append({"source": key[0], "id": key[1], "errors": added})
+            elif before and not after:
+                resolved.append({"source": key[0], "id": key[1], "errors": before})
+        return {"candidates": len(keys), "invalidated": invalidated, "resolved": resolved}
+
+    # --- Product deletion ---
+
+    def product_impact(self, product_id: str) -> dict:
+        """What deleting a product orphans (configurations, examples, articles) or disables (rules)."""
+        refs = self.refs
+        configurations = [
+            {"source": "configuration", "id": configuration_id, "items": item_ids}
+            for configuration_id, item_ids in sorted(refs.items.get(product_id, {}).items())
+        ]
+        examples = [
+            {"source": "example", "id": key[1]}
+            for key in sorted(self.references(product_id, refs), key=str) if key[0] == "example"
+        ]
+        remaining = set(refs.products) - {product_id}
+        rules = []
+        for rule in refs.rules.get(product_id, []):
+            try:
+                compiled = rule_compiler.compile_rule(rule_compiler.normalize_definition(rule["definition"]), remaining)
+            except rule_compiler.RuleDefinitionError:
+                continue
+            before = set((rule.get("compiled") or {}).get("warnings") or [])
+            added = [w for w in compiled["warnings"] if w not in before]
+            if added:
+                rules.append({"id": rule["id"], "description": rule.get("description"), "warnings": added})
+        return {
+            "product_id": product_id,
+            "configurations": configurations,
+            "examples": examples,
+            "articles": sorted(refs.articles.get(product_id, [])),
+            "rules": rules,
+        }
+
+reference_index = ReferenceIndex()
@@ -0,0 +1,153 @@
+"""
+Pre-encoded JSON for the catalog list routes (products, rules, articles, examples).
+
+With a response_model, FastAPI loads every row into an ORM object, validates it
+into the schema and encodes it with pydantic-core on every request. Here that
+happens once per catalog (or examples) version: each row is validated and
+encoded with the same TypeAdapter and options FastAPI uses, and the bytes are
+kept. A request only joins the cached rows for its skip/limit window, so the
+body is byte-for-byte what the response_model path returns (see
+benchmarks/serialization.py).
+
+The products list can also be narrowed to a set of columns (sparse fieldsets and
+named projections). Each field set selects only its columns in SQL and has its
+own cached encoding.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable
+from fastapi import Response
+from pydantic import TypeAdapter, create_model
+from sqlalchemy.orm import Session, defer
+from app.models import models
+from app.models.example import ExampleConfig
+from app.schemas import example as example_schemas
+from app.schemas import schemas
+from app.services.catalog import get_catalog_version, get_examples_version
+
+class EncodedList:
+    """JSON bytes of every row of one list route, valid for one data version."""
+
+    def __init__(self, schema: type, load: Callable[[Session], list], get_version: Callable[[Session], int]):
+        self.schema = schema
+        self._adapter = TypeAdapter(schema)
+        self._load = load
+        self._get_version = get_version
+        self._lock = threading.Lock()
+        self._version: int | None = None
+        self._rows: list[bytes] = []
+
+    @property
+    def version(self) -> int | None:
+        return self._version
+
+    def rebuild(self, db: Session):
+        version = self._get_version(db)
+        # Same validation and dump options as FastAPI's response_model serialization
+        rows = [
+            self._adapter.dump_json(self._adapter.validate_python(item, from_attributes=True), by_alias=True)
+            for item in self._load(db)
+        ]
+        with self._lock:
+            self._rows = rows
+            self._version = version
+
+    def ensure_fresh(self, db: Session):
+        if self._version is None or self._version != self._get_version(db):
+            self.rebuild(db)
+
+    def invalidate(self):
+        with self._lock:
+            self._version = None
+
+    def encode(self, db: Session, skip: int = 0, limit: int = 100) -> bytes:
+        """The JSON array for rows[skip:skip + limit], like .offset(skip).limit(limit)."""
+        self.ensure_fresh(db)
+        rows = self._rows
+        start = max(skip, 0)
+        # A negative LIMIT means "no limit" in SQL
+        end = start + limit if limit >= 0 else None
+        return b"[" + b",".join(rows[start:end]) + b"]"
+
+    def response(self, db: Session, skip: int = 0, limit: int = 100) -> Response:
+        return Response(content=self.encode(db, skip, limit), media_type="application/json")
+
+def _example_summaries(db: Session) -> list:
+    # Only the summary columns, as in read_example_summaries
+    names = list(example_schemas.ExampleSummary.model_fields)
+    rows = db.query(*(getattr(ExampleConfig, name) for name in names)).order_by(ExampleConfig.id)
+    return [dict(zip(names, row)) for row in rows]
+
+# The loaders return rows in the order of the routes' unordered offset/limit queries
+products_json = EncodedList(schemas.Product, lambda db: db.query(models.Product).all(), get_catalog_version)
+rules_json = EncodedList(schemas.Rule, lambda db: db.query(models.Rule).all(), get_catalog_version)
+articles_json = EncodedList(schemas.Article, lambda db: db.query(models.Article).all(), get_catalog_version)
+examples_json = EncodedList(
+    example_schemas.ExampleConfig, lambda db: db.query(ExampleConfig).options(defer(ExampleConfig.config)).all(), get_examples_version
+)
+example_summaries_json = EncodedList(example_schemas.ExampleSummary, _example_summaries, get_examples_version)
+
+# --- Product field sets ---
+
+PRODUCT_FIELDS = tuple(schemas.Product.model_fields)
+
+# Named projections of the products list; "full" is every field
+PRODUCT_PROJECTIONS = {
+    "card": ("id", "type", "name", "description", "power_watts", "width_hp", "price_1", "image_url", "eol_date"),
+    "pricing": ("id", "name", "price_1", "price_25", "price_50", "price_100", "price_250", "price_500"),
+    "full": PRODUCT_FIELDS,
+}
+
+# Encoded custom field sets kept at a time (least recently used are dropped)
+MAX_FIELDSETS = 32
+
+def product_fieldset(fields: str | None = None, projection: str | None = None) -> tuple[str, ...]:
+    """
+    Field tuple for ?fields=a,b or ?projection=name, in schema order and always
+    including id. Raises ValueError for unknown fields or projections.
+    """
+    if fields is not None and projection is not None:
+        raise ValueError("Use either fields or projection, not both")
+    if projection is not None:
+        if projection not in PRODUCT_PROJECTIONS:
+            raise ValueError(f"Unknown projection '{projection}'. Available: {', '.join(PRODUCT_PROJECTIONS)}")
+        requested = set(PRODUCT_PROJECTIONS[projection])
+    elif fields is not None:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = sorted(requested - set(PRODUCT_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown product fields: {', '.join(unknown)}")
+    else:
+        return PRODUCT_FIELDS
+    requested.add("id")
+    return tuple(f for f in PRODUCT_FIELDS if f in requested)
+
+class ProductFieldsets:
+    """EncodedList per product field set; the full set is products_json itself."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lists: OrderedDict[tuple, EncodedList] = OrderedDict()
+
+    @staticmethod
+    def _encoded_list(fields: tuple[str, ...]) -> EncodedList:
+        # Same field types as schemas.Product, so values are encoded exactly as in the full list
+        schema = create_model(
+            "ProductProjection", **{f: (schemas.Product.model_fields[f].annotation, schemas.Product.model_fields[f]) for f in fields}
+        )
+        columns = [getattr(models.Product, f) for f in fields]
+        return EncodedList(schema, lambda db: [dict(zip(fields, row)) for row in db.query(*columns)], get_catalog_version)
+
+    def get(self, fields: tuple[str, ...]) -> EncodedList:
+        if fields == PRODUCT_FIELDS:
+            return products_json
+        with self._lock:
+            encoded = self._lists.get(fields)
+            if encoded is None:
+                encoded = self._lists[fields] = self._encoded_list(fields)
+                while len(self._lists) > MAX_FIELDSETS:
+                    self._lists.popitem(last=False)
+            self._lists.move_to_end(fields)
+            return encoded
+
+product_fieldsets = ProductFieldsets()
@@ -0,0 +1,344 @@
+"""
+Static analysis and precompilation of Rule.definition, run whenever rules are saved.
+
+compile_rule() checks the grammar understood by the configurator (see
+rule_engine.CONDITIONS), normalizes operators and value types, and returns the
+compiled form stored in Rule.compiled:
+
+    {
+        "version": 1,
+        "conditions": [...],          # normalized, evaluated as-is by rule_engine
+        "actions": [...],             # only the actions that can ever match
+        "deps": {"components": [...], "properties": [...], "slots": [...]},
+        "dead": "reason" | None,      # the rule can never produce a violation
+        "warnings": [...],
+    }
+
+Grammar errors raise RuleDefinitionError. Dead rules are stored but skipped by
+the evaluator. RuleSetIndex finds identical and shadowed rules.
+"""
+import hashlib
+import json
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from app.models import models
+from app.services.rule_engine import MAX_SYSTEM_WIDTH_HP
+
+COMPILER_VERSION = 1
+
+# A CompactPCI Serial backplane has at most 84HP / 4HP slots
+MAX_SLOTS = MAX_SYSTEM_WIDTH_HP // 4
+
+OPERATOR_ALIASES = {
+    "gt": "gt", ">": "gt", "greater_than": "gt",
+    "lt": "lt", "<": "lt", "less_than": "lt",
+    "eq": "eq", "=": "eq", "==": "eq", "===": "eq", "equals": "eq",
+    "contains": "contains", "includes": "contains",
+}
+
+NUMERIC_PROPERTIES = {"slotCount", "totalWidth", "totalPower", "requiredPower"}
+PROPERTY_OPERATORS = {
+    **{prop: {"gt", "lt", "eq"} for prop in NUMERIC_PROPERTIES},
+    "chassisId": {"eq", "contains"},
+}
+
+class RuleDefinitionError(ValueError):
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+def _slot_index(value, where: str, errors: list[str]) -> int | None:
+    # 0/None mean "any slot", as in the configurator
+    if value in (None, 0, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        errors.append(f"{where}: slotIndex must be an integer, got {value!r}")
+        return None
+
+def _required_str(data: dict, key: str, where: str, errors: list[str]) -> str | None:
+    value = data.get(key)
+    if not isinstance(value, str) or not value:
+        errors.append(f"{where}: '{key}' is required")
+        return None
+    return value
+
+def _number(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else number
+
+def normalize_condition(cond, where: str, errors: list[str]) -> dict | None:
+    if not isinstance(cond, dict):
+        errors.append(f"{where}: must be an object")
+        return None
+    cond_type = cond.get("type")
+    if cond_type == "component_selected":
+        normalized = {"type": cond_type, "componentId": _required_str(cond, "componentId", where, errors)}
+        slot = _slot_index(cond.get("slotIndex"), where, errors)
+        if slot is not None:
+            normalized["slotIndex"] = slot
+        return normalized
+    if cond_type == "system_property":
+        prop = cond.get("property")
+        if prop not in PROPERTY_OPERATORS:
+            errors.append(f"{where}: unknown property {prop!r}")
+            return None
+        operator = OPERATOR_ALIASES.get(str(cond.get("operator")).lower())
+        if operator not in PROPERTY_OPERATORS[prop]:
+            errors.append(f"{where}: operator {cond.get('operator')!r} is not valid for {prop}")
+            return None
+        value = cond.get("value")
+        if prop in NUMERIC_PROPERTIES:
+            value = _number(value)
+            if value is None:
+                errors.append(f"{where}: {prop} needs a numeric value, got {cond.get('value')!r}")
+                return None
+        elif not isinstance(value, str) or not value:
+            errors.append(f"{where}: {prop} needs a string value")
+            return None
+        return {"type": cond_type, "property": prop, "operator": operator, "value": value}
+    if cond_type == "adjacency":
+        return {
+            "type": cond_type,
+            "componentId": _required_str(cond, "componentId", where, errors),
+            "adjacentTo": _required_str(cond, "adjacentTo", where, errors),
+        }
+    if cond_type == "option_not_selected":
+        return {
+            "type": cond_type,
+            "componentType": _required_str(cond, "componentType", where, errors),
+            "optionId": _required_str(cond, "optionId", where, errors),
+            "value": cond.get("value", True),
+        }
+    errors.append(f"{where}: unknown condition type {cond_type!r}")
+    return None
+
+def normalize_action(action, where: str, errors: list[str]) -> dict | None:
+    if not isinstance(action, dict):
+        errors.append(f"{where}: must be an object")
+        return None
+    if action.get("type") != "forbid":
+        errors.append(f"{where}: unknown action type {action.get('type')!r}")
+        return None
+    normalized = {"type": "forbid"}
+    if action.get("componentId"):
+        normalized["componentId"] = str(action["componentId"])
+    slot = _slot_index(action.get("slotIndex"), where, errors)
+    if slot is not None:
+        if "componentId" not in normalized:
+            errors.append(f"{where}: slotIndex needs a componentId")
+        normalized["slotIndex"] = slot
+    if action.get("message"):
+        normalized["message"] = str(action["message"])
+    return normalized
+
+def normalize_definition(definition) -> dict:
+    """The definition with normalized conditions/actions; raises RuleDefinitionError."""
+    errors = []
+    if not isinstance(definition, dict):
+        raise RuleDefinitionError(["definition must be an object"])
+    conditions = definition.get("conditions")
+    actions = definition.get("actions")
+    if not isinstance(conditions, list) or not conditions:
+        errors.append("definition.conditions must be a non-empty list")
+        conditions = []
+    if not isinstance(actions, list) or not actions:
+        errors.append("definition.actions must be a non-empty list")
+        actions = []
+    normalized = {
+        "conditions": [normalize_condition(c, f"conditions[{i}]", errors) for i, c in enumerate(conditions)],
+        "actions": [normalize_action(a, f"actions[{i}]", errors) for i, a in enumerate(actions)],
+    }
+    if errors:
+        raise RuleDefinitionError(errors)
+    return normalized
+
+def fingerprint(definition: dict) -> str:
+    """Stable hash of a normalized definition; identical rules share it."""
+    canonical = json.dumps(definition, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode()).hexdigest()
+
+def _condition_dead_reason(cond: dict, product_ids: set[str]) -> str | None:
+    if cond["type"] in ("component_selected", "adjacency") and cond["componentId"] not in product_ids:
+        return f"unknown component {cond['componentId']}"
+    if cond["type"] == "component_selected" and not 1 <= cond.get("slotIndex", 1) <= MAX_SLOTS:
+        return f"slot {cond['slotIndex']} does not exist (max {MAX_SLOTS})"
+    if cond["type"] == "adjacency" and cond["adjacentTo"] != "system_slot" and cond["adjacentTo"] not in product_ids:
+        return f"unknown component {cond['adjacentTo']}"
+    if cond["type"] == "option_not_selected" and cond["componentType"] != "chassis":
+        return "only chassis options are evaluated"
+    if cond["type"] == "system_property" and cond["property"] == "slotCount":
+        op, value = cond["operator"], cond["value"]
+        if (op == "gt" and value >= MAX_SLOTS) or (op == "lt" and value <= 1) or (op == "eq" and not 1 <= value <= MAX_SLOTS):
+            return f"slotCount {op} {value} is impossible"
+    return None
+
+def _action_dead_reason(action: dict, product_ids: set[str]) -> str | None:
+    if "componentId" in action and action["componentId"] not in product_ids:
+        return f"unknown component {action['componentId']}"
+    if not 1 <= action.get("slotIndex", 1) <= MAX_SLOTS:
+        return f"slot {action['slotIndex']} does not exist (max {MAX_SLOTS})"
+    return None
+
+def compile_rule(definition: dict, product_ids: set[str]) -> dict:
+    """Compile a normalized definition against the current product ids."""
+    warnings = []
+    dead = None
+    for cond in definition["conditions"]:
+        reason = _condition_dead_reason(cond, product_ids)
+        if reason:
+            dead = dead or f"condition can never match: {reason}"
+    actions = []
+    for action in definition["actions"]:
+        reason = _action_dead_reason(action, product_ids)
+        if reason:
+            warnings.append(f"action can never match: {reason}")
+        else:
+            actions.append(action)
+    if not actions:
+        dead = dead or "no action can ever match"
+    if dead:
+        warnings.insert(0, f"Rule never fires: {dead}")
+
+    components, properties, slots = set(), set(), set()
+    for item in definition["conditions"] + definition["actions"]:
+        for key in ("componentId", "adjacentTo"):
+            if item.get(key) and item[key] != "system_slot":
+                components.add(item[key])
+        if item.get("property"):
+            properties.add(item["property"])
+        if item.get("slotIndex"):
+            slots.add(item["slotIndex"])
+    return {
+        "version": COMPILER_VERSION,
+        "conditions": definition["conditions"],
+        "actions": actions,
+        "deps": {"components": sorted(components), "properties": sorted(properties), "slots": sorted(slots)},
+        "dead": dead,
+        "warnings": warnings,
+    }
+
+def _key(item: dict) -> str:
+    return json.dumps(item, sort_keys=True)
+
+class RuleSetIndex:
+    """
+    Fingerprints and condition postings of the live rules, to find duplicates and shadowing.
+
+    Rule A shadows rule B when A's conditions are a subset of B's and B's actions
+    a subset of A's: whenever B fires, A already reports the same violations.
+    Duplicates are identical definitions in the same category: the same rule in
+    another category is legitimate, since categories can be ignored separately.
+    """
+
+    def __init__(self):
+        self._by_fingerprint: dict[tuple[str, str | None], int] = {}
+        self._fingerprints: dict[int, tuple[str, str | None]] = {}
+        self._by_condition: dict[str, set[int]] = defaultdict(set)
+        self._entries: dict[int, tuple[frozenset, frozenset]] = {}
+
+    def add(self, rule_id: int, rule_fingerprint: str | None, compiled: dict | None, category: str | None = None):
+        if rule_fingerprint:
+            key = (rule_fingerprint, category or None)
+            self._by_fingerprint.setdefault(key, rule_id)
+            self._fingerprints[rule_id] = key
+        if not compiled or compiled.get("dead"):
+            return
+        conditions = frozenset(_key(c) for c in compiled["conditions"])
+        actions = frozenset(_key(a) for a in compiled["actions"])
+        self._entries[rule_id] = (conditions, actions)
+        for cond in conditions:
+            self._by_condition[cond].add(rule_id)
+
+    def remove(self, rule_id: int):
+        entry = self._entries.pop(rule_id, None)
+        if entry:
+            for cond in entry[0]:
+                self._by_condition[cond].discard(rule_id)
+        key = self._fingerprints.pop(rule_id, None)
+        if key and self._by_fingerprint.get(key) == rule_id:
+            del self._by_fingerprint[key]
+
+    def duplicate_of(self, rule_fingerprint: str, category: str | None = None) -> int | None:
+        return self._by_fingerprint.get((rule_fingerprint, category or None))
+
+    def shadow_warnings(self, compiled: dict) -> list[str]:
+        if compiled.get("dead"):
+            return []
+        conditions = frozenset(_key(c) for c in compiled["conditions"])
+        actions = frozenset(_key(a) for a in compiled["actions"])
+        warnings = []
+        candidates = set().union(*(self._by_condition.get(c, ()) for c in conditions))
+        for rule_id in sorted(candidates):
+            other_conditions, other_actions = self._entries[rule_id]
+            if other_conditions <= conditions and actions <= other_actions:
+                warnings.append(f"Shadowed by rule {rule_id}: it already fires whenever this rule does")
+        supersets = set.intersection(*(self._by_condition.get(c, set()) for c in conditions))
+        for rule_id in sorted(supersets):
+            other_conditions, other_actions = self._entries[rule_id]
+            if other_actions <= actions and not (other_conditions <= conditions and actions <= other_actions):
+                warnings.append(f"Shadows rule {rule_id}: that rule adds nothing while this one exists")
+        return warnings
+
+    @classmethod
+    def from_db(cls, db: Session, exclude_id: int | None = None) -> "RuleSetIndex":
+        index = cls()
+        rows = db.query(models.Rule.id, models.Rule.fingerprint, models.Rule.compiled, models.Rule.category)
+        for rule_id, rule_fingerprint, compiled, category in rows:
+            if rule_id != exclude_id:
+                index.add(rule_id, rule_fingerprint, compiled, category)
+        return index
+
+def product_ids(db: Session) -> set[str]:
+    return {row[0] for row in db.query(models.Product.id)}
+
+def prepare_rule(definition, known_products: set[str], index: RuleSetIndex) -> tuple[dict, str, dict]:
+    """
+    Normalize and compile a definition for saving: returns (definition, fingerprint, compiled).
+    Raises RuleDefinitionError for grammar errors; duplicates are left to the caller.
+    """
+    normalized = normalize_definition(definition)
+    compiled = compile_rule(normalized, known_products)
+    compiled["warnings"] += index.shadow_warnings(compiled)
+    return normalized, fingerprint(normalized), compiled
+
+def recompile_rules(db: Session, component_ids: set[str] | None = None) -> list[int]:
+    """
+    Recompile stored rules after the product set changed. With component_ids, only
+    rules that depend on those products (or were never compiled) are touched.
+    Returns the ids of the rules updated; the caller commits.
+    """
+    known_products = product_ids(db)
+    index = RuleSetIndex.from_db(db)
+    updated = []
+    for rule in db.query(models.Rule):
+        if component_ids is not None and rule.compiled and rule.compiled.get("version") == COMPILER_VERSION:
+            if not component_ids & set(rule.compiled["deps"]["components"]):
+                continue
+        try:
+            normalized = normalize_definition(rule.definition)
+        except RuleDefinitionError as e:
+            # Saved before compilation existed: keep it, but never evaluate it
+            rule.compiled = compile_rule({"conditions": [], "actions": []}, known_products)
+            rule.compiled["dead"] = f"invalid definition: {e}"
+            rule.compiled["warnings"] = [f"Rule never fires: invalid definition: {e}"]
+            rule.fingerprint = None
+            updated.append(rule.id)
+            continue
+        index.remove(rule.id)
+        compiled = compile_rule(normalized, known_products)
+        compiled["warnings"] += index.shadow_warnings(compiled)
+        rule.definition = normalized
+        rule.fingerprint = fingerprint(normalized)
+        rule.compiled = compiled
+        index.add(rule.id, rule.fingerprint, compiled, rule.category)
+        updated.append(rule.id)
+    return updated
@@ -0,0 +1,400 @@
+"""
+Server-side port of the configurator's rule evaluation (configStore.ts
+validateRules / getRemainingInterfaces) and the quote page's tier pricing.
+
+All functions are pure: a configuration is the ConfigState shape used by the
+frontend (slots, slotCount, chassisId, chassisOptions, psuId, psuOptions) and
+products are passed as a dict of product id -> product dict with the API's
+snake_case fields. Messages match the ones produced by the frontend.
+"""
+import math
+from dataclasses import dataclass, field
+
+# Hard limit of a CompactPCI Serial backplane
+MAX_SYSTEM_WIDTH_HP = 84
+
+@dataclass
+class Aggregates:
+    total_power: float = 0
+    required_power: int = 0
+    used_width: int = 0
+    backplane_width: int = 0
+    remaining_interfaces: dict = field(default_factory=dict)
+
+def find_option(product: dict, option_id: str) -> dict | None:
+    for opt in product.get("options") or []:
+        if opt.get("id") == option_id:
+            return opt
+    return None
+
+def find_choice(option: dict, value) -> dict | None:
+    for choice in option.get("choices") or []:
+        if choice.get("value") == value:
+            return choice
+    return None
+
+def validate_options(option_defs: list | None, selected_options: dict) -> str | None:
+    """Return an error message if selected_options do not fit a product's option definitions."""
+    if not option_defs:
+        return None
+    for opt_id, opt_val in selected_options.items():
+        opt_def = next((o for o in option_defs if o.get("id") == opt_id), None)
+        if not opt_def:
+            # Option not found in product - Strict Mode for data integrity
+            return f"Invalid option ID: {opt_id}"
+        if opt_def["type"] == "select":
+            valid_values = [c["value"] for c in opt_def["choices"]]
+            if opt_val not in valid_values:
+                return f"Invalid value '{opt_val}' for option '{opt_id}'. Valid values: {valid_values}"
+        # Boolean/Text validation can be added here
+    return None
+
+def slot_error(slot) -> str | None:
+    """Return an error message if a slot is not shaped like the store's slots."""
+    if not isinstance(slot, dict):
+        return "Every slot must be an object"
+    if "id" in slot and (isinstance(slot["id"], bool) or not isinstance(slot["id"], (int, type(None)))):
+        return "A slot id must be an integer"
+    for key in ("type", "componentId"):
+        if not isinstance(slot.get(key), (str, type(None))):
+            return f"A slot's {key} must be a string or null"
+    if not isinstance(slot.get("selectedOptions"), (dict, type(None))):
+        return "A slot's selectedOptions must be an object"
+    return None
+
+def state_error(state) -> str | None:
+    """Return an error message if a configuration is not shaped like a ConfigState (missing fields are fine)."""
+    if not isinstance(state, dict):
+        return "The configuration must be an object"
+    if not isinstance(state.get("slots"), (list, type(None))):
+        return "slots must be a list"
+    for slot in state.get("slots") or []:
+        error = slot_error(slot)
+        if error:
+            return error
+    count = state.get("slotCount")
+    if count is not None and (isinstance(count, bool) or not isinstance(count, int) or count < 0):
+        return "slotCount must be an integer >= 0"
+    for key in ("chassisId", "psuId"):
+        if not isinstance(state.get(key), (str, type(None))):
+            return f"{key} must be a string or null"
+    for key in ("chassisOptions", "psuOptions"):
+        if not isinstance(state.get(key), (dict, type(None))):
+            return f"{key} must be an object"
+    return None
+
+# --- Aggregates ---
+
+def remaining_interfaces(state: dict, products: dict) -> dict:
+    """CPU interface capacity minus what the peripherals consume (getRemainingInterfaces)."""
+    slots = state.get("slots") or []
+    system_slot = next((s for s in slots if s.get("type") == "system"), None)
+    if not system_slot or not system_slot.get("componentId"):
+        return {}
+    cpu = products.get(system_slot["componentId"])
+    if not cpu or not cpu.get("interfaces"):
+        return {}
+
+    remaining = {key: float(val) for key, val in cpu["interfaces"].items()}
+    for slot in slots:
+        if slot.get("type") == "peripheral" and slot.get("componentId") and not slot.get("blockedBy"):
+            product = products.get(slot["componentId"])
+            if product and product.get("interfaces"):
+                for key, val in product["interfaces"].items():
+                    if key in remaining:
+                        remaining[key] -= float(val)
+    return remaining
+
+def item_power(product: dict, selected_options: dict | None) -> float:
+    power = product.get("power_watts") or 0
+    if product.get("options") and selected_options:
+        for opt_id, opt_val in selected_options.items():
+            opt_def = find_option(product, opt_id)
+            if not opt_def:
+                continue
+            if opt_def.get("type") == "select":
+                choice = find_choice(opt_def, opt_val)
+                if choice and choice.get("powerMod"):
+                    power += choice["powerMod"]
+            elif opt_def.get("type") == "boolean" and opt_val is True:
+                if opt_def.get("powerMod"):
+                    power += opt_def["powerMod"]
+    return power
+
+def item_width(product: dict, selected_options: dict | None) -> int:
+    width = product.get("width_hp") or 4
+    if selected_options and product.get("options"):
+        for opt in product["options"]:
+            val = selected_options.get(opt.get("id"))
+            if val:
+                choice = find_choice(opt, val)
+                if choice and choice.get("widthMod"):
+                    width += choice["widthMod"]
+    return width
+
+def total_power(state: dict, products: dict) -> float:
+    total = 0
+    for slot in state.get("slots") or []:
+        if not slot.get("componentId") or slot.get("blockedBy") or slot.get("type") == "psu":
+            continue
+        product = products.get(slot["componentId"])
+        if not product:
+            continue
+        # PSUs have negative power (they supply it)
+        if (product.get("power_watts") or 0) < 0:
+            continue
+        total += item_power(product, slot.get("selectedOptions"))
+    return total
+
+def used_width(state: dict, products: dict) -> int:
+    slots = state.get("slots") or []
+    width = 0
+    for slot in slots:
+        if not slot.get("componentId") or slot.get("blockedBy"):
+            continue
+        product = products.get(slot["componentId"])
+        # Unknown products still occupy a default 4HP slot
+        width += item_width(product, slot.get("selectedOptions")) if product else 4
+
+    psu_id = state.get("psuId")
+    if psu_id:
+        # Pluggable PSUs already sit in the slots
+        is_pluggable = any(s.get("type") == "psu" and s.get("componentId") == psu_id for s in slots)
+        if not is_pluggable:
+            psu = products.get(psu_id)
+            if psu:
+                width += psu.get("width_hp") or 0
+    return width
+
+def compute_aggregates(state: dict, products: dict) -> Aggregates:
+    power = total_power(state, products)
+    return Aggregates(
+        total_power=power,
+        required_power=math.ceil(power * 1.2),
+        used_width=used_width(state, products),
+        backplane_width=(state.get("slotCount") or 0) * 4,
+        remaining_interfaces=remaining_interfaces(state, products),
+    )
+
+# --- Pricing ---
+
+PRICE_TIERS = (500, 250, 100, 50, 25)
+
+def tier_price(product: dict, qty: int) -> float:
+    """Unit price for an order quantity (getPriceForQuantity on the quote page)."""
+    for tier in PRICE_TIERS:
+        if qty >= tier:
+            return product.get(f"price_{tier}") or product.get("price_1") or 0
+    return product.get("price_1") or 0
+
+def option_price(price_mod, qty: int) -> float:
+    if isinstance(price_mod, (int, float)):
+        return price_mod
+    if not price_mod:
+        return 0
+    for tier in PRICE_TIERS:
+        if qty >= tier:
+            return price_mod.get(str(tier)) or price_mod.get("1") or 0
+    return price_mod.get("1") or 0
+
+def item_unit_price(product: dict, selected_options: dict | None, qty: int) -> float:
+    price = tier_price(product, qty)
+    if product.get("options") and selected_options:
+        for opt_id, opt_val in selected_options.items():
+            opt_def = find_option(product, opt_id)
+            if not opt_def:
+                continue
+            if opt_def.get("type") == "select":
+                choice = find_choice(opt_def, opt_val)
+                if choice:
+                    price += option_price(choice.get("priceMod"), qty)
+            elif opt_def.get("type") == "boolean" and opt_val is True:
+                price += option_price(opt_def.get("priceMod"), qty)
+    return price
+
+# Product the quote page puts into empty peripheral slots
+FILLER_PRODUCT_ID = "FILLER_4HP"
+
+def system_unit_price(state: dict, products: dict, qty: int) -> float:
+    """Unit price of the whole system at the tier for qty, itemized like the quote page."""
+    price = 0
+    filler = products.get(FILLER_PRODUCT_ID)
+    slots = state.get("slots") or []
+    for slot in slots:
+        if slot.get("blockedBy"):
+            continue
+        if slot.get("componentId"):
+            product = products.get(slot["componentId"])
+            if product:
+                price += item_unit_price(product, slot.get("selectedOptions"), qty)
+        elif slot.get("type") == "peripheral" and filler:
+            price += item_unit_price(filler, None, qty)
+    chassis = products.get(state.get("chassisId")) if state.get("chassisId") else None
+    if chassis:
+        price += item_unit_price(chassis, state.get("chassisOptions"), qty)
+    psu_id = state.get("psuId")
+    if psu_id and not any(s.get("type") == "psu" and s.get("componentId") == psu_id for s in slots):
+        psu = products.get(psu_id)
+        if psu:
+            price += item_unit_price(psu, state.get("psuOptions"), qty)
+    return price
+
+# --- Rules ---
+
+def _compare(operator: str, actual, expected) -> bool:
+    if operator == "eq":
+        return actual == expected
+    try:
+        if operator == "gt":
+            return actual > expected
+        if operator == "lt":
+            return actual < expected
+    except TypeError:
+        # e.g. a rule comparing against a missing value; JS comparisons are just false
+        return False
+    return False
+
+def _slot_by_id(slots: list, slot_id) -> dict | None:
+    return next((s for s in slots if s.get("id") == slot_id), None)
+
+def condition_component_selected(cond: dict, state: dict, aggregates: Aggregates) -> bool:
+    slots = state.get("slots") or []
+    if cond.get("slotIndex"):
+        slot = _slot_by_id(slots, cond["slotIndex"])
+        return bool(slot) and slot.get("componentId") == cond.get("componentId")
+    return any(s.get("componentId") == cond.get("componentId") for s in slots)
+
+def condition_system_property(cond: dict, state: dict, aggregates: Aggregates) -> bool:
+    prop = cond.get("property")
+    operator = cond.get("operator")
+    if prop == "slotCount":
+        return _compare(operator, state.get("slotCount") or 0, cond.get("value"))
+    if prop == "totalWidth":
+        return _compare(operator, aggregates.used_width, cond.get("value"))
+    if prop == "totalPower":
+        return _compare(operator, aggregates.total_power, cond.get("value"))
+    if prop == "requiredPower":
+        return _compare(operator, aggregates.required_power, cond.get("value"))
+    if prop == "chassisId":
+        chassis_id = state.get("chassisId")
+        if operator == "eq":
+            return chassis_id == cond.get("value")
+        if operator == "contains" and chassis_id:
+            return str(cond.get("value")) in chassis_id
+    return False
+
+def condition_adjacency(cond: dict, state: dict, aggregates: Aggregates) -> bool:
+    slots = state.get("slots") or []
+    target = cond.get("componentId")
+    adjacent_to = cond.get("adjacentTo")  # 'system_slot' or a componentId
+    for index, slot in enumerate(slots):
+        if slot.get("componentId") != target:
+            continue
+        neighbors = slots[max(index - 1, 0):index] + slots[index + 1:index + 2]
+        if adjacent_to == "system_slot":
+            if any(n.get("type") == "system" for n in neighbors):
+                return True
+        elif any(n.get("componentId") == adjacent_to for n in neighbors):
+            return True
+    return False
+
+def condition_option_not_selected(cond: dict, state: dict, aggregates: Aggregates) -> bool:
+    # Currently only chassis options are supported, as in the configurator
+    if cond.get("componentType") != "chassis":
+        return False
+    if not state.get("chassisId"):
+        # No chassis yet: don't block component selection
+        return False
+    val = (state.get("chassisOptions") or {}).get(cond.get("optionId"))
+    if cond.get("value") is True:
+        return not val
+    return val != cond.get("value")
+
+CONDITIONS = {
+    "component_selected": condition_component_selected,
+    "system_property": condition_system_property,
+    "adjacency": condition_adjacency,
+    "option_not_selected": condition_option_not_selected,
+}
+
+def evaluate_condition(cond: dict, state: dict, aggregates: Aggregates) -> bool:
+    handler = CONDITIONS.get(cond.get("type"))
+    return handler(cond, state, aggregates) if handler else False
+
+def apply_actions(actions: list, description: str | None, state: dict) -> list[str]:
+    """Violations raised by a rule whose conditions are met."""
+    violations = []
+    slots = state.get("slots") or []
+    for action in actions:
+        if action.get("type") != "forbid":
+            continue
+        message = action.get("message") or description
+        component_id = action.get("componentId")
+        if not component_id:
+            # Generic forbid: the state itself is not allowed
+            violations.append(message)
+        elif action.get("slotIndex"):
+            slot = _slot_by_id(slots, action["slotIndex"])
+            if slot and slot.get("componentId") == component_id:
+                violations.append(message)
+        else:
+            if any(s.get("componentId") == component_id for s in slots):
+                violations.append(message)
+            if state.get("chassisId") == component_id:
+                violations.append(message)
+            if state.get("psuId") == component_id:
+                violations.append(message)
+    return violations
+
+def evaluate_rule(rule: dict, state: dict, aggregates: Aggregates) -> list[str]:
+    """
+    Uses the compiled form from rule_compiler when present (normalized, dead
+    actions removed) and falls back to the raw definition for rules saved before.
+    """
+    compiled = rule.get("compiled")
+    if compiled:
+        if compiled.get("dead"):
+            return []
+        conditions, actions = compiled["conditions"], compiled["actions"]
+    else:
+        definition = rule.get("definition") or {}
+        conditions, actions = definition.get("conditions"), definition.get("actions")
+        if not conditions or not actions:
+            return []
+    if all(evaluate_condition(cond, state, aggregates) for cond in conditions):
+        return apply_actions(actions, rule.get("description"), state)
+    return []
+
+def check_limits(state: dict, products: dict, aggregates: Aggregates) -> list[str]:
+    """Interface capacity and width checks that run before the rules."""
+    violations = []
+    for key, val in aggregates.remaining_interfaces.items():
+        if val < 0:
+            violations.append(f"Insufficient {key} interfaces. (Overrun by {abs(val):g})")
+
+    if aggregates.used_width > MAX_SYSTEM_WIDTH_HP:
+        violations.append(f"Configuration used width ({aggregates.used_width}HP) exceeds the maximum system limit of {MAX_SYSTEM_WIDTH_HP}HP.")
+    if aggregates.backplane_width > MAX_SYSTEM_WIDTH_HP:
+        violations.append(f"Backplane size ({aggregates.backplane_width}HP) exceeds the maximum system limit of {MAX_SYSTEM_WIDTH_HP}HP.")
+
+    chassis = products.get(state.get("chassisId")) if state.get("chassisId") else None
+    if chassis and chassis.get("width_hp"):
+        if aggregates.backplane_width > chassis["width_hp"]:
+            violations.append(f"Backplane size ({aggregates.backplane_width}HP) exceeds chassis capacity ({chassis['width_hp']}HP).")
+        if aggregates.used_width > aggregates.backplane_width:
+            violations.append(f"Total used width ({aggregates.used_width}HP) exceeds backplane capacity ({aggregates.backplane_width}HP).")
+    return violations
+
+def validate_config(state: dict, products: dict, rules: list[dict], ignore_categories: list[str] | None = None,
+                    aggregates: Aggregates | None = None) -> list[str]:
+    """
+    All violations for a configuration, in the same order as the configurator's validateRules.
+    Pass aggregates when they were already computed for a batch (see catalog_arrays).
+    """
+    aggregates = aggregates or compute_aggregates(state, products)
+    violations = check_limits(state, products, aggregates)
+    for rule in rules:
+        if ignore_categories and rule.get("category") in ignore_categories:
+            continue
+        violations.extend(evaluate_rule(rule, state, aggregates))
+    return violations
@@ -0,0 +1,96 @@
+"""
+Slot feasibility: bitset engine (app/services/feasibility.py) vs. the straightforward
+evaluator that places every candidate and runs every rule through rule_engine.
+
+    python -m benchmarks.feasibility --products 1000 --rules 10000
+
+Both must agree on the forbidden set for every scanned slot; a mismatch exits with 1.
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+
+from app.services import rule_engine
+from app.services.feasibility import FeasibilityEngine
+from benchmarks import synthetic
+
+def involves_candidate(rule: dict, state: dict, slot: int, product_id: str) -> bool:
+    """Does the rule fire with the candidate placed and report a violation the candidate is part of?"""
+    definition = rule["definition"]
+    cond = definition["conditions"][0]
+    if not rule_engine.evaluate_condition(cond, state, rule_engine.Aggregates()):
+        return False
+    triggers = cond["componentId"] == product_id and cond.get("slotIndex") in (None, 0, slot)
+    for action in definition["actions"]:
+        if not rule_engine.apply_actions([action], rule["description"], state):
+            continue
+        targeted = action.get("componentId") == product_id and action.get("slotIndex") in (None, 0, slot)
+        if triggers or targeted:
+            return True
+    return False
+
+def evaluator_forbidden(state: dict, slot: int, product_ids: list[str], rules: list[dict]) -> set[str]:
+    forbidden = set()
+    for product_id in product_ids:
+        candidate = {
+            **state,
+            "slots": [dict(s, componentId=product_id, selectedOptions={}) if s["id"] == slot else s for s in state["slots"]],
+        }
+        if any(involves_candidate(rule, candidate, slot, product_id) for rule in rules):
+            forbidden.add(product_id)
+    return forbidden
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--rules", type=int, default=10000)
+    parser.add_argument("--configs", type=int, default=2, help="configurations to scan")
+    parser.add_argument("--slots", type=int, default=3, help="slots scanned per configuration")
+    parser.add_argument("--any-slot", type=float, default=0.3, help="share of rules without slotIndex")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    products = synthetic.generate_products(args.products, seed=args.seed)
+    rules = synthetic.generate_rules(args.rules, products, seed=args.seed, mix={"component_selected": 1.0})
+    # Exercise the "any slot" paths too
+    for rule in rules:
+        if rng.random() < args.any_slot:
+            rule["definition"]["conditions"][0].pop("slotIndex")
+        if rng.random() < args.any_slot:
+            rule["definition"]["actions"][0].pop("slotIndex")
+    product_ids = sorted(p["id"] for p in products)
+    configs = [synthetic.generate_configuration(products, rng) for _ in range(args.configs)]
+
+    start = time.perf_counter()
+    engine = FeasibilityEngine()
+    engine.build(product_ids, rules)
+    print(f"bitset build: {(time.perf_counter() - start) * 1000:.1f}ms "
+          f"({len(engine.tables.forward_keys)} forward rows, {len(engine.tables.reverse_keys)} reverse rows)")
+
+    bitset_times, evaluator_times, mismatches, forbidden = [], [], 0, 0
+    for config in configs:
+        for slot in config["slots"][:args.slots]:
+            start = time.perf_counter()
+            fast = set(engine.forbidden_products(config, slot["id"]))
+            bitset_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            slow = evaluator_forbidden(config, slot["id"], product_ids, rules)
+            evaluator_times.append(time.perf_counter() - start)
+            forbidden += len(slow)
+            if fast != slow:
+                mismatches += 1
+                print(f"MISMATCH slot {slot['id']}: bitset-only {sorted(fast - slow)[:5]} evaluator-only {sorted(slow - fast)[:5]}")
+
+    bitset_ms = statistics.mean(bitset_times) * 1000
+    evaluator_ms = statistics.mean(evaluator_times) * 1000
+    print(f"{len(bitset_times)} slot scans over {args.products} products / {args.rules} rules, {forbidden} forbidden placements, {mismatches} mismatches")
+    print(f"  bitset    mean={bitset_ms:10.3f}ms")
+    print(f"  evaluator mean={evaluator_ms:10.3f}ms  ({evaluator_ms / bitset_ms:.0f}x slower)")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""
+Reproducible HTTP load test for the FastAPI backend.
+
+Seeds synthetic catalogs (see synthetic.py) into one SQLite file per scale,
+then drives the app either in-process (httpx ASGI transport) or through a real
+uvicorn server, and reports p50/p95/p99 latency and throughput per scenario.
+
+    python -m benchmarks.load_test run --scales 100,1000 --output bench.json
+    python -m benchmarks.load_test run --compare baseline.json
+    python -m benchmarks.load_test compare baseline.json bench.json
+    python -m benchmarks.load_test replay synthetic/sessions.ndjson --base-url http://localhost:8000
+
+Run from the backend directory. Exit code 1 means a regression was flagged.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ADMIN_HEADERS = {"Authorization": "Bearer valid-admin-token"}
+
+DEFAULT_SCALES = [100, 1000, 10000, 100000]
+DEFAULT_RULES = 10000
+# Relative slowdown (p95) or throughput drop that counts as a regression
+DEFAULT_THRESHOLD = 0.15
+
+def build_workload(workdir: Path, scale: int, rule_count: int, seed: int, reseed: bool = False) -> tuple[str, dict]:
+    """Seed bench_<scale>.db (once) and return its URL plus the request payloads used by the scenarios."""
+    from benchmarks import synthetic
+
+    db_path = workdir / f"bench_{scale}.db"
+    payload_path = workdir / f"bench_{scale}.payloads.json"
+    database_url = f"sqlite:///{db_path}"
+    if db_path.exists() and payload_path.exists() and not reseed:
+        return database_url, json.loads(payload_path.read_text())
+
+    db_path.unlink(missing_ok=True)
+    products = synthetic.generate_products(scale, seed=seed)
+    rules = synthetic.generate_rules(rule_count, products, seed=seed)
+    articles = synthetic.generate_articles(scale, products, seed=seed)
+    synthetic.seed_database(database_url, products, rules, articles)
+
+    rng = random.Random(seed)
+    config = synthetic.generate_configuration(products, rng)
+    payloads = {
+        "scale": scale,
+        "rules": rule_count,
+        "validate": [
+            {"product_id": s["componentId"], "slot_position": s["id"], "sub_options": s["selectedOptions"]}
+            for s in config["slots"] if s["componentId"]
+        ],
+        "import_products": rng.sample(products, min(100, len(products))),
+        "import_articles": [
+            {"article_number": f"BENCH-{i:04d}", **{k: a[k] for k in ("product_id", "selected_options")}}
+            for i, a in enumerate(rng.sample(articles, min(100, len(articles))))
+        ],
+        "quote": synthetic.quote_payload(config),
+    }
+    payload_path.write_text(json.dumps(payloads))
+    return database_url, payloads
+
+def scenarios(payloads: dict) -> list[tuple[str, str, str, dict, int]]:
+    """(name, method, path, request kwargs, weight). Heavy full-catalog requests get a lower weight."""
+    scale = payloads["scale"]
+    return [
+        ("catalog_products_page", "GET", "/api/admin/products/", {}, 10),
+        ("catalog_products_all", "GET", f"/api/admin/products/?limit={scale}", {}, 1),
+        ("catalog_rules", "GET", f"/api/admin/rules/?limit={payloads['rules']}", {}, 1),
+        ("catalog_articles", "GET", "/api/articles/export", {}, 1),
+        ("validate", "POST", "/api/config/validate/", {"json": payloads["validate"]}, 10),
+        ("export_products", "GET", "/api/admin/products/export", {"headers": ADMIN_HEADERS}, 1),
+        ("import_products", "POST", "/api/admin/products/import", {"json": payloads["import_products"], "headers": ADMIN_HEADERS}, 2),
+        ("import_articles", "POST", "/api/articles/import", {"json": payloads["import_articles"]}, 2),
+        ("quote", "POST", "/api/config/quote", {"json": payloads["quote"]}, 10),
+    ]
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+async def run_scenario(client: httpx.AsyncClient, method: str, path: str, kwargs: dict, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    # One warm-up request so lazy caches don't skew the first sample
+    try:
+        await client.request(method, path, **kwargs)
+    except httpx.HTTPError:
+        pass
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+    }
+
+async def run_all(client: httpx.AsyncClient, payloads: dict, requests: int, concurrency: int, only: set[str] | None) -> dict:
+    results = {}
+    for name, method, path, kwargs, weight in scenarios(payloads):
+        if only and name not in only:
+            continue
+        count = max(3, requests * weight // 10)
+        results[name] = await run_scenario(client, method, path, kwargs, count, concurrency)
+        print(f"  {name:24s} p50={results[name]['p50_ms']:9.2f}ms p95={results[name]['p95_ms']:9.2f}ms "
+              f"rps={results[name]['throughput_rps']:8.1f} errors={results[name]['errors']}", file=sys.stderr)
+    return results
+
+def run_inprocess(database_url: str, payload_path: Path, requests: int, concurrency: int, only: set[str] | None) -> dict:
+    """Run in a child process so the app's engine binds to this scale's database."""
+    env = {**os.environ, "DATABASE_URL": database_url, "REQUEST_TIMING": "false"}
+    cmd = [
+        sys.executable, "-m", "benchmarks.load_test", "_inprocess",
+        "--payloads", str(payload_path), "--requests", str(requests), "--concurrency", str(concurrency),
+    ]
+    if only:
+        cmd += ["--only", ",".join(sorted(only))]
+    output = subprocess.run(cmd, env=env, cwd=BACKEND_DIR, check=True, stdout=subprocess.PIPE, text=True).stdout
+    return json.loads(output)
+
+async def _inprocess_main(payloads: dict, requests: int, concurrency: int, only: set[str] | None) -> dict:
+    from app.main import app
+
+    # 500s are counted as errors instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        return await run_all(client, payloads, requests, concurrency, only)
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def run_uvicorn(database_url: str, payloads: dict, requests: int, concurrency: int, workers: int, only: set[str] | None) -> dict:
+    port = _free_port()
+    env = {**os.environ, "DATABASE_URL": database_url, "REQUEST_TIMING": "false"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        env=env, cwd=BACKEND_DIR,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError("uvicorn did not become ready")
+            time.sleep(0.2)
+
+        async def main():
+            limits = httpx.Limits(max_connections=concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+                return await run_all(client, payloads, requests, concurrency, only)
+
+        return asyncio.run(main())
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Flag scenarios whose p95 got slower or whose throughput dropped by more than threshold."""
+    regressions = []
+    for mode, scales in current["results"].items():
+        for scale, results in scales.items():
+            base_results = baseline.get("results", {}).get(mode, {}).get(scale, {})
+            for name, result in results.items():
+                base = base_results.get(name)
+                if not base:
+                    continue
+                label = f"{mode}/{scale}/{name}"
+                if base["p95_ms"] and result["p95_ms"] > base["p95_ms"] * (1 + threshold):
+                    regressions.append(f"{label}: p95 {base['p95_ms']:.2f}ms -> {result['p95_ms']:.2f}ms")
+                if base["throughput_rps"] and result["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+                    regressions.append(f"{label}: throughput {base['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} req/s")
+                if result["errors"] > base["errors"]:
+                    regressions.append(f"{label}: errors {base['errors']} -> {result['errors']}")
+    return regressions
+
+async def replay_sessions(base_url: str, sessions: list[dict], concurrency: int, speed: float) -> dict:
+    """
+    Replay recorded session traces (synthetic.generate_sessions) against a running
+    server. Think time between events is divided by speed; 0 replays back to back.
+    Only request events hit the server, edits just advance the clock.
+    """
+    latencies: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(client: httpx.AsyncClient, session: dict):
+        async with semaphore:
+            started = time.monotonic()
+            for event in session["events"]:
+                if speed:
+                    delay = event["at"] / speed - (time.monotonic() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                if event["kind"] != "request":
+                    continue
+                key = f"{event['method']} {event['path']}"
+                start = time.perf_counter()
+                try:
+                    response = await client.request(event["method"], event["path"], json=event.get("json"))
+                    failed = response.status_code >= 400
+                except httpx.HTTPError:
+                    failed = True
+                latencies.setdefault(key, []).append(time.perf_counter() - start)
+                errors[key] = errors.get(key, 0) + failed
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(one(client, s) for s in sessions))
+        wall = time.perf_counter() - wall_start
+
+    results = {}
+    for key, values in sorted(latencies.items()):
+        values.sort()
+        results[key] = {
+            "requests": len(values),
+            "errors": errors[key],
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "throughput_rps": round(len(values) / wall, 2) if wall else 0.0,
+        }
+        print(f"  {key:32s} p50={results[key]['p50_ms']:9.2f}ms p95={results[key]['p95_ms']:9.2f}ms "
+              f"n={len(values)} errors={errors[key]}", file=sys.stderr)
+    return results
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def cmd_run(args) -> int:
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    modes = ["inprocess", "uvicorn"] if args.mode == "both" else [args.mode]
+    only = set(args.only.split(",")) if args.only else None
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "rules": args.rules,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+        },
+        "results": {mode: {} for mode in modes},
+    }
+    for scale in [int(s) for s in args.scales.split(",")]:
+        print(f"Preparing {scale} products / {args.rules} rules ...", file=sys.stderr)
+        database_url, payloads = build_workload(workdir, scale, args.rules, args.seed, reseed=args.reseed)
+        for mode in modes:
+            print(f"[{mode}] scale={scale}", file=sys.stderr)
+            if mode == "inprocess":
+                result = run_inprocess(database_url, workdir / f"bench_{scale}.payloads.json", args.requests, args.concurrency, only)
+            else:
+                result = run_uvicorn(database_url, payloads, args.requests, args.concurrency, args.workers, only)
+            report["results"][mode][str(scale)] = result
+
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        return _report_regressions(json.loads(Path(args.compare).read_text()), report, args.threshold)
+    return 0
+
+def _report_regressions(baseline: dict, current: dict, threshold: float) -> int:
+    regressions = compare(baseline, current, threshold)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions against baseline.")
+    return 1 if regressions else 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="seed catalogs, run the scenarios and save results as JSON")
+    run.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES), help="product counts, comma separated")
+    run.add_argument("--rules", type=int, default=DEFAULT_RULES)
+    run.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="both")
+    run.add_argument("--requests", type=int, default=200, help="requests for a weight-10 scenario")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--workers", type=int, default=4, help="uvicorn workers")
+    run.add_argument("--only", help="comma separated scenario names")
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--workdir", default=str(BACKEND_DIR / ".bench"))
+    run.add_argument("--reseed", action="store_true", help="regenerate catalogs even if present")
+    run.add_argument("--output", default="bench_results.json")
+    run.add_argument("--compare", help="baseline JSON to compare against")
+    run.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    cmp = sub.add_parser("compare", help="compare two result files")
+    cmp.add_argument("baseline")
+    cmp.add_argument("current")
+    cmp.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    replay = sub.add_parser("replay", help="replay session traces against a running server")
+    replay.add_argument("sessions", help="sessions.ndjson written by benchmarks.synthetic")
+    replay.add_argument("--base-url", default="http://127.0.0.1:8000")
+    replay.add_argument("--concurrency", type=int, default=50, help="sessions in flight")
+    replay.add_argument("--speed", type=float, default=10.0, help="think time divisor, 0 for none")
+    replay.add_argument("--output", help="write results as JSON")
+
+    inproc = sub.add_parser("_inprocess")
+    inproc.add_argument("--payloads", required=True, help="payload file written by build_workload")
+    inproc.add_argument("--requests", type=int, required=True)
+    inproc.add_argument("--concurrency", type=int, required=True)
+    inproc.add_argument("--only")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        return cmd_run(args)
+    if args.command == "compare":
+        return _report_regressions(json.loads(Path(args.baseline).read_text()), json.loads(Path(args.current).read_text()), args.threshold)
+    if args.command == "replay":
+        from benchmarks import synthetic
+
+        sessions = synthetic.read_ndjson(Path(args.sessions))
+        result = asyncio.run(replay_sessions(args.base_url, sessions, args.concurrency, args.speed))
+        if args.output:
+            Path(args.output).write_text(json.dumps({"meta": {"sessions": len(sessions), "speed": args.speed}, "results": result}, indent=2))
+        return 0
+
+    only = set(args.only.split(",")) if args.only else None
+    result = asyncio.run(_inprocess_main(json.loads(Path(args.payloads).read_text()), args.requests, args.concurrency, only))
+    print(json.dumps(result))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Micro-benchmarks for the pure configuration functions in app/services/rule_engine.py.
+
+Runs over generated 21-slot configurations and rule sets scaled from the
+seed_rules.py examples, without HTTP or a database:
+
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --compare micro_baseline.json
+
+Each case reports the mean/min time per call over several timeit repeats.
+Exit code 1 means a case got slower than the baseline by more than --threshold.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+from app.services import rule_engine
+from app.services.catalog_arrays import CatalogArrays
+from benchmarks import synthetic
+
+DEFAULT_RULE_COUNTS = [4, 400, 4000]  # seed_rules.py has 4 rules
+DEFAULT_THRESHOLD = 0.15
+
+def measure(fn, repeat: int = 5, min_time: float = 0.2) -> dict:
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    # autorange targets 0.2s; scale up if asked for longer runs
+    number = max(1, int(number * min_time / 0.2))
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "calls": number * repeat,
+        "mean_us": round(statistics.mean(runs) * 1e6, 3),
+        "min_us": round(min(runs) * 1e6, 3),
+        "stdev_us": round(statistics.pstdev(runs) * 1e6, 3),
+    }
+
+def build_cases(products: list[dict], configs: list[dict], rule_counts: list[int], seed: int) -> dict:
+    catalog = {p["id"]: p for p in products}
+    cases = {}
+
+    def over_configs(fn):
+        # One call = the function applied to every generated configuration
+        return lambda: [fn(c) for c in configs]
+
+    # Rule condition evaluation, one rule type at a time
+    aggregates = [rule_engine.compute_aggregates(c, catalog) for c in configs]
+    for kind in synthetic.RULE_BUILDERS:
+        rules = synthetic.generate_rules(1000, products, seed=seed, mix={kind: 1.0})
+        conditions = [r["definition"]["conditions"][0] for r in rules]
+
+        def evaluate(conditions=conditions):
+            for config, agg in zip(configs, aggregates):
+                for cond in conditions:
+                    rule_engine.evaluate_condition(cond, config, agg)
+        cases[f"condition/{kind} x1000"] = evaluate
+
+    # Aggregation
+    cases["aggregate/power"] = over_configs(lambda c: rule_engine.total_power(c, catalog))
+    cases["aggregate/width"] = over_configs(lambda c: rule_engine.used_width(c, catalog))
+    cases["aggregate/interfaces"] = over_configs(lambda c: rule_engine.remaining_interfaces(c, catalog))
+    cases["aggregate/all"] = over_configs(lambda c: rule_engine.compute_aggregates(c, catalog))
+
+    # The same aggregates from the NumPy catalog arrays
+    arrays = CatalogArrays()
+    arrays.build(products)
+    encoded = arrays.encode(configs)
+    cases["aggregate/numpy encode+reduce"] = lambda: arrays.aggregate(arrays.encode(configs))
+    cases["aggregate/numpy reduce"] = lambda: arrays.aggregate(encoded)
+    # One candidate configuration per product for slot 2 of the first configuration
+    candidates = arrays.with_candidates(configs[0], 2)
+    cases[f"aggregate/numpy candidates x{len(products)}"] = lambda: arrays.aggregate(candidates)
+    cases[f"aggregate/python candidates x{len(products)}"] = lambda: [
+        rule_engine.compute_aggregates(
+            {**configs[0], "slots": [dict(s, componentId=p["id"], selectedOptions={}) if s["id"] == 2 else s for s in configs[0]["slots"]]},
+            catalog,
+        )
+        for p in products
+    ]
+
+    # Pricing and option validation for every filled slot
+    slot_items = [
+        (catalog[s["componentId"]], s["selectedOptions"])
+        for c in configs for s in c["slots"] if s["componentId"]
+    ]
+    for qty in (1, 100, 500):
+        cases[f"pricing/item_unit_price qty={qty}"] = lambda qty=qty: [
+            rule_engine.item_unit_price(p, opts, qty) for p, opts in slot_items
+        ]
+    cases["pricing/numpy unit_prices qty=100"] = lambda: arrays.unit_prices(encoded, 100)
+    cases["options/validate_options"] = lambda: [
+        rule_engine.validate_options(p.get("options"), opts) for p, opts in slot_items
+    ]
+
+    # Full validation with rule sets of growing size
+    for count in rule_counts:
+        rules = synthetic.generate_rules(count, products, seed=seed)
+        cases[f"validate_config rules={count}"] = over_configs(
+            lambda c, rules=rules: rule_engine.validate_config(c, catalog, rules)
+        )
+    return cases
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base and base["mean_us"] and result["mean_us"] > base["mean_us"] * (1 + threshold):
+            regressions.append(f"{name}: {base['mean_us']:.2f}us -> {result['mean_us']:.2f}us")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--configs", type=int, default=50, help="21-slot configurations per call")
+    parser.add_argument("--rules", default=",".join(str(n) for n in DEFAULT_RULE_COUNTS), help="rule set sizes, comma separated")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--filter", help="only run cases containing this substring")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timeit repeat")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    products = synthetic.generate_products(args.products, seed=args.seed)
+    rng = random.Random(args.seed)
+    configs = [synthetic.generate_configuration(products, rng) for _ in range(args.configs)]
+    cases = build_cases(products, configs, [int(n) for n in args.rules.split(",")], args.seed)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "products": args.products,
+            "configs": args.configs,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for name, fn in cases.items():
+        if args.filter and args.filter not in name:
+            continue
+        result = measure(fn, min_time=args.min_time)
+        report["results"][name] = result
+        print(f"{name:40s} mean={result['mean_us']:12.2f}us min={result['min_us']:12.2f}us")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+    if args.compare:
+        regressions = compare(json.loads(Path(args.compare).read_text()), report, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
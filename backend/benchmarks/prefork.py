@@ -0,0 +1,178 @@
+"""
+Worker memory and startup time: `uvicorn --workers N` vs. the pre-fork launcher (app/server.py).
+
+    python -m benchmarks.prefork --products 10000 --rules 10000 --workers 4
+
+A synthetic catalog is loaded into a temporary SQLite database and each launcher
+is started on it. Reported per launcher:
+
+- listening: launch until /health answers;
+- warm: launch until a round of catalog requests (list routes, article lookup,
+  validation, feasibility, sessions; several per worker) has been answered;
+- first catalog request latency;
+- per worker RSS, PSS (shared pages split between the processes that map them)
+  and USS (pages only this worker has), read from /proc/<pid>/smaps_rollup
+  after the warm-up, plus the total PSS of the process group.
+
+Linux only (/proc).
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+
+from benchmarks import synthetic
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+LAUNCHERS = {
+    "uvicorn": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning",
+    ],
+    "prefork": lambda port, workers: [
+        sys.executable, "-m", "app.server", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+    ],
+}
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def catalog_requests(products: list[dict], examples: list[dict]) -> list[tuple[str, str, object]]:
+    """One request per cached catalog structure."""
+    config = examples[0]["config"] if examples else {"slots": [], "chassisId": None, "psuId": None}
+    lookup = [{"product_id": p["id"], "selected_options": {}} for p in products[:20]]
+    return [
+        ("GET", "/api/admin/products/?limit=1000000", None),
+        ("GET", "/api/admin/rules/?limit=1000000", None),
+        ("GET", "/api/articles/?limit=1000000", None),
+        ("POST", "/api/articles/resolve", lookup),
+        ("POST", "/api/config/validate/", []),
+        ("POST", "/api/config/feasibility", {"config": config, "slot": 2}),
+        ("POST", "/api/config/sessions", {"config": config}),
+    ]
+
+def _proc_children(pid: int) -> list[int]:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children += [int(c) for c in f.read().split()]
+    return children
+
+def _is_worker(pid: int) -> bool:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        # multiprocessing's helper process is not a worker
+        return b"resource_tracker" not in f.read()
+
+def memory(pid: int) -> dict:
+    """RSS, PSS and USS of a process in MiB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": values.get("Rss", 0.0),
+        "pss": values.get("Pss", 0.0),
+        "uss": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0),
+    }
+
+def measure(launcher: str, database_url: str, workers: int, requests: list, rounds: int) -> dict:
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "DATABASE_URL": database_url, "REQUEST_TIMING": "false"}
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        LAUNCHERS[launcher](port, workers), env=env, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = time.monotonic() + 300
+        while True:
+            try:
+                if httpx.get(f"{base_url}/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError(f"{launcher} did not become ready")
+            time.sleep(0.05)
+        listening = time.perf_counter() - started
+
+        def send(request):
+            method, path, body = request
+            response = client.request(method, path, json=body)
+            response.raise_for_status()
+
+        with httpx.Client(base_url=base_url, timeout=300) as client:
+            first_start = time.perf_counter()
+            send(requests[0])
+            first = time.perf_counter() - first_start
+            # Concurrent rounds so that every worker serves every route
+            with ThreadPoolExecutor(max_workers=workers * 2) as pool:
+                list(pool.map(send, requests * rounds))
+        warm = time.perf_counter() - started
+
+        pids = [pid for pid in _proc_children(server.pid) if _is_worker(pid)]
+        per_worker = [memory(pid) for pid in pids]
+        master = memory(server.pid)
+        return {
+            "listening_s": round(listening, 3),
+            "warm_s": round(warm, 3),
+            "first_catalog_ms": round(first * 1000, 1),
+            "workers": [{k: round(v, 1) for k, v in m.items()} for m in per_worker],
+            "master": {k: round(v, 1) for k, v in master.items()},
+            "total_pss": round(master["pss"] + sum(m["pss"] for m in per_worker), 1),
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--rules", type=int, default=5000)
+    parser.add_argument("--articles", type=int, default=5000)
+    parser.add_argument("--examples", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=None, help="warm-up rounds (default: 4 per worker)")
+    parser.add_argument("--launchers", default="uvicorn,prefork")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args(argv)
+
+    products = synthetic.generate_products(args.products, seed=args.seed)
+    rules = synthetic.generate_rules(args.rules, products, seed=args.seed)
+    articles = synthetic.generate_articles(args.articles, products, seed=args.seed)
+    examples = synthetic.generate_examples(args.examples, products, seed=args.seed)
+    requests = catalog_requests(products, examples)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{os.path.join(tmp, 'prefork.db')}"
+        synthetic.seed_database(database_url, products, rules, articles, examples)
+        for launcher in args.launchers.split(","):
+            result = results[launcher] = measure(launcher, database_url, args.workers, requests, args.rounds or 4 * args.workers)
+            workers = result["workers"]
+            print(f"{launcher:<8} listening {result['listening_s']:>6.2f}s  warm {result['warm_s']:>6.2f}s"
+                  f"  first catalog request {result['first_catalog_ms']:>8.1f}ms  total PSS {result['total_pss']:>7.1f} MiB")
+            for m in workers:
+                print(f"{'':<8} worker RSS {m['rss']:>7.1f} MiB  PSS {m['pss']:>7.1f} MiB  USS {m['uss']:>7.1f} MiB")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Memory of an in-memory catalog: ORM instances vs. plain dicts vs. compact records
+(app/services/catalog_records.py).
+
+    python -m benchmarks.records --products 10000 --rules 10000
+
+A synthetic catalog is loaded into a temporary SQLite database and read back
+three ways. The memory kept alive by each representation is measured with
+tracemalloc:
+
+- orm:     db.query(models.Product).all() / db.query(models.Rule).all();
+- dicts:   batch_validation.load_catalog;
+- records: catalog_records.load_records.
+
+Every generated configuration must validate to the same violations and unit price
+with dicts and records; a mismatch exits with 1. Validation times are reported too.
+"""
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import models
+from app.services import batch_validation, catalog_records, rule_engine
+from benchmarks import synthetic
+
+def retained(load) -> tuple[object, float]:
+    """(result of load(), MiB it keeps allocated)."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = load()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, size / 2**20
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--rules", type=int, default=10000)
+    parser.add_argument("--configurations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    products = synthetic.generate_products(args.products, seed=args.seed)
+    rules = synthetic.generate_rules(args.rules, products, seed=args.seed)
+    examples = synthetic.generate_examples(args.configurations, products, seed=args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'records.db')}"
+        synthetic.seed_database(url, products, rules, [], [])
+        engine = create_engine(url)
+        SessionLocal = sessionmaker(bind=engine)
+        try:
+            sizes = {}
+            with SessionLocal() as db:
+                orm, sizes["orm"] = retained(lambda: (db.query(models.Product).all(), db.query(models.Rule).all()))
+                del orm
+            with SessionLocal() as db:
+                dicts, sizes["dicts"] = retained(lambda: batch_validation.load_catalog(db))
+            with SessionLocal() as db:
+                start = time.perf_counter()
+                records, sizes["records"] = retained(lambda: catalog_records.load_records(db))
+                build = time.perf_counter() - start
+        finally:
+            engine.dispose()
+
+    for name, size in sizes.items():
+        print(f"{name:<8} {size:>8.1f} MiB  {size * 2**20 / args.products:>8.0f} bytes per product (with its share of the rules)")
+    print(f"records built in {build:.2f}s (tracemalloc slows this down)")
+
+    mismatches = 0
+    timings = {}
+    for name, (catalog_products, catalog_rules) in (("dicts", dicts), ("records", records)):
+        by_id = {p["id"]: p for p in catalog_products}
+        start = time.perf_counter()
+        results = [
+            (rule_engine.validate_config(e["config"], by_id, catalog_rules), rule_engine.system_unit_price(e["config"], by_id, 25))
+            for e in examples
+        ]
+        timings[name] = (time.perf_counter() - start) * 1000 / len(examples)
+        if name == "dicts":
+            expected = results
+        else:
+            mismatches = sum(1 for a, b in zip(expected, results) if a != b)
+    print(f"validate_config per configuration: dicts {timings['dicts']:.2f}ms  records {timings['records']:.2f}ms")
+    print(f"{len(examples)} configurations compared, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
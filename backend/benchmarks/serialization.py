@@ -0,0 +1,144 @@
+"""
+Catalog list routes: pre-encoded responses (app/services/response_cache.py) vs. the
+response_model path they replace (ORM rows validated and encoded per request).
+
+    python -m benchmarks.serialization --products 5000 --rules 5000
+
+A synthetic catalog is loaded into a temporary SQLite database. Every route is
+requested from the real app and from a reference app that still declares the old
+`return db.query(...).offset(skip).limit(limit).all()` handlers, for several
+skip/limit windows. The bodies must be byte-for-byte equal; a mismatch exits with 1
+(tests/test_serialization.py runs the same comparison on a small catalog).
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import List
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, defer, sessionmaker
+
+from app.core.config import settings
+from app.db.session import get_db
+from app.main import app
+from app.models import models
+from app.models.example import ExampleConfig
+from app.schemas import example as example_schemas
+from app.schemas import schemas
+from app.services.response_cache import articles_json, example_summaries_json, examples_json, products_json, rules_json
+from benchmarks import synthetic
+
+# path, schema, query of the handler before the response cache
+ROUTES = [
+    ("/api/admin/products/", schemas.Product, lambda db: db.query(models.Product)),
+    ("/api/admin/rules/", schemas.Rule, lambda db: db.query(models.Rule)),
+    ("/api/articles/", schemas.Article, lambda db: db.query(models.Article)),
+    ("/api/examples/", example_schemas.ExampleConfig, lambda db: db.query(ExampleConfig).options(defer(ExampleConfig.config))),
+    (
+        "/api/examples/summaries",
+        example_schemas.ExampleSummary,
+        lambda db: db.query(*(getattr(ExampleConfig, n) for n in example_schemas.ExampleSummary.model_fields)).order_by(ExampleConfig.id),
+    ),
+]
+
+CACHES = [products_json, rules_json, articles_json, examples_json, example_summaries_json]
+
+WINDOWS = [None, (0, 1_000_000), (3, 7), (0, -1), (-5, 2), (10**6, 10)]
+
+def reference_app(get_session) -> FastAPI:
+    reference = FastAPI()
+    for path, schema, query in ROUTES:
+        def handler(skip: int = 0, limit: int = 100, db: Session = Depends(get_session), query=query):
+            rows = query(db).offset(skip).limit(limit).all()
+            # Column tuples (summaries) become dicts like in the original handler
+            if rows and not hasattr(rows[0], "__table__"):
+                rows = [dict(zip(schema.model_fields, row)) for row in rows]
+            return rows
+        reference.add_api_route(path, handler, methods=["GET"], response_model=List[schema])
+    return reference
+
+def timed(client: TestClient, url: str, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+@contextmanager
+def clients(products: list[dict], rules: list[dict], articles: list[dict], examples: list[dict]):
+    """(app, reference app) test clients over a temporary database seeded with the given rows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'serialization.db')}"
+        synthetic.seed_database(url, products, rules, articles, examples)
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        SessionLocal = sessionmaker(bind=engine)
+
+        def get_session():
+            db = SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        # The encodings are keyed by version only, and the versions of another database may match
+        for cache in CACHES:
+            cache.invalidate()
+        app.dependency_overrides[get_db] = get_session
+        try:
+            yield TestClient(app), TestClient(reference_app(get_session))
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+            for cache in CACHES:
+                cache.invalidate()
+            engine.dispose()
+
+def mismatches(fast: TestClient, slow: TestClient) -> list[str]:
+    """Route/window pairs whose status or body differ from the reference handlers."""
+    found = []
+    for path, _, _ in ROUTES:
+        for window in WINDOWS:
+            query = f"{path}?skip={window[0]}&limit={window[1]}" if window else path
+            expected, actual = slow.get(query), fast.get(query)
+            if (actual.status_code, actual.content) != (expected.status_code, expected.content):
+                found.append(f"{query}: {len(actual.content)} vs {len(expected.content)} bytes")
+    return found
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--rules", type=int, default=2000)
+    parser.add_argument("--articles", type=int, default=2000)
+    parser.add_argument("--examples", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20, help="requests per route for the timings")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    # As in load_test: no Server-Timing header or timing log line, which the reference app doesn't have
+    settings.REQUEST_TIMING = False
+
+    products = synthetic.generate_products(args.products, seed=args.seed)
+    rules = synthetic.generate_rules(args.rules, products, seed=args.seed)
+    articles = synthetic.generate_articles(args.articles, products, seed=args.seed)
+    examples = synthetic.generate_examples(args.examples, products, seed=args.seed)
+
+    with clients(products, rules, articles, examples) as (fast, slow):
+        found = mismatches(fast, slow)
+        for mismatch in found:
+            print(f"MISMATCH {mismatch}")
+        for path, _, _ in ROUTES:
+            query = f"{path}?limit=1000000"
+            size = len(fast.get(query).content)
+            print(f"{path:<28} {size / 1024:>9.1f} KiB  response_model {timed(slow, query, args.repeat):>8.2f}ms"
+                  f"  cached {timed(fast, query, args.repeat):>7.2f}ms")
+
+    print(f"{len(ROUTES) * len(WINDOWS)} route/window pairs compared, {len(found)} mismatches")
+    return 1 if found else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Cold start: time from launching the server to its first responses.
+
+    python -m benchmarks.startup --runs 5
+
+A synthetic catalog is seeded into a temporary SQLite database once. Then a
+single uvicorn worker is started `--runs` times. Each run reports the time until
+/health answers and until the first catalog request (the products list) answers,
+plus the import time of app.main in a fresh interpreter. Medians are printed.
+
+The readiness check only tries to connect until the port accepts: the server
+usually runs on the same CPUs, and polling it with fresh HTTP clients would slow
+down the start being measured.
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks import synthetic
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def import_time(env: dict) -> float:
+    output = subprocess.check_output(
+        [sys.executable, "-c", "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"],
+        env=env, cwd=BACKEND_DIR, stderr=subprocess.DEVNULL,
+    )
+    return float(output.decode().split()[-1])
+
+def cold_start(env: dict) -> tuple[float, float]:
+    """(seconds until /health answers, seconds until the first products list answers)."""
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env, cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 120
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                pass
+            if time.monotonic() > deadline or server.poll() is not None:
+                raise RuntimeError("uvicorn did not become ready")
+            time.sleep(0.01)
+        with httpx.Client(base_url=base_url, timeout=120) as client:
+            client.get("/health").raise_for_status()
+            health = time.perf_counter() - started
+            client.get("/api/admin/products/", params={"limit": 1}).raise_for_status()
+            return health, time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--rules", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    products = synthetic.generate_products(args.products, seed=args.seed)
+    rules = synthetic.generate_rules(args.rules, products, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'startup.db')}"
+        synthetic.seed_database(url, products, rules, [], [])
+        env = {**os.environ, "DATABASE_URL": url, "REQUEST_TIMING": "false"}
+        env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+        # The first start may still prepare the database; it is not counted
+        cold_start(env)
+        imports = [import_time(env) for _ in range(args.runs)]
+        starts = [cold_start(env) for _ in range(args.runs)]
+
+    print(f"import app.main          {statistics.median(imports) * 1000:>8.0f}ms")
+    print(f"start to /health         {statistics.median(s[0] for s in starts) * 1000:>8.0f}ms")
+    print(f"start to first products  {statistics.median(s[1] for s in starts) * 1000:>8.0f}ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
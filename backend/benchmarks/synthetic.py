@@ -0,0 +1,476 @@
+"""
+Synthetic catalog data with the same shapes as seed.py / seed_rules.py.
+
+Everything is generated from a random.Random seeded by the caller, so the same
+arguments always produce the same catalog. Also usable as a CLI that writes
+straight into a fresh database and/or to NDJSON files:
+
+    python -m benchmarks.synthetic --products 10000 --rules 10000 --database-url sqlite:///big.db
+    python -m benchmarks.synthetic --products 1000 --sessions 500 --output-dir synthetic/
+"""
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.db.session import Base
+from app.models import models
+from app.models.example import ExampleConfig
+
+TIERS = ["1", "25", "50", "100", "250", "500"]
+
+# Interface keys provided by CPUs and consumed by peripherals
+INTERFACE_KEYS = ["pcie_x8", "pcie_x4", "pcie_x1", "sata", "usb_2", "usb_3", "eth_1g", "eth_10g", "gpio"]
+
+EXTERNAL_INTERFACES = [
+    ("Ethernet", "RJ45"),
+    ("USB", "Type-A"),
+    ("Display", "DisplayPort"),
+    ("Serial", "D-Sub"),
+    ("Antenna", "SMA"),
+]
+
+PERIPHERAL_TYPES = ["storage", "network", "io"]
+
+def tier_prices(base: float) -> dict:
+    """price_1 .. price_500, decreasing by ~4% per tier like the seed data."""
+    prices = {}
+    price = base
+    for tier in TIERS:
+        prices[f"price_{tier}"] = round(price, 2)
+        price *= 0.96
+    return prices
+
+def price_mod(rng: random.Random, base: int) -> dict | int:
+    if rng.random() < 0.3:
+        return base
+    return {tier: max(base - i * base // 25, 0) for i, tier in enumerate(TIERS)}
+
+def generate_options(rng: random.Random, max_options: int = 3) -> list:
+    options = []
+    for o in range(rng.randint(0, max_options)):
+        if rng.random() < 0.6:
+            choices = [{"label": "Standard", "value": "std", "priceMod": 0, "powerMod": 0, "widthMod": 0}]
+            for c in range(rng.randint(1, 3)):
+                choices.append({
+                    "label": f"Variant {c + 1}",
+                    "value": f"v{c + 1}",
+                    "priceMod": price_mod(rng, rng.choice([50, 100, 180, 250, 500])),
+                    "powerMod": rng.choice([0, 0, 5, 10, 15]),
+                    "widthMod": rng.choice([0, 0, 0, 4]),
+                })
+            options.append({"id": f"opt{o}", "label": f"Option {o}", "type": "select", "choices": choices, "default": "std"})
+        else:
+            options.append({
+                "id": f"flag{o}",
+                "label": f"Flag {o}",
+                "type": "boolean",
+                "priceMod": price_mod(rng, rng.choice([40, 50, 150, 200])),
+                "default": False,
+            })
+    return options
+
+def generate_external_interfaces(rng: random.Random) -> list:
+    return [
+        {"type": kind, "connector": connector, "count": rng.choice([1, 2, 4, 8])}
+        for kind, connector in rng.sample(EXTERNAL_INTERFACES, rng.randint(0, 3))
+    ]
+
+def _product(product_id: str, product_type: str, **fields) -> dict:
+    data = {
+        "id": product_id,
+        "type": product_type,
+        "name": f"{product_id} {product_type.upper()}",
+        "description": f"Synthetic {product_type} {product_id}",
+        "url": f"https://www.duagon.com/products/details/{product_id}/",
+        "eol_date": "2030-12-31",
+        "image_url": None,
+        "height_u": None,
+        "connectors": None,
+        "options": [],
+        "interfaces": None,
+        "external_interfaces": None,
+    }
+    data.update(fields)
+    return data
+
+def generate_products(count: int, seed: int = 42) -> list[dict]:
+    """
+    Roughly 15% CPUs, 75% peripherals, 5% chassis and 5% PSUs; always at least
+    one of each fixed type so configurations can be built.
+    """
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        roll = rng.random() if i >= 4 else [0.0, 0.85, 0.92, 0.97][i]
+        if roll < 0.15:
+            products.append(_product(
+                f"CPU{i:06d}", "cpu",
+                power_watts=rng.choice([25, 35, 45, 65]),
+                width_hp=rng.choice([4, 4, 8]),
+                interfaces={key: rng.choice([1, 2, 4, 8]) for key in rng.sample(INTERFACE_KEYS, rng.randint(3, 7))},
+                external_interfaces=generate_external_interfaces(rng),
+                options=generate_options(rng),
+                **tier_prices(rng.randint(1500, 3500)),
+            ))
+        elif roll < 0.90:
+            product_type = rng.choice(PERIPHERAL_TYPES)
+            products.append(_product(
+                f"P{i:06d}", product_type,
+                power_watts=rng.choice([3, 5, 8, 10, 12]),
+                width_hp=rng.choice([4, 4, 4, 8]),
+                interfaces={key: rng.choice([1, 1, 2]) for key in rng.sample(INTERFACE_KEYS, rng.randint(1, 2))},
+                external_interfaces=generate_external_interfaces(rng),
+                options=generate_options(rng),
+                **tier_prices(rng.randint(250, 900)),
+            ))
+        elif roll < 0.95:
+            height = rng.choice([3, 4])
+            width = rng.choice([40, 84])
+            products.append(_product(
+                f"C_{height}U_{width}HP_{i:06d}", "chassis",
+                power_watts=0, width_hp=width, height_u=height,
+                options=generate_options(rng, max_options=2),
+                **tier_prices(rng.randint(600, 950)),
+            ))
+        else:
+            height = rng.choice([3, 4])
+            products.append(_product(
+                f"P_{height}U_{i:06d}", "psu",
+                power_watts=-rng.choice([300, 450, 600]), width_hp=rng.choice([0, 8]), height_u=height,
+                connectors=["AC Input"],
+                external_interfaces=[{"type": "Power", "connector": "AC Input", "count": 1}],
+                **tier_prices(rng.randint(150, 300)),
+            ))
+    return products
+
+# Condition types understood by the rule engine and their share of a generated rule set
+RULE_MIX = {
+    "component_selected": 0.6,
+    "system_property": 0.25,
+    "adjacency": 0.1,
+    "option_not_selected": 0.05,
+}
+
+def _rule(description: str, condition: dict, actions: list[dict]) -> dict:
+    return {"description": description, "category": None, "definition": {"conditions": [condition], "actions": actions}}
+
+def component_selected_rule(rng: random.Random, boards: list[str], **_) -> dict:
+    # "G28 in slot 1 forbids G239 in slot 2"
+    trigger, target = rng.choice(boards), rng.choice(boards)
+    slot = rng.randint(1, 21)
+    target_slot = min(max(slot + rng.choice([-1, 1]), 1), 21)
+    return _rule(
+        f"{trigger} in slot {slot} forbids {target} in slot {target_slot}",
+        {"type": "component_selected", "componentId": trigger, "slotIndex": slot},
+        [{"type": "forbid", "componentId": target, "slotIndex": target_slot,
+          "message": f"{target} cannot be in slot {target_slot} if {trigger} is in slot {slot}"}],
+    )
+
+def system_property_rule(rng: random.Random, chassis: list[str], psus: list[str], **_) -> dict:
+    if rng.random() < 0.5:
+        # "3U Chassis forbids 4U PSU"
+        height = rng.choice(["3U", "4U"])
+        psu = rng.choice(psus)
+        return _rule(
+            f"{height} Chassis forbids {psu}",
+            {"type": "system_property", "property": "chassisId", "operator": "contains", "value": height},
+            [{"type": "forbid", "componentId": psu, "message": f"{psu} incompatible with {height} Chassis"}],
+        )
+    prop = rng.choice(["slotCount", "totalWidth", "totalPower", "requiredPower"])
+    if prop == "slotCount":
+        # "More than 5 slots forbids Compact Chassis"
+        limit = rng.randint(3, 15)
+        target = rng.choice(chassis)
+        return _rule(
+            f"More than {limit} slots forbids {target}",
+            {"type": "system_property", "property": "slotCount", "operator": "gt", "value": limit},
+            [{"type": "forbid", "componentId": target, "message": f"{target} supports max {limit} slots"}],
+        )
+    limit = rng.choice([40, 60, 84]) if prop == "totalWidth" else rng.choice([150, 250, 400])
+    return _rule(
+        f"{prop} above {limit}",
+        {"type": "system_property", "property": prop, "operator": "gt", "value": limit},
+        [{"type": "forbid", "message": f"{prop} must not exceed {limit}"}],
+    )
+
+def adjacency_rule(rng: random.Random, boards: list[str], **_) -> dict:
+    # "G239 cannot be placed in the slot adjacent to the System Slot."
+    target = rng.choice(boards)
+    adjacent_to = "system_slot" if rng.random() < 0.5 else rng.choice(boards)
+    return _rule(
+        f"{target} not next to {adjacent_to}",
+        {"type": "adjacency", "componentId": target, "adjacentTo": adjacent_to},
+        [{"type": "forbid", "componentId": target, "message": f"{target} cannot be placed next to {adjacent_to}."}],
+    )
+
+def option_not_selected_rule(rng: random.Random, boards: list[str], chassis_options: list[str], **_) -> dict:
+    # Boards that need a chassis option, e.g. a fan tray
+    target = rng.choice(boards)
+    option_id = rng.choice(chassis_options)
+    return _rule(
+        f"{target} requires chassis option {option_id}",
+        {"type": "option_not_selected", "componentType": "chassis", "optionId": option_id, "value": True},
+        [{"type": "forbid", "componentId": target, "message": f"{target} requires the chassis option {option_id}."}],
+    )
+
+RULE_BUILDERS = {
+    "component_selected": component_selected_rule,
+    "system_property": system_property_rule,
+    "adjacency": adjacency_rule,
+    "option_not_selected": option_not_selected_rule,
+}
+
+def generate_rules(count: int, products: list[dict], seed: int = 42, mix: dict | None = None) -> list[dict]:
+    """Rules in the shapes of seed_rules.py and the README, covering every condition type."""
+    rng = random.Random(seed)
+    mix = mix or RULE_MIX
+    boards = [p["id"] for p in products if p["type"] not in ("chassis", "psu")]
+    context = {
+        "boards": boards,
+        "chassis": [p["id"] for p in products if p["type"] == "chassis"] or boards,
+        "psus": [p["id"] for p in products if p["type"] == "psu"] or boards,
+        "chassis_options": sorted({
+            o["id"] for p in products if p["type"] == "chassis" for o in p.get("options") or []
+        }) or ["fan_tray"],
+    }
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    return [RULE_BUILDERS[kind](rng, **context) for kind in rng.choices(kinds, weights, k=count)]
+
+def selected_options(rng: random.Random, product: dict) -> dict:
+    selected = {}
+    for opt in product.get("options") or []:
+        if opt["type"] == "select":
+            selected[opt["id"]] = rng.choice(opt["choices"])["value"]
+        elif rng.random() < 0.5:
+            selected[opt["id"]] = True
+    return selected
+
+def generate_articles(count: int, products: list[dict], seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    articles = []
+    for i in range(count):
+        product = rng.choice(products)
+        articles.append({
+            "article_number": f"{product['id']}-A{i:06d}",
+            "product_id": product["id"],
+            "selected_options": selected_options(rng, product),
+        })
+    return articles
+
+def generate_configuration(products: list[dict], rng: random.Random, slot_count: int = 21) -> dict:
+    """A ConfigState-shaped configuration (see configStore.ts) with a CPU in slot 1."""
+    cpus = [p for p in products if p["type"] == "cpu"]
+    boards = [p for p in products if p["type"] in PERIPHERAL_TYPES]
+    chassis = [p for p in products if p["type"] == "chassis"]
+    psus = [p for p in products if p["type"] == "psu"]
+    slots = []
+    for slot_id in range(1, slot_count + 1):
+        if slot_id == 1:
+            product = rng.choice(cpus)
+        elif rng.random() < 0.6:
+            product = rng.choice(boards)
+        else:
+            product = None
+        slots.append({
+            "id": slot_id,
+            "type": "system" if slot_id == 1 else "peripheral",
+            "componentId": product["id"] if product else None,
+            "selectedOptions": selected_options(rng, product) if product else {},
+            "width": 4,
+            "blockedBy": None,
+        })
+    chassis_product = rng.choice(chassis) if chassis else None
+    psu_product = rng.choice(psus) if psus else None
+    return {
+        "slotCount": slot_count,
+        "systemSlotPosition": "left",
+        "chassisId": chassis_product["id"] if chassis_product else None,
+        "chassisOptions": selected_options(rng, chassis_product) if chassis_product else {},
+        "psuId": psu_product["id"] if psu_product else None,
+        "psuOptions": {},
+        "slots": slots,
+    }
+
+def quote_payload(config: dict, products_by_id: dict | None = None) -> dict:
+    """The body QuotePage.tsx posts to /api/config/quote for a configuration."""
+    products_by_id = products_by_id or {}
+    items = [
+        {
+            "slotLabel": f"Slot {s['id']}",
+            "product": {"id": s["componentId"], "name": products_by_id.get(s["componentId"], {}).get("name", s["componentId"])},
+            "options": s["selectedOptions"],
+        }
+        for s in config["slots"] if s["componentId"]
+    ]
+    return {
+        "user": {"firstName": "Bench", "lastName": "Mark", "company": "Load Test"},
+        "config": config,
+        "items": items,
+        "totalCost": 12345.0,
+    }
+
+def generate_examples(count: int, products: list[dict], seed: int = 42) -> list[dict]:
+    """example_configs rows; config_json is a serialized ConfigState like in seed.py, plus its parsed columns."""
+    rng = random.Random(seed)
+    examples = []
+    for i in range(count):
+        config = generate_configuration(products, rng, slot_count=rng.choice([10, 21]))
+        examples.append({
+            "id": f"EX-S{i:05d}",
+            "name": f"Synthetic Example {i}",
+            "description": f"Generated {config['slotCount']}-slot system with {sum(1 for s in config['slots'] if s['componentId'])} boards.",
+            "config_json": json.dumps(config),
+            "image_url": None,
+            "config": config,
+            "slot_count": config["slotCount"],
+            "chassis_id": config.get("chassisId"),
+        })
+    return examples
+
+# Requests the configurator issues when a page is opened (see frontend/src/services/api.ts)
+SESSION_START_REQUESTS = ["/api/admin/products/", "/api/admin/rules/", "/api/examples/summaries"]
+
+def _think_time(rng: random.Random, mean: float = 4.0) -> float:
+    return min(rng.expovariate(1 / mean), mean * 10)
+
+def generate_session(session_id: str, products: list[dict], examples: list[dict], rng: random.Random) -> dict:
+    """
+    One configurator visit: the initial catalog requests, then local edits
+    (chassis/PSU choice, placing, removing and re-optioning boards) separated by
+    think time, and sometimes a quote request for the final configuration.
+
+    Edits are client-side today; they are recorded so a replay can send them to
+    server-side validation as well.
+    """
+    by_id = {p["id"]: p for p in products}
+    boards = [p for p in products if p["type"] in PERIPHERAL_TYPES]
+    events = []
+    at = 0.0
+
+    def request(method: str, path: str, body=None):
+        event = {"at": round(at, 3), "kind": "request", "method": method, "path": path}
+        if body is not None:
+            event["json"] = body
+        events.append(event)
+
+    def edit(action: str, **fields):
+        events.append({"at": round(at, 3), "kind": "edit", "action": action, **fields})
+
+    for path in SESSION_START_REQUESTS:
+        request("GET", path)
+
+    if examples and rng.random() < 0.3:
+        example = rng.choice(examples)
+        config = json.loads(example["config_json"])
+        at += _think_time(rng)
+        edit("load_example", exampleId=example["id"])
+    else:
+        config = generate_configuration(products, rng)
+        for slot in config["slots"][1:]:
+            slot["componentId"], slot["selectedOptions"] = None, {}
+        at += _think_time(rng)
+        edit("set_chassis", chassisId=config["chassisId"], options=config["chassisOptions"])
+        at += _think_time(rng)
+        edit("set_psu", psuId=config["psuId"])
+        cpu = config["slots"][0]
+        at += _think_time(rng)
+        edit("place", slot=cpu["id"], componentId=cpu["componentId"], selectedOptions=cpu["selectedOptions"])
+
+    for _ in range(rng.randint(3, 15)):
+        at += _think_time(rng)
+        filled = [s for s in config["slots"][1:] if s["componentId"]]
+        empty = [s for s in config["slots"][1:] if not s["componentId"]]
+        roll = rng.random()
+        if filled and roll < 0.1:
+            slot = rng.choice(filled)
+            slot["componentId"], slot["selectedOptions"] = None, {}
+            edit("remove", slot=slot["id"])
+        elif filled and roll < 0.25:
+            slot = rng.choice(filled)
+            slot["selectedOptions"] = selected_options(rng, by_id[slot["componentId"]])
+            edit("set_options", slot=slot["id"], selectedOptions=slot["selectedOptions"])
+        elif empty and boards:
+            slot = rng.choice(empty)
+            product = rng.choice(boards)
+            slot["componentId"], slot["selectedOptions"] = product["id"], selected_options(rng, product)
+            edit("place", slot=slot["id"], componentId=product["id"], selectedOptions=slot["selectedOptions"])
+
+    if rng.random() < 0.4:
+        at += _think_time(rng, mean=20.0)
+        request("POST", "/api/config/quote", quote_payload(config, by_id))
+    return {"session": session_id, "duration": round(at, 3), "events": events}
+
+def generate_sessions(count: int, products: list[dict], examples: list[dict] | None = None, seed: int = 42) -> list[dict]:
+    rng = random.Random(seed)
+    return [generate_session(f"S{i:06d}", products, examples or [], rng) for i in range(count)]
+
+def write_ndjson(path: Path, rows: list[dict]):
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row))
+            f.write("\n")
+
+def read_ndjson(path: Path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def bulk_insert(session, model, rows: list[dict], chunk_size: int = 5000):
+    for start in range(0, len(rows), chunk_size):
+        session.execute(insert(model), rows[start:start + chunk_size])
+
+def seed_database(database_url: str, products: list[dict], rules: list[dict], articles: list[dict], examples: list[dict] | None = None):
+    """Create the schema in a fresh database and bulk-load the given catalog."""
+    connect_args = {"check_same_thread": False} if "sqlite" in database_url else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as session:
+        bulk_insert(session, models.Product, products)
+        bulk_insert(session, models.Rule, rules)
+        bulk_insert(session, models.Article, articles)
+        bulk_insert(session, ExampleConfig, examples or [])
+        session.commit()
+    engine.dispose()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--rules", type=int, default=1000)
+    parser.add_argument("--articles", type=int, help="defaults to the product count")
+    parser.add_argument("--examples", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=0, help="user session traces (NDJSON only)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="bulk-load into this (empty) database")
+    parser.add_argument("--output-dir", help="write products/rules/articles/examples/sessions .ndjson here")
+    args = parser.parse_args(argv)
+    if not args.database_url and not args.output_dir:
+        parser.error("give --database-url and/or --output-dir")
+    if args.sessions and not args.output_dir:
+        parser.error("--sessions needs --output-dir")
+
+    products = generate_products(args.products, seed=args.seed)
+    data = {
+        "products": products,
+        "rules": generate_rules(args.rules, products, seed=args.seed),
+        "articles": generate_articles(args.products if args.articles is None else args.articles, products, seed=args.seed),
+        "examples": generate_examples(args.examples, products, seed=args.seed),
+    }
+    if args.sessions:
+        data["sessions"] = generate_sessions(args.sessions, products, data["examples"], seed=args.seed)
+
+    if args.output_dir:
+        out = Path(args.output_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        for name, rows in data.items():
+            write_ndjson(out / f"{name}.ndjson", rows)
+            print(f"Wrote {len(rows)} {name} to {out / f'{name}.ndjson'}", file=sys.stderr)
+    if args.database_url:
+        seed_database(args.database_url, data["products"], data["rules"], data["articles"], data["examples"])
+        print(f"Loaded {', '.join(f'{len(data[k])} {k}' for k in ('products', 'rules', 'articles', 'examples'))} into {args.database_url}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
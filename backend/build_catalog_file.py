@@ -0,0 +1,33 @@
+"""
+Write the memory-mapped catalog file (see app/services/catalog_file.py) for the
+current catalog version, e.g. before starting the workers.
+
+    python build_catalog_file.py                       # to CATALOG_FILE
+    python build_catalog_file.py --output catalog.bin
+
+Workers also build it themselves when they find it missing or outdated.
+"""
+import argparse
+import os
+import sys
+import time
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.catalog_file import build_catalog_file
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.CATALOG_FILE, help="file to write (default: CATALOG_FILE)")
+    args = parser.parse_args(argv)
+    if not args.output:
+        parser.error("set CATALOG_FILE or pass --output")
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        version = build_catalog_file(db, args.output)
+    print(f"Wrote catalog version {version} to {args.output} ({os.path.getsize(args.output) / 1024:.1f} KiB) "
+          f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,19 @@
-from app.db.session import SessionLocal, engine
+from app.db.session import engine
 from app.models import models
 from sqlalchemy import text
 
-db = SessionLocal()
+def fix_db():
+    print("Dropping rules table...")
+    with engine.connect() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS rules"))
+        connection.commit()
 
-print("Dropping rules table...")
-with engine.connect() as connection:
-    connection.execute(text("DROP TABLE IF EXISTS rules"))
-    connection.commit()
+    print("Recreating tables...")
+    models.Base.metadata.create_all(bind=engine)
 
-print("Recreating tables...")
-models.Base.metadata.create_all(bind=engine)
+    print("Running seed...")
+    from seed_rules import seed_rules
+    seed_rules()
 
-print("Running seed...")
-import seed_rules
+if __name__ == "__main__":
+    fix_db()
@@ -1,13 +1,27 @@
-from app.db.session import SessionLocal, engine, Base
+"""
+Seed the database with the standard catalog: products, rules, examples, articles.
+
+    python seed.py           # skipped when the seed data is unchanged
+    python seed.py --force   # write it again, e.g. after editing seeded rows
+
+Runs on every production start (start_prod.sh), so it is idempotent: a checksum
+of the seed data is stored in system_settings and an unchanged seed costs one
+SELECT. It also prepares the database (app/services/db_setup.py), so the app
+itself starts without writing.
+"""
+import argparse
+import hashlib
+import json
+from app.db.session import SessionLocal
 from app.models import models
 from app.models.example import ExampleConfig
-import json
+from app.services import rule_compiler
+from app.services.catalog import bump_catalog_version, bump_examples_version
+from app.services.change_log import record_changes
+from app.services.db_setup import SEED_KEY, database_prepared, prepare_database
+from app.services.example_configs import apply_config
 
-# Create tables if they don't exist
-Base.metadata.create_all(bind=engine)
-
-# Initialize DB session
-db = SessionLocal()
+CENTRAL_EMAIL = "alexander.vonallmen@duagon.com"
 
 # Define initial products
 products = [
@@ -448,220 +462,261 @@ products = [
     },
 ]
 
-def seed():
-    print("Seeding database...")
+rules = [
+    {
+        "description": "Forbid 40HP Chassis if > 40HP width",
+        "definition": {
+            "conditions": [
+                { "type": "system_property", "property": "totalWidth", "operator": "gt", "value": 40 }
+            ],
+            "actions": [
+                { "type": "forbid", "componentId": "C_4U_40HP", "message": "4U Compact Chassis (40HP) cannot support current configuration width." },
+                { "type": "forbid", "componentId": "C_3U_40HP", "message": "3U Compact Chassis (40HP) cannot support current configuration width." }
+            ]
+        }
+    },
+    {
+        "description": "Forbid 84HP Chassis if > 84HP width",
+        "definition": {
+            "conditions": [
+                { "type": "system_property", "property": "totalWidth", "operator": "gt", "value": 84 }
+            ],
+            "actions": [
+                { "type": "forbid", "componentId": "C_4U_84HP", "message": "4U Rack Mount Chassis (84HP) cannot support current configuration width." },
+                { "type": "forbid", "componentId": "C_3U_84HP", "message": "3U Rack Mount Chassis (84HP) cannot support current configuration width." }
+            ]
+        }
+    },
+    {
+        "description": "G239 not allowed adjacent to System Slot",
+        "definition": {
+            "conditions": [
+                {
+                    "type": "adjacency",
+                    "componentId": "G239",
+                    "adjacentTo": "system_slot"
+                }
+            ],
+            "actions": [
+            ]
+        }
+    },
+    {
+        "description": "Fan Tray required for > 120W",
+        "category": "chassis_compliance",
+        "definition": {
+            "conditions": [
+                { "type": "system_property", "property": "requiredPower", "operator": "gt", "value": 120 },
+                { "type": "option_not_selected", "componentType": "chassis", "optionId": "fan_tray", "value": True }
+            ],
+            "actions": [
+                { "type": "forbid", "message": "System power exceeds 120W. You must select a chassis with a Fan Tray enabled." }
+            ]
+        }
+    }
+]
+
+examples = [
+    {
+        "id": "EX-01",
+        "name": "Basic Control System",
+        "description": "3U System with G25A CPU and Storage, ideal for industrial control.",
+        "config_json": json.dumps({
+            "slotCount": 10,
+            "systemSlotPosition": "left",
+            "chassisId": "C_3U_40HP",
+            "psuId": "P_3U_300W",
+            "slots": [
+                {"id": 1, "type": "psu", "componentId": "P_3U_300W", "selectedOptions": {}, "width": 8, "blockedBy": None},
+                {"id": 2, "type": "psu", "componentId": "P_3U_300W", "selectedOptions": {}, "width": 4, "blockedBy": 1},
+                {"id": 3, "type": "system", "componentId": "G25A", "selectedOptions": {}, "width": 4},
+                {"id": 4, "type": "peripheral", "componentId": "G51", "selectedOptions": {}, "width": 4},
+                {"id": 5, "type": "peripheral", "componentId": "G211", "selectedOptions": {}, "width": 4},
+                {"id": 6, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 7, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 8, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 9, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 10, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4}
+            ]
+        }),
+        "image_url": "https://www.duagon.com/fileadmin/_processed_/c/6/csm_G25A_front_1_d2b0c9c0c3.png"
+    },
+    {
+        "id": "EX-02",
+        "name": "High Performance Data Logger",
+        "description": "4U System with G28 CPU, multiple storage and network interfaces.",
+        "config_json": json.dumps({
+            "slotCount": 21,
+            "systemSlotPosition": "left",
+            "chassisId": "C_4U_84HP",
+            "psuId": "P_4U_600W",
+            "slots": [
+                {"id": 1, "type": "system", "componentId": "G28", "selectedOptions": {}, "width": 4},
+                {"id": 2, "type": "peripheral", "componentId": "G51", "selectedOptions": {}, "width": 4},
+                {"id": 3, "type": "peripheral", "componentId": "G51", "selectedOptions": {}, "width": 4},
+                {"id": 4, "type": "peripheral", "componentId": "G211", "selectedOptions": {}, "width": 4},
+                {"id": 5, "type": "peripheral", "componentId": "G211", "selectedOptions": {}, "width": 4},
+                {"id": 6, "type": "peripheral", "componentId": "G239", "selectedOptions": {}, "width": 4},
+                {"id": 7, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 8, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 9, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 10, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 11, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 12, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 13, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 14, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 15, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 16, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 17, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 18, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 19, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 20, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
+                {"id": 21, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4}
+            ]
+        }),
+        "image_url": "https://www.duagon.com/fileadmin/_processed_/5/1/csm_G28_front_1_7a0a0a0a0a.png"
+    }
+]
+
+articles = [
+    {
+        "article_number": "G25A-16GB-3",
+        "product_id": "G25A",
+        "selected_options": {"ram": "16gb", "conformal_coating": False}
+    },
+    {
+        "article_number": "G25A-32GB-CC-3",
+        "product_id": "G25A",
+        "selected_options": {"ram": "32gb", "conformal_coating": True}
+    },
+    {
+        "article_number": "G211-STD",
+        "product_id": "G211",
+        "selected_options": {}
+    }
+]
+
+def product_rows() -> list[dict]:
+    """The seeded products with their derived defaults filled in."""
+    rows = []
     for p_data in products:
-        # Generate URL based on ID
-        p_data["url"] = f"https://www.duagon.com/products/details/{p_data['id']}/"
-        # Default EOL date
-        if "eol_date" not in p_data:
-            p_data["eol_date"] = "2030-12-31"
-        
-        # Default height_u
-        if "height_u" not in p_data:
-            p_data["height_u"] = 3 # Default to 3U for cards
+        row = {
+            # Generate URL based on ID
+            "url": f"https://www.duagon.com/products/details/{p_data['id']}/",
+            "eol_date": "2030-12-31",
+            "height_u": 3,  # Default to 3U for cards
+        }
+        if p_data["type"] == "cpu":
+            row["connectors"] = ["P1", "P2", "P3", "P4", "P5", "P6"]
+        elif p_data["type"] in ["storage", "network", "io", "carrier"]:
+            row["connectors"] = ["P1"]  # Minimum mandatory
+        else:
+            row["connectors"] = []  # Chassis, PSU, etc.
+        row.update(p_data)
+        rows.append(row)
+    return rows
+
+def seed_checksum() -> str:
+    data = {
+        "products": product_rows(),
+        "rules": rules,
+        "examples": examples,
+        "articles": articles,
+        "central_email": CENTRAL_EMAIL,
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
 
-        # Default connectors
-        if "connectors" not in p_data:
-            if p_data["type"] == "cpu":
-                p_data["connectors"] = ["P1", "P2", "P3", "P4", "P5", "P6"]
-            elif p_data["type"] in ["storage", "network", "io", "carrier"]:
-                p_data["connectors"] = ["P1"] # Minimum mandatory
-            else:
-                p_data["connectors"] = [] # Chassis, PSU, etc.
+def seed(force: bool = False) -> bool:
+    """Write the seed data unless it is unchanged since the last run. Returns whether it wrote."""
+    with SessionLocal() as db:
+        prepared = database_prepared(db)
+    if not prepared:
+        print("Preparing database...")
+        prepare_database()
+
+    checksum = seed_checksum()
+    with SessionLocal() as db:
+        stored = db.get(models.SystemSetting, SEED_KEY)
+        if not force and stored is not None and stored.value == checksum:
+            print("Seed data unchanged, skipping.")
+            return False
+        _write_seed(db)
+        if stored is None:
+            db.add(models.SystemSetting(key=SEED_KEY, value=checksum))
+        else:
+            stored.value = checksum
+        db.commit()
+    print("Seeding complete.")
+    return True
 
-        
-        # Check if exists
-        existing = db.query(models.Product).filter(models.Product.id == p_data["id"]).first()
+def _write_seed(db):
+    print("Seeding database...")
+    for p_data in product_rows():
+        existing = db.get(models.Product, p_data["id"])
         if not existing:
             print(f"Creating {p_data['name']}")
-            product = models.Product(**p_data)
-            db.add(product)
+            db.add(models.Product(**p_data))
         else:
             print(f"Updating {p_data['name']}")
-            # Update fields
             for key, value in p_data.items():
                 setattr(existing, key, value)
-    
+
     # Seed Settings
-    central_email = db.query(models.SystemSetting).filter(models.SystemSetting.key == "central_email").first()
-    if not central_email:
+    if db.get(models.SystemSetting, "central_email") is None:
         print("Setting default central email")
-        db.add(models.SystemSetting(key="central_email", value="alexander.vonallmen@duagon.com"))
+        db.add(models.SystemSetting(key="central_email", value=CENTRAL_EMAIL))
 
     # Seed Rules
-    rules = [
-        {
-            "description": "Forbid 40HP Chassis if > 40HP width",
-            "definition": {
-                "conditions": [
-                    { "type": "system_property", "property": "totalWidth", "operator": "gt", "value": 40 }
-                ],
-                "actions": [
-                    { "type": "forbid", "componentId": "C_4U_40HP", "message": "4U Compact Chassis (40HP) cannot support current configuration width." },
-                    { "type": "forbid", "componentId": "C_3U_40HP", "message": "3U Compact Chassis (40HP) cannot support current configuration width." }
-                ]
-            }
-        },
-        {
-            "description": "Forbid 84HP Chassis if > 84HP width",
-            "definition": {
-                "conditions": [
-                    { "type": "system_property", "property": "totalWidth", "operator": "gt", "value": 84 }
-                ],
-                "actions": [
-                    { "type": "forbid", "componentId": "C_4U_84HP", "message": "4U Rack Mount Chassis (84HP) cannot support current configuration width." },
-                    { "type": "forbid", "componentId": "C_3U_84HP", "message": "3U Rack Mount Chassis (84HP) cannot support current configuration width." }
-                ]
-            }
-        },
-        {
-            "description": "G239 not allowed adjacent to System Slot",
-            "definition": {
-                "conditions": [
-                    {
-                        "type": "adjacency",
-                        "componentId": "G239",
-                        "adjacentTo": "system_slot"
-                    }
-                ],
-                "actions": [
-                ]
-            }
-        },
-        {
-            "description": "Fan Tray required for > 120W",
-            "category": "chassis_compliance",
-            "definition": {
-                "conditions": [
-                    { "type": "system_property", "property": "requiredPower", "operator": "gt", "value": 120 },
-                    { "type": "option_not_selected", "componentType": "chassis", "optionId": "fan_tray", "value": True }
-                ],
-                "actions": [
-                    { "type": "forbid", "message": "System power exceeds 120W. You must select a chassis with a Fan Tray enabled." }
-                ]
-            }
-        }
-    ]
-
     for r_data in rules:
         existing_rule = db.query(models.Rule).filter(models.Rule.description == r_data["description"]).first()
         if not existing_rule:
             print(f"Creating rule: {r_data['description']}")
             db.add(models.Rule(**r_data))
         else:
-            print(f"Updating rule: {r_data['description']}")
             print(f"Updating rule: {r_data['description']}")
             existing_rule.definition = r_data["definition"]
 
     # Seed Examples
-    examples = [
-        {
-            "id": "EX-01",
-            "name": "Basic Control System",
-            "description": "3U System with G25A CPU and Storage, ideal for industrial control.",
-            "config_json": json.dumps({
-                "slotCount": 10,
-                "systemSlotPosition": "left",
-                "chassisId": "C_3U_40HP",
-                "psuId": "P_3U_300W",
-                "slots": [
-                    {"id": 1, "type": "psu", "componentId": "P_3U_300W", "selectedOptions": {}, "width": 8, "blockedBy": None},
-                    {"id": 2, "type": "psu", "componentId": "P_3U_300W", "selectedOptions": {}, "width": 4, "blockedBy": 1},
-                    {"id": 3, "type": "system", "componentId": "G25A", "selectedOptions": {}, "width": 4},
-                    {"id": 4, "type": "peripheral", "componentId": "G51", "selectedOptions": {}, "width": 4},
-                    {"id": 5, "type": "peripheral", "componentId": "G211", "selectedOptions": {}, "width": 4},
-                    {"id": 6, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 7, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 8, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 9, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 10, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4}
-                ]
-            }),
-            "image_url": "https://www.duagon.com/fileadmin/_processed_/c/6/csm_G25A_front_1_d2b0c9c0c3.png"
-        },
-        {
-            "id": "EX-02",
-            "name": "High Performance Data Logger",
-            "description": "4U System with G28 CPU, multiple storage and network interfaces.",
-            "config_json": json.dumps({
-                "slotCount": 21,
-                "systemSlotPosition": "left",
-                "chassisId": "C_4U_84HP",
-                "psuId": "P_4U_600W",
-                "slots": [
-                    {"id": 1, "type": "system", "componentId": "G28", "selectedOptions": {}, "width": 4},
-                    {"id": 2, "type": "peripheral", "componentId": "G51", "selectedOptions": {}, "width": 4},
-                    {"id": 3, "type": "peripheral", "componentId": "G51", "selectedOptions": {}, "width": 4},
-                    {"id": 4, "type": "peripheral", "componentId": "G211", "selectedOptions": {}, "width": 4},
-                    {"id": 5, "type": "peripheral", "componentId": "G211", "selectedOptions": {}, "width": 4},
-                    {"id": 6, "type": "peripheral", "componentId": "G239", "selectedOptions": {}, "width": 4},
-                    {"id": 7, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 8, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 9, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 10, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 11, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 12, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 13, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 14, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 15, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 16, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 17, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 18, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 19, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 20, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4},
-                    {"id": 21, "type": "peripheral", "componentId": None, "selectedOptions": {}, "width": 4}
-                ]
-            }),
-            "image_url": "https://www.duagon.com/fileadmin/_processed_/5/1/csm_G28_front_1_7a0a0a0a0a.png"
-        }
-    ]
-
     for ex_data in examples:
-        existing_ex = db.query(ExampleConfig).filter(ExampleConfig.id == ex_data["id"]).first()
+        existing_ex = db.get(ExampleConfig, ex_data["id"])
         if not existing_ex:
             print(f"Creating example: {ex_data['name']}")
-            db.add(ExampleConfig(**ex_data))
+            example = ExampleConfig(**ex_data)
+            apply_config(example, ex_data["config_json"])
+            db.add(example)
         else:
             print(f"Updating example: {ex_data['name']}")
             existing_ex.name = ex_data["name"]
             existing_ex.description = ex_data["description"]
-            existing_ex.config_json = ex_data["config_json"]
+            apply_config(existing_ex, ex_data["config_json"])
             existing_ex.image_url = ex_data["image_url"]
 
-    db.commit()
-    db.commit()
-    print("Seeding complete.")
-
     # Seed Articles
-    articles = [
-        {
-            "article_number": "G25A-16GB-3",
-            "product_id": "G25A",
-            "selected_options": {"ram": "16gb", "conformal_coating": False}
-        },
-        {
-            "article_number": "G25A-32GB-CC-3",
-            "product_id": "G25A",
-            "selected_options": {"ram": "32gb", "conformal_coating": True}
-        },
-        {
-            "article_number": "G211-STD",
-            "product_id": "G211",
-            "selected_options": {}
-        }
-    ]
-
+    written_articles = []
     for art_data in articles:
         existing = db.query(models.Article).filter(models.Article.article_number == art_data["article_number"]).first()
         if not existing:
             print(f"Creating article: {art_data['article_number']}")
-            db.add(models.Article(**art_data))
+            existing = models.Article(**art_data)
+            db.add(existing)
         else:
-             print(f"Updating article: {art_data['article_number']}")
-             existing.product_id = art_data["product_id"]
-             existing.selected_options = art_data["selected_options"]
-    db.commit()
+            print(f"Updating article: {art_data['article_number']}")
+            existing.product_id = art_data["product_id"]
+            existing.selected_options = art_data["selected_options"]
+        written_articles.append(existing)
+    db.flush()
+
+    # Compile the seeded rules against the seeded products
+    recompiled = rule_compiler.recompile_rules(db)
+
+    # Running workers pick the seeded catalog up like any other admin change
+    version = bump_catalog_version(db)
+    record_changes(db, version, "product", upserted=[p["id"] for p in products])
+    record_changes(db, version, "rule", upserted=recompiled)
+    record_changes(db, version, "article", upserted=[a.id for a in written_articles])
+    bump_examples_version(db)
 
 if __name__ == "__main__":
-    seed()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="write the seed data even if it is unchanged")
+    seed(force=parser.parse_args().force)
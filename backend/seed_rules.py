@@ -1,9 +1,10 @@
 from app.db.session import SessionLocal
 from app.models import models
+from app.services import rule_compiler
+from app.services.catalog import bump_catalog_version
+from app.services.change_log import record_changes
 import json
 
-db = SessionLocal()
-
 rules_data = [
     {
         "description": "G28 in slot 1 forbids G239 in slot 2",
@@ -38,13 +39,28 @@ rules_data = [
     }
 ]
 
-print("Seeding rules...")
-# Clear existing rules
-db.query(models.Rule).delete()
+def seed_rules():
+    db = SessionLocal()
+    print("Seeding rules...")
+    # Clear existing rules
+    old_ids = {rule_id for (rule_id,) in db.query(models.Rule.id)}
+    db.query(models.Rule).delete()
+
+    for r in rules_data:
+        rule = models.Rule(description=r["description"], definition=r["definition"])
+        db.add(rule)
+    db.flush()
+
+    # Compile the new rules (the only ones left uncompiled)
+    added = rule_compiler.recompile_rules(db, set())
 
-for r in rules_data:
-    rule = models.Rule(description=r["description"], definition=r["definition"])
-    db.add(rule)
+    # Running workers and syncing clients pick the new rule set up like any other admin change
+    version = bump_catalog_version(db)
+    # SQLite may hand a deleted id to a new rule: that id is an upsert, not a tombstone
+    record_changes(db, version, "rule", upserted=added, deleted=old_ids - set(added))
+    db.commit()
+    db.close()
+    print("Rules seeded.")
 
-db.commit()
-print("Rules seeded.")
+if __name__ == "__main__":
+    seed_rules()
@@ -0,0 +1,19 @@
+import os
+import tempfile
+
+import pytest
+
+# The app reads its settings at import time: point it at a scratch database first
+_db_dir = tempfile.mkdtemp(prefix="cpci-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/test.db"
+os.environ.pop("CATALOG_FILE", None)
+
+from fastapi.testclient import TestClient  # noqa: E402
+from app.main import app  # noqa: E402
+
+ADMIN = {"Authorization": "Bearer valid-admin-token"}
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,35 @@
+import json
+
+def _example(example_id: str, config: dict) -> dict:
+    return {"id": example_id, "name": example_id, "description": "", "config_json": json.dumps(config)}
+
+def _summary(client, example_id: str) -> dict:
+    response = client.get("/api/examples/summaries")
+    assert response.status_code == 200
+    return next(example for example in response.json() if example["id"] == example_id)
+
+def test_malformed_gallery_fields_do_not_break_summaries(client):
+    response = client.post("/api/examples/", json=_example("EX-MALFORMED", {"slotCount": "abc", "chassisId": 5, "slots": []}))
+    assert response.status_code == 200
+
+    summary = _summary(client, "EX-MALFORMED")
+    assert (summary["slot_count"], summary["chassis_id"]) == (None, None)
+
+def test_gallery_fields_are_stored(client):
+    config = {"slotCount": 9, "chassisId": "CH-1", "slots": []}
+    assert client.post("/api/examples/", json=_example("EX-GOOD", config)).status_code == 200
+    summary = _summary(client, "EX-GOOD")
+    assert (summary["slot_count"], summary["chassis_id"]) == (9, "CH-1")
+
+    # bool is an int, but not a slot count
+    config["slotCount"] = True
+    example = _example("EX-GOOD", config)
+    del example["id"]
+    assert client.put("/api/examples/EX-GOOD", json=example).status_code == 200
+    assert _summary(client, "EX-GOOD")["slot_count"] is None
+
+def test_import_skips_malformed_gallery_fields(client):
+    response = client.post("/api/examples/import", json=[_example("EX-IMPORTED", {"slotCount": [1], "chassisId": {}})])
+    assert response.status_code == 200
+    summary = _summary(client, "EX-IMPORTED")
+    assert (summary["slot_count"], summary["chassis_id"]) == (None, None)
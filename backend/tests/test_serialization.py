@@ -0,0 +1,13 @@
+import pytest
+
+from benchmarks import serialization, synthetic
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_cached_routes_match_response_model(client, seed):
+    # Byte-for-byte against the response_model handlers the cache replaced
+    products = synthetic.generate_products(60, seed=seed)
+    rules = synthetic.generate_rules(40, products, seed=seed)
+    articles = synthetic.generate_articles(40, products, seed=seed)
+    examples = synthetic.generate_examples(15, products, seed=seed)
+    with serialization.clients(products, rules, articles, examples) as (fast, slow):
+        assert serialization.mismatches(fast, slow) == []
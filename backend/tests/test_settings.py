@@ -0,0 +1,17 @@
+from conftest import ADMIN
+
+def test_internal_settings_are_neither_listed_nor_writable(client):
+    # Any catalog write creates the catalog_version row
+    assert client.post("/api/examples/", json={"id": "EX-SETTINGS", "name": "x", "description": "", "config_json": "{}"}).status_code == 200
+
+    keys = {setting["key"] for setting in client.get("/api/admin/settings/", headers=ADMIN).json()}
+    assert not keys & {"catalog_version", "examples_version", "schema_fingerprint"}
+
+    response = client.put("/api/admin/settings/examples_version", json={"key": "examples_version", "value": "abc"}, headers=ADMIN)
+    assert response.status_code == 403
+    assert client.get("/api/examples/summaries").status_code == 200
+
+def test_other_settings_are_writable(client):
+    response = client.put("/api/admin/settings/central_email", json={"key": "central_email", "value": "a@example.com"}, headers=ADMIN)
+    assert response.status_code == 200
+    assert {"key": "central_email", "value": "a@example.com"} in client.get("/api/admin/settings/", headers=ADMIN).json()
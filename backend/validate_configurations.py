@@ -0,0 +1,66 @@
+"""
+Re-validate every stored configuration and example against the current catalog and rules,
+e.g. after products went EOL or rules changed.
+
+    python validate_configurations.py                      # configurations + examples
+    python validate_configurations.py --only examples --invalid-only
+    python validate_configurations.py --workers 8 --output results.ndjson
+
+Results are written as NDJSON (one line per configuration, stdout by default) and a
+summary goes to stderr. Exits 1 if any configuration is invalid.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from app.db.session import SessionLocal
+from app.services import batch_validation
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", choices=("configurations", "examples"), help="validate only one source")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="process pool size (1 = no pool)")
+    parser.add_argument("--chunk-size", type=int, default=batch_validation.CHUNK_SIZE)
+    parser.add_argument("--ignore-category", action="append", default=[], help="skip rules of this category (repeatable)")
+    parser.add_argument("--invalid-only", action="store_true", help="only write results with errors")
+    parser.add_argument("--output", help="NDJSON file instead of stdout")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        products, rules = batch_validation.load_catalog(db)
+        entries = []
+        if args.only != "examples":
+            entries += batch_validation.stored_configurations(db, {p["id"]: p for p in products})
+        if args.only != "configurations":
+            entries += batch_validation.example_configurations(db)
+    finally:
+        db.close()
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    invalid = warned = 0
+    try:
+        for result in batch_validation.validate_entries(
+            entries, products, rules, workers=args.workers,
+            ignore_categories=args.ignore_category, chunk_size=args.chunk_size,
+        ):
+            invalid += not result["valid"]
+            warned += bool(result["warnings"])
+            if result["valid"] and args.invalid_only:
+                continue
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if args.output:
+            out.close()
+
+    print(
+        f"Validated {len(entries)} configurations against {len(products)} products and {len(rules)} rules "
+        f"in {time.perf_counter() - started:.2f}s: {invalid} invalid, {warned} with warnings",
+        file=sys.stderr,
+    )
+    return 1 if invalid else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -36,11 +36,21 @@ source "$PROJECT_ROOT/backend/venv/bin/activate"
 echo "Installing backend dependencies..."
 pip install -r requirements.txt
 
-echo " ensuring database is initialized..."
+# Upgrades the schema and writes the seed data; skipped when both are unchanged
+echo "Preparing database..."
 python seed.py
 
 # 3. Start Server
 echo "--- [3/3] Starting Backend Server ---"
+# Shared metrics directory so /metrics aggregates all workers (wiped on every start)
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-$PROJECT_ROOT/backend/.prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+# Catalog arrays and rule bitsets memory-mapped by all workers (rebuilt when the catalog changes)
+export CATALOG_FILE="${CATALOG_FILE:-$PROJECT_ROOT/backend/.catalog/catalog.bin}"
+mkdir -p "$(dirname "$CATALOG_FILE")"
+
 echo "Starting Uvicorn on 127.0.0.1:8000 with 4 workers..."
-# Use exec to replace the shell with uvicorn process
-exec uvicorn app.main:app --host 127.0.0.1 --port 8000 --workers 4
+# The launcher loads the catalog once and forks the workers, which share it copy-on-write.
+# Use exec to replace the shell with the launcher process
+exec python -m app.server --host 127.0.0.1 --port 8000 --workers 4
@@ -1,3 +1,4 @@
+import { useEffect } from 'react';
 import { BrowserRouter as Router, Routes, Route, Navigate } from 'react-router-dom';
 import { Layout } from './components/Layout';
 import { TopologyPage } from './pages/TopologyPage';
@@ -7,6 +8,7 @@ import { QuotePage } from './pages/QuotePage';
 import { AdminPage } from './pages/AdminPage';
 import { LoginPage } from './pages/LoginPage';
 import { useAuthStore } from './store/authStore';
+import { useConfigStore } from './store/configStore';
 import { ToastProvider } from './components/ui/Toast';
 
 function ProtectedRoute({ children }: { children: React.ReactNode }) {
@@ -20,6 +22,9 @@ function ProtectedRoute({ children }: { children: React.ReactNode }) {
 }
 
 function App() {
+  // Keep the loaded catalog current while the configurator is open
+  useEffect(() => useConfigStore.getState().watchCatalog(), []);
+
   return (
     <ToastProvider>
       <Router>
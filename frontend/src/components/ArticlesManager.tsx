@@ -37,7 +37,7 @@ export function ArticlesManager() {
         try {
             const [artData, prodData] = await Promise.all([
                 api.articles.list(),
-                api.products.list()
+                api.products.list({ fields: ['id', 'name', 'options'] })
             ]);
             setArticles(artData);
             setProducts(prodData);
@@ -828,13 +828,16 @@ function RulesManager() {
                 definition: definition
             };
 
+            let saved;
             if (isEditing) {
-                await api.rules.update(newRule.id, ruleData);
+                saved = await api.rules.update(newRule.id, ruleData);
                 toast.success("Rule updated successfully.");
             } else {
-                await api.rules.create(ruleData);
+                saved = await api.rules.create(ruleData);
                 toast.success("Rule created successfully.");
             }
+            // Dead or shadowed rules are saved, but the admin should know
+            saved.warnings?.forEach((warning: string) => toast.warning(warning, 8000));
 
             setIsCreating(false);
             setIsEditing(false);
@@ -846,7 +849,7 @@ function RulesManager() {
             });
         } catch (error) {
             console.error("Failed to save rule", error);
-            toast.error("Invalid JSON definition or server error.");
+            toast.error(error instanceof SyntaxError ? "Invalid JSON definition." : (error as Error).message || "Server error.");
         }
     };
 
@@ -898,7 +901,8 @@ function RulesManager() {
 
         try {
             const result = await api.rules.import(file);
-            toast.success(`Imported: ${result.added} added, ${result.updated} updated.`);
+            toast.success(`Imported: ${result.added} added, ${result.updated} updated, ${result.duplicates} duplicates skipped.`);
+            result.errors?.forEach((error: string) => toast.error(error, 8000));
             loadRules();
         } catch (error) {
             console.error("Import failed", error);
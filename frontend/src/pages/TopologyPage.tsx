@@ -8,7 +8,7 @@ import { cn } from '../lib/utils';
 export function TopologyPage() {
     const {
         slotCount, systemSlotPosition, setSlotCount, setSystemSlotPosition,
-        examples, fetchExamples, importConfig, fetchProducts
+        examples, fetchExamples, loadExample, fetchProducts
     } = useConfigStore();
 
     useEffect(() => {
@@ -18,13 +18,8 @@ export function TopologyPage() {
 
     console.log("Examples:", examples);
 
-    const handleSelectExample = (configJson: string) => {
-        try {
-            const config = JSON.parse(configJson);
-            importConfig(config);
-        } catch (e) {
-            console.error("Failed to parse example config", e);
-        }
+    const handleSelectExample = (exampleId: string) => {
+        loadExample(exampleId);
     };
 
     return (
@@ -150,7 +145,7 @@ export function TopologyPage() {
                         {examples.map(example => (
                             <button
                                 key={example.id}
-                                onClick={() => handleSelectExample(example.config_json)}
+                                onClick={() => handleSelectExample(example.id)}
                                 className="group text-left bg-white rounded-xl shadow-sm border border-slate-200 hover:shadow-md transition-all overflow-hidden flex flex-col h-full"
                             >
                                 {example.image_url ? (
@@ -165,6 +160,11 @@ export function TopologyPage() {
                                 <div className="p-4 space-y-2 flex-1">
                                     <h3 className="font-bold text-slate-900 group-hover:text-duagon-blue transition-colors">{example.name}</h3>
                                     <p className="text-sm text-slate-500">{example.description}</p>
+                                    {(example.slot_count || example.chassis_id) && (
+                                        <p className="text-xs text-slate-400">
+                                            {[example.slot_count && `${example.slot_count} slots`, example.chassis_id].filter(Boolean).join(' · ')}
+                                        </p>
+                                    )}
                                 </div>
                             </button>
                         ))}
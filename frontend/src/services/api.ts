@@ -13,6 +13,30 @@ const getHeaders = () => {
     return headers;
 };
 
+// FastAPI error details are a string or a list (of strings or validation errors)
+const errorMessage = (body: any, fallback: string) => {
+    const detail = body?.detail;
+    if (Array.isArray(detail)) return detail.map((d: any) => (typeof d === 'string' ? d : d.msg)).join('\n');
+    return detail || fallback;
+};
+
+// Backend product rows with the camelCase aliases the configurator uses
+export const toProduct = (p: any) => ({
+    ...p,
+    powerWatts: p.power_watts,
+    widthHp: p.width_hp,
+    price1: p.price_1,
+    price25: p.price_25,
+    price50: p.price_50,
+    price100: p.price_100,
+    price250: p.price_250,
+    price500: p.price_500,
+    url: p.url,
+    eol_date: p.eol_date,
+    heightU: p.height_u,
+    externalInterfaces: p.external_interfaces,
+});
+
 export const api = {
     auth: {
         login: async (formData: FormData) => {
@@ -25,24 +49,15 @@ export const api = {
         }
     },
     products: {
-        list: async () => {
-            const res = await fetch(`${API_BASE_URL}/admin/products/`);
+        // `fields` (e.g. ['id', 'name']) or a named projection ('card', 'pricing', 'full') limits the returned columns
+        list: async (select?: { fields?: string[]; projection?: 'card' | 'pricing' | 'full' }) => {
+            const params = new URLSearchParams();
+            if (select?.fields) params.set('fields', select.fields.join(','));
+            if (select?.projection) params.set('projection', select.projection);
+            const query = params.toString();
+            const res = await fetch(`${API_BASE_URL}/admin/products/${query ? `?${query}` : ''}`);
             const data = await res.json();
-            return data.map((p: any) => ({
-                ...p,
-                powerWatts: p.power_watts,
-                widthHp: p.width_hp,
-                price1: p.price_1,
-                price25: p.price_25,
-                price50: p.price_50,
-                price100: p.price_100,
-                price250: p.price_250,
-                price500: p.price_500,
-                url: p.url,
-                eol_date: p.eol_date,
-                heightU: p.height_u,
-                externalInterfaces: p.external_interfaces,
-            }));
+            return data.map(toProduct);
         },
         create: async (data: any) => {
             const res = await fetch(`${API_BASE_URL}/admin/products/`, {
@@ -97,7 +112,9 @@ export const api = {
                 headers: getHeaders(),
                 body: JSON.stringify(data),
             });
-            return res.json();
+            const body = await res.json();
+            if (!res.ok) throw new Error(errorMessage(body, 'Failed to create rule'));
+            return body;
         },
         update: async (id: number, data: any) => {
             const res = await fetch(`${API_BASE_URL}/admin/rules/${id}`, {
@@ -105,7 +122,9 @@ export const api = {
                 headers: getHeaders(),
                 body: JSON.stringify(data),
             });
-            return res.json();
+            const body = await res.json();
+            if (!res.ok) throw new Error(errorMessage(body, 'Failed to update rule'));
+            return body;
         },
         delete: async (id: number) => {
             await fetch(`${API_BASE_URL}/admin/rules/${id}`, {
@@ -158,13 +177,52 @@ export const api = {
             });
             if (!res.ok) throw new Error('Failed to request quote');
             return res.json();
-        }
+        },
+        // Server-side sessions: the state stays on the server, changes are sent as deltas
+        // ({ op: 'set_slot', slot: {...} }, { op: 'set_chassis', chassis_id, options }, ...)
+        sessions: {
+            create: async (config?: any, ignoreCategories: string[] = []) => {
+                const res = await fetch(`${API_BASE_URL}/config/sessions`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ config, ignore_categories: ignoreCategories }),
+                });
+                const body = await res.json();
+                if (!res.ok) throw new Error(errorMessage(body, 'Failed to start session'));
+                return body;
+            },
+            update: async (id: string, deltas: any[]) => {
+                const res = await fetch(`${API_BASE_URL}/config/sessions/${id}`, {
+                    method: 'PATCH',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify({ deltas }),
+                });
+                const body = await res.json();
+                if (!res.ok) throw new Error(errorMessage(body, 'Failed to update session'));
+                return body;
+            },
+            delete: async (id: string) => {
+                await fetch(`${API_BASE_URL}/config/sessions/${id}`, { method: 'DELETE' });
+            },
+        },
     },
     examples: {
         list: async () => {
             const res = await fetch(`${API_BASE_URL}/examples/`);
             return res.json();
         },
+        // Gallery entries (id, name, description, image_url, slot_count, chassis_id) without the configuration
+        summaries: async () => {
+            const res = await fetch(`${API_BASE_URL}/examples/summaries`);
+            return res.json();
+        },
+        // One example with its parsed configuration in `config`
+        get: async (id: string) => {
+            const res = await fetch(`${API_BASE_URL}/examples/${encodeURIComponent(id)}`);
+            const body = await res.json();
+            if (!res.ok) throw new Error(errorMessage(body, 'Failed to load example'));
+            return body;
+        },
         create: async (data: any) => {
             const res = await fetch(`${API_BASE_URL}/examples/`, {
                 method: 'POST',
@@ -215,6 +273,16 @@ export const api = {
             return blob;
         }
     },
+    catalog: {
+        // Products, rules and articles changed after catalog version `since`, plus deleted ids.
+        // `reset: true` means the lists must be reloaded; `version` is where to sync from next.
+        changes: async (since?: number | null) => {
+            const query = since === undefined || since === null ? '' : `?since=${since}`;
+            const res = await fetch(`${API_BASE_URL}/catalog/changes${query}`);
+            const data = await res.json();
+            return { ...data, products: (data.products || []).map(toProduct) };
+        },
+    },
     articles: {
         list: async () => {
             const res = await fetch(`${API_BASE_URL}/articles/`);
@@ -23,6 +23,7 @@ interface ConfigState {
     products: any[];
     rules: any[];
     articles: any[];
+    catalogVersion: number | null;
 
     setSlotCount: (count: number) => void;
     setSystemSlotPosition: (position: SystemSlotPosition) => void;
@@ -31,9 +32,12 @@ interface ConfigState {
     setChassis: (chassisId: string | null, options?: Record<string, any>) => void;
     setPsu: (psuId: string | null, options?: Record<string, any>) => void;
     fetchProducts: () => Promise<void>;
+    applyCatalogChanges: (changes: any) => void;
+    watchCatalog: () => () => void;
     resetConfig: () => void;
     examples: any[];
     fetchExamples: () => Promise<void>;
+    loadExample: (id: string) => Promise<void>;
     importConfig: (config: any) => void;
     validateRules: (state?: any, options?: { ignoreCategories?: string[] }) => string[];
     getRemainingInterfaces: (state: any) => Record<string, number>;
@@ -590,11 +594,20 @@ export const useConfigStore = create<ConfigState>((set, get) => ({
     products: [],
     rules: [],
     articles: [],
+    catalogVersion: null,
     fetchProducts: async () => {
         try {
             // Import api dynamically to avoid circular dependency if api imports store (unlikely but safe)
             // Or just import at top if safe. Let's import at top.
             const { api } = await import('../services/api');
+
+            // Already loaded: only apply what changed since then
+            const changes = await api.catalog.changes(get().catalogVersion);
+            if (!changes.reset) {
+                if (changes.version !== changes.since) get().applyCatalogChanges(changes);
+                return;
+            }
+
             const products = await api.products.list();
             set({ products });
 
@@ -604,12 +617,52 @@ export const useConfigStore = create<ConfigState>((set, get) => ({
 
             // Fetch Articles
             const articles = await api.articles.list();
-            set({ articles });
+            set({ articles, catalogVersion: changes.version });
         } catch (error) {
             console.error("Failed to fetch products/rules", error);
         }
     },
 
+    // Merge a /api/catalog/changes body (or "catalog" event) into the loaded lists
+    applyCatalogChanges: (changes: any) => set((state) => {
+        const merge = (rows: any[], updated: any[], deleted: any[]) => {
+            const byId = new Map(updated.map((row) => [row.id, row]));
+            const gone = new Set(deleted);
+            const merged = rows.filter((row) => !gone.has(row.id)).map((row) => byId.get(row.id) ?? row);
+            const known = new Set(rows.map((row) => row.id));
+            return [...merged, ...updated.filter((row) => !known.has(row.id))];
+        };
+        return {
+            products: merge(state.products, changes.products, changes.deleted.products),
+            rules: merge(state.rules, changes.rules, changes.deleted.rules),
+            articles: merge(state.articles, changes.articles, changes.deleted.articles),
+            catalogVersion: changes.version,
+        };
+    }),
+
+    // Live catalog updates over server-sent events; returns a function that closes the stream
+    watchCatalog: () => {
+        const version = get().catalogVersion;
+        const source = new EventSource(`/api/catalog/events${version === null ? '' : `?since=${version}`}`);
+        source.addEventListener('catalog', async (event) => {
+            const current = get().catalogVersion;
+            if (current === null) return; // Not loaded yet: the first fetch gets the current catalog
+            const changes = JSON.parse((event as MessageEvent).data);
+            if (changes.version <= current) return;
+            if (changes.since > current) {
+                // Missed an event: catch up through /api/catalog/changes
+                get().fetchProducts();
+                return;
+            }
+            const { toProduct } = await import('../services/api');
+            get().applyCatalogChanges({ ...changes, products: changes.products.map(toProduct) });
+        });
+        source.addEventListener('resync', () => {
+            if (get().catalogVersion !== null) get().fetchProducts();
+        });
+        return () => source.close();
+    },
+
     resetConfig: () => set(() => ({
         slotCount: 21,
         systemSlotPosition: 'left',
@@ -630,12 +683,21 @@ export const useConfigStore = create<ConfigState>((set, get) => ({
     fetchExamples: async () => {
         try {
             const { api } = await import('../services/api');
-            const response = await api.examples.list();
+            const response = await api.examples.summaries();
             set({ examples: response });
         } catch (error) {
             console.error('Failed to fetch examples:', error);
         }
     },
+    loadExample: async (id) => {
+        try {
+            const { api } = await import('../services/api');
+            const example = await api.examples.get(id);
+            if (example.config) get().importConfig(example.config);
+        } catch (error) {
+            console.error('Failed to load example:', error);
+        }
+    },
 
     importConfig: (config: any) => set((state) => {
         // Validate config structure roughly?